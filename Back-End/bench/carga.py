@@ -0,0 +1,441 @@
+"""Prueba de carga de la API: siembra la base y le pega a cada familia de rutas con concurrencia fija.
+
+Por cada escenario (ej. "maquinas.por_id", "consumos.crear") corre --concurrencia workers
+durante --duracion segundos, cada uno con su conexion keep-alive, y reporta pedidos/s,
+p50/p95/p99 y tasa de error en JSON (con el commit), para comparar corridas entre cambios.
+Solo usa la biblioteca estandar del lado del cliente.
+
+Uso (desde Back-End/, con la base del .env: el MySQL del compose o uno local):
+    python -m bench.carga --escala 1 --concurrencia 16 --duracion 10 --salida carga.json
+    python -m bench.carga --url http://localhost:8082 --sin-sembrar --solo consumos,mantenimientos
+
+Sin --url levanta `uvicorn main:app` en otro proceso en un puerto libre y lo apaga al final.
+La siembra agrega filas (no borra nada): usar una base de pruebas.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+# Filas que se siembran con --escala 1
+TAMANIOS = {
+    "proveedores": 10,
+    "clientes": 100,
+    "insumos": 40,
+    "tecnicos": 30,
+    "maquinas": 300,
+    "consumos": 30000,
+    "mantenimientos": 6000,
+}
+LOTE = 1000
+
+USUARIO = {"nombre": "bench_carga", "contrasenia": "bench_carga", "cargo": "bench"}
+
+
+# ---------- siembra ----------
+
+def _insertar(cursor, sql, filas):
+    for i in range(0, len(filas), LOTE):
+        cursor.executemany(sql, filas[i:i + LOTE])
+
+
+def _ids(cursor, tabla, col_id):
+    cursor.execute(f"SELECT {col_id} FROM {tabla}")
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def sembrar(escala, semilla=1, api_levantada=True):
+    """Agrega datos al azar (reproducibles con la semilla) respetando las FKs"""
+    from database.connection import get_connection
+    from database import consumo_mensual
+    from database.cambios import registrar_carga_externa
+
+    conn = get_connection()
+    if conn is None:
+        raise SystemExit(2)
+    azar = random.Random(semilla)
+    n = {tabla: max(1, int(cantidad * escala)) for tabla, cantidad in TAMANIOS.items()}
+    inicio = datetime.now() - timedelta(days=730)
+    try:
+        cursor = conn.cursor()
+        _insertar(cursor, "INSERT INTO proveedores (nombre) VALUES (%s)",
+                  [(f"bench proveedor {i}",) for i in range(n["proveedores"])])
+        _insertar(cursor, "INSERT INTO clientes (nombre, direccion, telefono, correo) VALUES (%s, %s, %s, %s)",
+                  [(f"bench cliente {i}", f"Calle {i}", f"099{i:06d}", f"c{i}@bench.uy") for i in range(n["clientes"])])
+        conn.commit()
+        proveedores = _ids(cursor, "proveedores", "id_proveedor")
+        clientes = _ids(cursor, "clientes", "id_cliente")
+
+        _insertar(cursor, "INSERT INTO insumos (tipo, precio, id_proveedor) VALUES (%s, %s, %s)",
+                  [(f"bench insumo {i}", azar.randint(50, 900), azar.choice(proveedores)) for i in range(n["insumos"])])
+        _insertar(cursor, "INSERT INTO tecnicos (nombre, tipo_visita, id_cliente) VALUES (%s, %s, %s)",
+                  [(f"bench tecnico {i}", azar.choice(["preventiva", "correctiva"]), azar.choice(clientes))
+                   for i in range(n["tecnicos"])])
+        _insertar(cursor, "INSERT INTO maquinas (modelo, id_cliente, ubicacion_cliente, costo_alquiler_mensual) VALUES (%s, %s, %s, %s)",
+                  [(f"bench modelo {i % 12}", azar.choice(clientes), f"Piso {i % 9}", azar.randint(1000, 8000))
+                   for i in range(n["maquinas"])])
+        conn.commit()
+        insumos = _ids(cursor, "insumos", "id_insumo")
+        tecnicos = _ids(cursor, "tecnicos", "id_tecnico")
+        maquinas = _ids(cursor, "maquinas", "id_maquina")
+
+        _insertar(cursor, "INSERT INTO consumoInsumos (fecha, id_maquina, cobro_mensual, id_insumo) VALUES (%s, %s, %s, %s)",
+                  [(inicio + timedelta(minutes=azar.randint(0, 730 * 1440)), azar.choice(maquinas),
+                    round(azar.uniform(10, 500), 2), azar.choice(insumos)) for _ in range(n["consumos"])])
+        _insertar(cursor, "INSERT INTO mantenimientos (id_maquina, id_tecnico, tipo, fecha, observaciones) VALUES (%s, %s, %s, %s, %s)",
+                  [(azar.choice(maquinas), azar.choice(tecnicos), azar.choice(["preventivo", "correctivo"]),
+                    inicio + timedelta(minutes=azar.randint(0, 730 * 1440)), "bench") for _ in range(n["mantenimientos"])])
+        conn.commit()
+        cursor.close()
+        # Los consumos se cargaron por afuera de la API: el resumen mensual se rehace de cero
+        consumo_mensual.recalcular(conn)
+    finally:
+        conn.close()
+
+    # Una API ya levantada (--url) sin Redis no ve la siembra: registrar_carga_externa avisa
+    registrar_carga_externa(
+        ("proveedores", "clientes", "insumos", "tecnicos", "maquinas", "consumoInsumos", "mantenimientos"),
+        avisar=api_levantada,
+    )
+    return n
+
+
+# ---------- cliente HTTP ----------
+
+class Cliente:
+    """Una conexion keep-alive por worker; si se corta se reabre en el pedido siguiente"""
+
+    # Token de sesion para todos los clientes (lo pone preparar() despues del login)
+    token = None
+
+    def __init__(self, url, timeout=30):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.port = partes.port or 80
+        self.timeout = timeout
+        self._conn = None
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+        headers = {"Content-Type": "application/json"} if datos else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        for intento in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(metodo, ruta, body=datos, headers=headers)
+                respuesta = self._conn.getresponse()
+                contenido = respuesta.read()
+                return respuesta.status, contenido
+            except (http.client.HTTPException, OSError):
+                self._conn.close()
+                self._conn = None
+                if intento:
+                    raise
+
+    def cerrar(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def _json(cliente, ruta):
+    estado, contenido = cliente.pedir("GET", ruta)
+    if estado != 200:
+        raise RuntimeError(f"GET {ruta} devolvio {estado}")
+    return json.loads(contenido)
+
+
+def preparar(url):
+    """Ids existentes (por la API, asi sirve contra cualquier servidor) y un usuario para el login"""
+    cliente = Cliente(url)
+    try:
+        # Primero el login, por si la API corre con AUTH_REQUERIDO=1
+        # (si el usuario ya existe el registro devuelve 400, alcanza con que el login funcione)
+        cliente.pedir("POST", "/api/usuarios/register", USUARIO)
+        estado, contenido = cliente.pedir("POST", "/api/usuarios/login", USUARIO)
+        if estado != 200:
+            raise SystemExit(f"❌ No se pudo hacer login con el usuario de prueba ({estado})")
+        sesion = json.loads(contenido)
+        Cliente.token = sesion["token"]
+        ids = {
+            "clientes": [c["id"] for c in _json(cliente, "/api/clientes/?limit=1000")],
+            "proveedores": [p["id_proveedor"] for p in _json(cliente, "/api/proveedores/?limit=1000")],
+            "insumos": [i["id_insumo"] for i in _json(cliente, "/api/insumos/?limit=1000")],
+            "tecnicos": [t["id_tecnico"] for t in _json(cliente, "/api/tecnicos/?limit=1000")],
+            "maquinas": [m["id_maquina"] for m in _json(cliente, "/api/maquinas/?limit=1000")],
+            "consumos": [c["id_consumo"] for c in _json(cliente, "/api/consumos/?limit=1000")],
+            "mantenimientos": [m["id_mantenimiento"] for m in _json(cliente, "/api/mantenimientos/?limit=1000")],
+        }
+        vacias = [tabla for tabla, lista in ids.items() if not lista]
+        if vacias:
+            raise SystemExit(f"❌ No hay datos en {', '.join(vacias)}: correr sin --sin-sembrar")
+        ids["usuarios"] = [sesion["id_usuario"]]
+        return ids
+    finally:
+        cliente.cerrar()
+
+
+# ---------- escenarios ----------
+
+def _fecha(azar):
+    return (datetime.now() - timedelta(minutes=azar.randint(0, 60 * 24 * 365))).isoformat(timespec="seconds")
+
+
+def escenarios(ids):
+    """{familia: [(nombre, funcion(azar, creados) -> (metodo, ruta, cuerpo))]}
+
+    `creados` son los ids que devolvieron los POST de ese escenario (ej. para borrar consumos propios).
+    """
+    def uno(tabla):
+        return lambda azar: azar.choice(ids[tabla])
+
+    cliente, proveedor, insumo, tecnico = uno("clientes"), uno("proveedores"), uno("insumos"), uno("tecnicos")
+    maquina, consumo, mantenimiento = uno("maquinas"), uno("consumos"), uno("mantenimientos")
+
+    def cuerpo_cliente(a):
+        return {"nombre": f"bench {a.randint(0, 10**6)}", "direccion": "Calle 1", "telefono": "099000000", "correo": "b@bench.uy"}
+
+    def cuerpo_maquina(a):
+        return {"modelo": "bench", "id_cliente": cliente(a), "ubicacion_cliente": "Piso 1", "costo_alquiler_mensual": a.randint(1000, 8000)}
+
+    def cuerpo_insumo(a):
+        return {"tipo": "bench", "precio": a.randint(50, 900), "id_proveedor": proveedor(a)}
+
+    def cuerpo_tecnico(a):
+        return {"nombre": "bench", "tipo_visita": "preventiva", "id_cliente": cliente(a)}
+
+    def cuerpo_consumo(a):
+        return {"fecha": _fecha(a), "id_maquina": maquina(a), "cobro_mensual": round(a.uniform(10, 500), 2), "id_insumo": insumo(a)}
+
+    def cuerpo_mantenimiento(a):
+        return {"id_maquina": maquina(a), "id_tecnico": tecnico(a), "tipo": "preventivo", "fecha": _fecha(a), "observaciones": "bench"}
+
+    def borrar_consumo(a, creados):
+        # Solo los que creo el escenario de alta, asi no se vacia la base entre corridas
+        try:
+            return "DELETE", f"/api/consumos/{creados.pop()}", None
+        except IndexError:
+            return "POST", "/api/consumos/", cuerpo_consumo(a)
+
+    return {
+        "clientes": [
+            ("listar", lambda a, c: ("GET", "/api/clientes/?limit=100", None)),
+            ("crear", lambda a, c: ("POST", "/api/clientes/", cuerpo_cliente(a))),
+            ("actualizar", lambda a, c: ("PUT", f"/api/clientes/{cliente(a)}", cuerpo_cliente(a))),
+        ],
+        "maquinas": [
+            ("listar", lambda a, c: ("GET", "/api/maquinas/?limit=100", None)),
+            ("por_id", lambda a, c: ("GET", f"/api/maquinas/{maquina(a)}", None)),
+            ("por_cliente", lambda a, c: ("GET", f"/api/maquinas/cliente/{cliente(a)}", None)),
+            ("crear", lambda a, c: ("POST", "/api/maquinas/", cuerpo_maquina(a))),
+            ("actualizar", lambda a, c: ("PUT", f"/api/maquinas/{maquina(a)}", cuerpo_maquina(a))),
+        ],
+        "insumos": [
+            ("listar", lambda a, c: ("GET", "/api/insumos/?limit=100", None)),
+            ("crear", lambda a, c: ("POST", "/api/insumos/", cuerpo_insumo(a))),
+            ("actualizar", lambda a, c: ("PUT", f"/api/insumos/{insumo(a)}", cuerpo_insumo(a))),
+        ],
+        "proveedores": [
+            ("listar", lambda a, c: ("GET", "/api/proveedores/?limit=100", None)),
+            ("crear", lambda a, c: ("POST", "/api/proveedores/", {"nombre": "bench"})),
+            ("actualizar", lambda a, c: ("PUT", f"/api/proveedores/{proveedor(a)}", {"nombre": "bench"})),
+        ],
+        "tecnicos": [
+            ("listar", lambda a, c: ("GET", "/api/tecnicos/?limit=100", None)),
+            ("crear", lambda a, c: ("POST", "/api/tecnicos/", cuerpo_tecnico(a))),
+            ("actualizar", lambda a, c: ("PUT", f"/api/tecnicos/{tecnico(a)}", cuerpo_tecnico(a))),
+        ],
+        "usuarios": [
+            ("login", lambda a, c: ("POST", "/api/usuarios/login", USUARIO)),
+            ("por_id", lambda a, c: ("GET", f"/api/usuarios/{ids['usuarios'][0]}", None)),
+        ],
+        "consumos": [
+            ("listar", lambda a, c: ("GET", "/api/consumos/?limit=100", None)),
+            ("por_id", lambda a, c: ("GET", f"/api/consumos/{consumo(a)}", None)),
+            ("por_maquina", lambda a, c: ("GET", f"/api/consumos/maquina/{maquina(a)}?limit=100", None)),
+            ("expandido", lambda a, c: ("GET", "/api/consumos/expandido?limit=100", None)),
+            ("crear", lambda a, c: ("POST", "/api/consumos/", cuerpo_consumo(a))),
+            ("actualizar", lambda a, c: ("PUT", f"/api/consumos/{consumo(a)}", {"cobro_mensual": round(a.uniform(10, 500), 2)})),
+            ("eliminar", borrar_consumo),
+        ],
+        "mantenimientos": [
+            ("listar", lambda a, c: ("GET", "/api/mantenimientos/?limit=100", None)),
+            ("por_id", lambda a, c: ("GET", f"/api/mantenimientos/{mantenimiento(a)}", None)),
+            ("por_maquina", lambda a, c: ("GET", f"/api/mantenimientos/maquina/{maquina(a)}?limit=100", None)),
+            ("por_tecnico", lambda a, c: ("GET", f"/api/mantenimientos/tecnico/{tecnico(a)}?limit=100", None)),
+            ("crear", lambda a, c: ("POST", "/api/mantenimientos/", cuerpo_mantenimiento(a))),
+            ("actualizar", lambda a, c: ("PUT", f"/api/mantenimientos/{mantenimiento(a)}", cuerpo_mantenimiento(a))),
+        ],
+    }
+
+
+# ---------- corrida ----------
+
+def percentil(ordenadas, p):
+    """Percentil por rango mas cercano sobre una lista ya ordenada"""
+    if not ordenadas:
+        return None
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+def correr(url, generar, concurrencia, duracion, semilla, creados):
+    latencias = []
+    errores = []
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def worker(numero):
+        azar = random.Random(semilla * 1000 + numero)
+        cliente = Cliente(url)
+        propias, fallas = [], 0
+        try:
+            while time.perf_counter() < fin:
+                metodo, ruta, cuerpo = generar(azar, creados)
+                inicio = time.perf_counter()
+                try:
+                    estado, contenido = cliente.pedir(metodo, ruta, cuerpo)
+                except Exception:
+                    estado, contenido = 0, b""
+                propias.append(time.perf_counter() - inicio)
+                if not 200 <= estado < 400:
+                    fallas += 1
+                elif metodo == "POST" and ruta == "/api/consumos/":
+                    creados.append(json.loads(contenido)["id_consumo"])
+        finally:
+            cliente.cerrar()
+            with lock:
+                latencias.extend(propias)
+                errores.append(fallas)
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=worker, args=(i,)) for i in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+
+    latencias.sort()
+    pedidos, fallidos = len(latencias), sum(errores)
+
+    def ms(valor):
+        return round(valor * 1000, 2) if valor is not None else None
+
+    return {
+        "pedidos": pedidos,
+        "errores": fallidos,
+        "tasa_error": round(fallidos / pedidos, 4) if pedidos else None,
+        "pedidos_por_segundo": round(pedidos / segundos, 1),
+        "p50_ms": ms(percentil(latencias, 50)),
+        "p95_ms": ms(percentil(latencias, 95)),
+        "p99_ms": ms(percentil(latencias, 99)),
+        "max_ms": ms(latencias[-1] if latencias else None),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def levantar_servidor(entorno=None):
+    """uvicorn en otro proceso (no comparte el GIL con los workers de la prueba); `entorno` pisa variables"""
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(puerto), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, **(entorno or {})},
+    )
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise SystemExit("❌ El servidor no arranco")
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=1).close()
+            return proceso, f"http://127.0.0.1:{puerto}"
+        except OSError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise SystemExit("❌ El servidor no respondio a tiempo")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API con salida en JSON")
+    parser.add_argument("--url", help="API ya levantada (ej. http://localhost:8082); sin esto se levanta una")
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica las filas sembradas")
+    parser.add_argument("--sin-sembrar", action="store_true", help="Usar los datos que ya hay en la base")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por escenario")
+    parser.add_argument("--solo", help="Familias separadas por coma (ej. consumos,usuarios)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="Archivo JSON (por defecto a stdout)")
+    args = parser.parse_args(argv)
+
+    sembradas = None
+    if not args.sin_sembrar:
+        print(f"Sembrando con escala {args.escala}...", file=sys.stderr)
+        sembradas = sembrar(args.escala, args.semilla, api_levantada=args.url is not None)
+
+    proceso = None
+    url = args.url
+    if url is None:
+        proceso, url = levantar_servidor()
+    try:
+        familias = escenarios(preparar(url))
+        if args.solo:
+            pedidas = {f.strip() for f in args.solo.split(",")}
+            familias = {nombre: lista for nombre, lista in familias.items() if nombre in pedidas}
+
+        resultados = {}
+        for familia, lista in familias.items():
+            creados = []
+            for nombre, generar in lista:
+                clave = f"{familia}.{nombre}"
+                resultados[clave] = correr(url, generar, args.concurrencia, args.duracion, args.semilla, creados)
+                r = resultados[clave]
+                print(f"  {clave:<28} {r['pedidos_por_segundo']:>8} req/s  p95 {r['p95_ms']} ms  errores {r['errores']}",
+                      file=sys.stderr)
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    reporte = {
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "url": url if args.url else "local",
+        "concurrencia": args.concurrencia,
+        "duracion_s": args.duracion,
+        "escala": None if args.sin_sembrar else args.escala,
+        "sembradas": sembradas,
+        "escenarios": resultados,
+    }
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
+    return 1 if any(r["errores"] for r in resultados.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
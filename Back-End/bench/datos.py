@@ -0,0 +1,339 @@
+"""Generador de datos sinteticos grandes y reproducibles para pruebas de escala.
+
+Con --escala 1 son ~1M de consumos y 200k mantenimientos repartidos como en la realidad:
+- pocos clientes grandes (pesos tipo Zipf) que concentran la mayoria de las maquinas
+- maquinas con distinta actividad e insumos con distinta popularidad
+- consumos estacionales (pico en invierno), menos los fines de semana y con tendencia creciente
+- tecnicos asignados a clientes; los mantenimientos usan los del cliente de la maquina
+Los ids son explicitos y las FKs siempre validas. Misma semilla, escala y --hasta dan
+exactamente los mismos datos.
+
+Los CSV quedan como checkpoint en bench/datos/<semilla-escala-hasta>/: si ya estan se
+cargan directo sin volver a generar. La carga usa LOAD DATA LOCAL INFILE (hay que
+habilitar local_infile en el servidor) y si no se puede, INSERT de varias filas por lote.
+
+Uso (desde Back-End/, con la base del .env):
+    python -m bench.datos --escala 1 --vaciar        genera (o reusa los CSV) y carga
+    python -m bench.datos --escala 5 --solo-generar  solo escribe los CSV
+    python -m bench.datos --escala 1 --metodo insert sin LOAD DATA
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+# Filas con --escala 1
+TAMANIOS = {
+    "proveedores": 20,
+    "clientes": 2000,
+    "insumos": 120,
+    "tecnicos": 150,
+    "maquinas": 8000,
+    "consumoInsumos": 1_000_000,
+    "mantenimientos": 200_000,
+}
+
+# En orden de carga (respeta las FKs)
+TABLAS = {
+    "proveedores": ("id_proveedor", "nombre"),
+    "clientes": ("id_cliente", "nombre", "direccion", "telefono", "correo"),
+    "insumos": ("id_insumo", "tipo", "precio", "id_proveedor"),
+    "tecnicos": ("id_tecnico", "nombre", "tipo_visita", "id_cliente"),
+    "maquinas": ("id_maquina", "modelo", "id_cliente", "ubicacion_cliente", "costo_alquiler_mensual"),
+    "consumoInsumos": ("id_consumo", "fecha", "id_maquina", "cobro_mensual", "id_insumo"),
+    "mantenimientos": ("id_mantenimiento", "id_maquina", "id_tecnico", "tipo", "fecha", "observaciones"),
+}
+# Derivadas que tambien se vacian: el resumen se recalcula y los tombstones apuntarian a ids nuevos
+OTRAS_A_VACIAR = ("consumo_mensual", "eliminados")
+
+DIAS = 730
+ZIPF_CLIENTES = 1.1
+ZIPF_INSUMOS = 0.9
+LOTE = 5000
+LOTE_GENERACION = 100_000
+
+MODELOS = ["Marloy Pro", "Marloy Compact", "Marloy Office", "Marloy Barista", "Marloy Duo", "Marloy Mini"]
+INSUMOS = ["Cafe en grano", "Cafe molido", "Leche en polvo", "Chocolate", "Azucar", "Vasos", "Paletas", "Te", "Filtros"]
+OBSERVACIONES = ["Limpieza general", "Cambio de filtro", "Descalcificacion", "Ajuste de molienda",
+                 "Cambio de bomba", "Revision electrica", "Sin novedades"]
+BARRIOS = ["Centro", "Cordon", "Pocitos", "Buceo", "Carrasco", "Malvin", "Prado", "Tres Cruces", "Aguada", "Union"]
+
+
+def _acumulados(pesos):
+    total, acum = 0.0, []
+    for peso in pesos:
+        total += peso
+        acum.append(total)
+    return acum
+
+
+def _zipf(cantidad, exponente, azar):
+    """Pesos 1/rango^s repartidos al azar entre los ids (los grandes no son siempre los primeros)"""
+    pesos = [1 / (rango + 1) ** exponente for rango in range(cantidad)]
+    azar.shuffle(pesos)
+    return pesos
+
+
+class Generador:
+    """Genera las filas de cada tabla; cada tabla tiene su propio azar derivado de la semilla"""
+
+    def __init__(self, semilla, escala, hasta):
+        self.semilla = semilla
+        self.hasta = hasta
+        self.n = {tabla: max(1, int(cantidad * escala)) for tabla, cantidad in TAMANIOS.items()}
+        self._preparar()
+
+    def _azar(self, tabla):
+        return random.Random(f"{self.semilla}:{tabla}")
+
+    def _preparar(self):
+        """Lo que las tablas grandes necesitan de las chicas (pesos, precios, asignaciones)"""
+        azar = self._azar("pesos")
+        self.peso_cliente = _zipf(self.n["clientes"], ZIPF_CLIENTES, azar)
+        self.peso_insumo = _zipf(self.n["insumos"], ZIPF_INSUMOS, azar)
+        self.precio_insumo = [azar.randint(40, 900) for _ in range(self.n["insumos"])]
+        clientes_acum = _acumulados(self.peso_cliente)
+
+        # Maquinas: los clientes grandes tienen muchas; cada una con su nivel de actividad
+        self.cliente_maquina = [c + 1 for c in azar.choices(range(self.n["clientes"]), cum_weights=clientes_acum, k=self.n["maquinas"])]
+        self.peso_maquina = [azar.lognormvariate(0, 0.6) for _ in range(self.n["maquinas"])]
+
+        # Tecnicos: tambien repartidos segun el tamanio del cliente
+        self.cliente_tecnico = [c + 1 for c in azar.choices(range(self.n["clientes"]), cum_weights=clientes_acum, k=self.n["tecnicos"])]
+        self.tecnicos_de = {}
+        for i, cliente in enumerate(self.cliente_tecnico):
+            self.tecnicos_de.setdefault(cliente, []).append(i + 1)
+
+        # Peso de cada dia: estacion (pico en julio), fin de semana y crecimiento del negocio
+        self.dias = [self.hasta - timedelta(days=DIAS - i) for i in range(DIAS)]
+        pesos_dia = []
+        for i, dia in enumerate(self.dias):
+            estacion = 1 + 0.35 * math.cos(2 * math.pi * (dia.month - 7) / 12)
+            semana = 0.35 if dia.weekday() >= 5 else 1.0
+            pesos_dia.append(estacion * semana * (1 + 0.4 * i / DIAS))
+        self.dias_acum = _acumulados(pesos_dia)
+        self.dias_texto = [dia.isoformat() for dia in self.dias]
+
+    def _fechas(self, azar, cantidad):
+        dias = azar.choices(range(DIAS), cum_weights=self.dias_acum, k=cantidad)
+        return [
+            f"{self.dias_texto[d]} {azar.randint(7, 19):02d}:{azar.randint(0, 59):02d}:{azar.randint(0, 59):02d}"
+            for d in dias
+        ]
+
+    def proveedores(self):
+        for i in range(1, self.n["proveedores"] + 1):
+            yield (i, f"Proveedor {i}")
+
+    def clientes(self):
+        azar = self._azar("clientes")
+        for i in range(1, self.n["clientes"] + 1):
+            yield (i, f"Cliente {i}", f"{azar.choice(BARRIOS)} {azar.randint(100, 4999)}",
+                   f"09{azar.randint(1000000, 9999999)}", f"cliente{i}@marloy.uy")
+
+    def insumos(self):
+        azar = self._azar("insumos")
+        for i in range(1, self.n["insumos"] + 1):
+            yield (i, f"{INSUMOS[i % len(INSUMOS)]} {i}", self.precio_insumo[i - 1], azar.randint(1, self.n["proveedores"]))
+
+    def tecnicos(self):
+        azar = self._azar("tecnicos")
+        for i, cliente in enumerate(self.cliente_tecnico, start=1):
+            yield (i, f"Tecnico {i}", azar.choice(["preventiva", "correctiva"]), cliente)
+
+    def maquinas(self):
+        azar = self._azar("maquinas")
+        for i, cliente in enumerate(self.cliente_maquina, start=1):
+            yield (i, azar.choice(MODELOS), cliente, f"{azar.choice(BARRIOS)}, piso {azar.randint(0, 12)}",
+                   azar.choice([1500, 2000, 2500, 3000, 4000, 6000]))
+
+    def consumoInsumos(self):
+        azar = self._azar("consumoInsumos")
+        # Los clientes grandes consumen mas porque tienen mas maquinas; cada maquina segun su actividad
+        maquinas_acum = _acumulados(self.peso_maquina)
+        insumos_acum = _acumulados(self.peso_insumo)
+        total = self.n["consumoInsumos"]
+        id_ = 0
+        for desde in range(0, total, LOTE_GENERACION):
+            k = min(LOTE_GENERACION, total - desde)
+            maquinas = azar.choices(range(1, self.n["maquinas"] + 1), cum_weights=maquinas_acum, k=k)
+            insumos = azar.choices(range(1, self.n["insumos"] + 1), cum_weights=insumos_acum, k=k)
+            for maquina, insumo, fecha in zip(maquinas, insumos, self._fechas(azar, k)):
+                id_ += 1
+                cobro = round(self.precio_insumo[insumo - 1] * azar.randint(1, 4) * azar.uniform(0.9, 1.1), 2)
+                yield (id_, fecha, maquina, cobro, insumo)
+
+    def mantenimientos(self):
+        azar = self._azar("mantenimientos")
+        maquinas_acum = _acumulados(self.peso_maquina)
+        total = self.n["mantenimientos"]
+        id_ = 0
+        for desde in range(0, total, LOTE_GENERACION):
+            k = min(LOTE_GENERACION, total - desde)
+            maquinas = azar.choices(range(1, self.n["maquinas"] + 1), cum_weights=maquinas_acum, k=k)
+            for maquina, fecha in zip(maquinas, self._fechas(azar, k)):
+                id_ += 1
+                propios = self.tecnicos_de.get(self.cliente_maquina[maquina - 1])
+                if propios and azar.random() < 0.8:
+                    tecnico = azar.choice(propios)
+                else:
+                    tecnico = azar.randint(1, self.n["tecnicos"])
+                tipo = "preventivo" if azar.random() < 0.7 else "correctivo"
+                yield (id_, maquina, tecnico, tipo, fecha, azar.choice(OBSERVACIONES))
+
+
+# ---------- checkpoints ----------
+
+def directorio_checkpoint(base, semilla, escala, hasta):
+    return os.path.join(base, f"s{semilla}-e{escala:g}-{hasta.isoformat()}")
+
+
+def generar(directorio, semilla, escala, hasta):
+    """Escribe un CSV por tabla; las que ya estan completas se saltean (se renombran al terminar)"""
+    os.makedirs(directorio, exist_ok=True)
+    generador = Generador(semilla, escala, hasta)
+    for tabla, columnas in TABLAS.items():
+        ruta = os.path.join(directorio, f"{tabla}.csv")
+        if os.path.exists(ruta):
+            print(f"  {tabla:<16} checkpoint existente", file=sys.stderr)
+            continue
+        inicio = time.perf_counter()
+        with open(ruta + ".tmp", "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.writer(archivo, lineterminator="\n")
+            escritor.writerow(columnas)
+            escritor.writerows(getattr(generador, tabla)())
+        os.replace(ruta + ".tmp", ruta)
+        print(f"  {tabla:<16} {generador.n[tabla]:>10,} filas generadas en {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+    with open(os.path.join(directorio, "manifest.json"), "w", encoding="utf-8") as archivo:
+        json.dump({"semilla": semilla, "escala": escala, "hasta": hasta.isoformat(), "filas": generador.n}, archivo, indent=2)
+    return generador.n
+
+
+# ---------- carga ----------
+
+def _leer_lotes(ruta):
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        lector = csv.reader(archivo)
+        next(lector)
+        lote = []
+        for fila in lector:
+            lote.append(fila)
+            if len(lote) >= LOTE:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+
+def _load_data(cursor, ruta, tabla, columnas):
+    archivo = os.path.abspath(ruta).replace("\\", "\\\\").replace("'", "\\'")
+    cursor.execute(
+        f"LOAD DATA LOCAL INFILE '{archivo}' INTO TABLE {tabla} "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' "
+        f"IGNORE 1 LINES ({', '.join(columnas)})"
+    )
+
+
+def _insertar(conn, cursor, ruta, tabla, columnas):
+    # executemany de mysql.connector arma un solo INSERT de varias filas por lote
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    for lote in _leer_lotes(ruta):
+        cursor.executemany(sql, lote)
+        conn.commit()
+
+
+def cargar(directorio, metodo="auto", vaciar=False):
+    from mysql.connector import Error
+    from database.connection import get_connection
+    from database import consumo_mensual
+    from database.cambios import registrar_carga_externa
+
+    conn = get_connection(allow_local_infile=True)
+    if conn is None:
+        raise SystemExit(2)
+    cursor = conn.cursor()
+    try:
+        ocupadas = []
+        for tabla in TABLAS:
+            cursor.execute(f"SELECT 1 FROM {tabla} LIMIT 1")
+            if cursor.fetchall():
+                ocupadas.append(tabla)
+        if ocupadas and not vaciar:
+            raise SystemExit(f"❌ Ya hay datos en {', '.join(ocupadas)}: los ids son fijos, usar --vaciar")
+
+        # Sin chequeos por fila durante la carga: las FKs ya son validas por construccion
+        cursor.execute("SET foreign_key_checks = 0, unique_checks = 0")
+        if vaciar:
+            for tabla in list(OTRAS_A_VACIAR) + list(reversed(TABLAS)):
+                cursor.execute(f"TRUNCATE TABLE {tabla}")
+
+        for tabla, columnas in TABLAS.items():
+            ruta = os.path.join(directorio, f"{tabla}.csv")
+            inicio = time.perf_counter()
+            if metodo != "insert":
+                try:
+                    _load_data(cursor, ruta, tabla, columnas)
+                    conn.commit()
+                except Error as e:
+                    if metodo == "load_data":
+                        raise
+                    print(f"⚠️ LOAD DATA no disponible ({e}); se sigue con INSERT por lotes", file=sys.stderr)
+                    conn.rollback()
+                    metodo = "insert"
+            if metodo == "insert":
+                _insertar(conn, cursor, ruta, tabla, columnas)
+            cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+            filas = cursor.fetchone()[0]
+            segundos = time.perf_counter() - inicio
+            print(f"  {tabla:<16} {filas:>10,} filas cargadas en {segundos:.1f}s ({filas / max(segundos, 1e-9):,.0f} filas/s)",
+                  file=sys.stderr)
+
+        cursor.execute("SET foreign_key_checks = 1, unique_checks = 1")
+        for tabla in TABLAS:
+            cursor.execute(f"ANALYZE TABLE {tabla}")
+            cursor.fetchall()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    try:
+        # Los consumos entraron por afuera de la API: el resumen mensual se rehace de cero
+        consumo_mensual.recalcular(conn)
+    finally:
+        conn.close()
+    # Sin CACHE_REDIS_URL la API levantada no ve la carga: registrar_carga_externa avisa que hay que reiniciarla
+    registrar_carga_externa(TABLAS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Datos sinteticos reproducibles para pruebas de escala")
+    parser.add_argument("--escala", type=float, default=1.0, help="1 = ~1M consumos y 200k mantenimientos")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--hasta", type=date.fromisoformat, default=date.today().replace(day=1),
+                        help="Ultimo dia de los datos (por defecto el primero del mes actual)")
+    parser.add_argument("--datos", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos"),
+                        help="Donde se guardan los CSV de checkpoint")
+    parser.add_argument("--metodo", choices=["auto", "load_data", "insert"], default="auto")
+    parser.add_argument("--vaciar", action="store_true", help="Vaciar las tablas antes de cargar")
+    parser.add_argument("--solo-generar", action="store_true", help="Escribir los CSV sin tocar la base")
+    args = parser.parse_args(argv)
+
+    directorio = directorio_checkpoint(args.datos, args.semilla, args.escala, args.hasta)
+    print(f"Datos en {directorio}", file=sys.stderr)
+    generar(directorio, args.semilla, args.escala, args.hasta)
+    if not args.solo_generar:
+        cargar(directorio, args.metodo, args.vaciar)
+        print("✅ Datos cargados", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""Benchmark de login: inicios de sesion por segundo con un costo de bcrypt fijo.
+
+Levanta la API con AUTH_BCRYPT_COSTO=--costo (y --hilos-hash hilos de hasheo), registra un
+usuario y le pega a POST /api/usuarios/login con --concurrencia workers. Despues repite el
+login mientras otros workers piden una lista de proveedores, para ver que la cola de
+bcrypt no frena el resto de la API. Se reporta tambien cuanto tarda un hash en este equipo,
+asi el techo teorico (hilos / tiempo de un hash) queda al lado del medido.
+
+Uso (desde Back-End/, con la base del .env):
+    python -m bench.login --costo 10 --concurrencia 16 --duracion 10 --salida login.json
+    python -m bench.login --url http://localhost:8082   # API ya levantada (con su propio costo)
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+import bcrypt
+from bench.carga import Cliente, correr, levantar_servidor, _commit
+
+USUARIO = {"nombre": "bench_login", "contrasenia": "bench_login", "cargo": "bench"}
+
+
+def ms_por_hash(costo, repeticiones=5):
+    """Milisegundos de un checkpw con este costo en un solo hilo"""
+    guardada = bcrypt.hashpw(USUARIO["contrasenia"].encode(), bcrypt.gensalt(costo))
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        bcrypt.checkpw(USUARIO["contrasenia"].encode(), guardada)
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def preparar(url):
+    cliente = Cliente(url)
+    try:
+        cliente.pedir("POST", "/api/usuarios/register", USUARIO)
+        # El primer login rehashea la contraseña si estaba guardada con otro costo
+        for _ in range(2):
+            estado, contenido = cliente.pedir("POST", "/api/usuarios/login", USUARIO)
+            if estado != 200:
+                raise SystemExit(f"❌ No se pudo hacer login con el usuario de prueba ({estado})")
+        Cliente.token = json.loads(contenido)["token"]
+    finally:
+        cliente.cerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inicios de sesion por segundo con bcrypt a costo fijo")
+    parser.add_argument("--url", help="API ya levantada; sin esto se levanta una con --costo")
+    parser.add_argument("--costo", type=int, default=10, help="AUTH_BCRYPT_COSTO del servidor")
+    parser.add_argument("--hilos-hash", type=int, help="AUTH_HILOS_HASH del servidor")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--lectores", type=int, default=4, help="Workers que leen mientras se hace login")
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por escenario")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="Archivo JSON (por defecto a stdout)")
+    args = parser.parse_args(argv)
+
+    proceso = None
+    url = args.url
+    if url is None:
+        entorno = {"AUTH_BCRYPT_COSTO": str(args.costo)}
+        if args.hilos_hash:
+            entorno["AUTH_HILOS_HASH"] = str(args.hilos_hash)
+        proceso, url = levantar_servidor(entorno)
+
+    def login(azar, creados):
+        return "POST", "/api/usuarios/login", USUARIO
+
+    def listar(azar, creados):
+        return "GET", "/api/proveedores/?limit=100", None
+
+    try:
+        preparar(url)
+        resultados = {
+            "listar_solo": correr(url, listar, args.lectores, args.duracion, args.semilla, []),
+            "login": correr(url, login, args.concurrencia, args.duracion, args.semilla, []),
+        }
+        # Lecturas con los logins saturando el pool de bcrypt al mismo tiempo
+        en_paralelo = {}
+        hilo = threading.Thread(target=lambda: en_paralelo.update(
+            login=correr(url, login, args.concurrencia, args.duracion, args.semilla, [])
+        ))
+        hilo.start()
+        resultados["listar_durante_login"] = correr(url, listar, args.lectores, args.duracion, args.semilla + 1, [])
+        hilo.join()
+        resultados["login_con_lecturas"] = en_paralelo["login"]
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    for nombre, r in resultados.items():
+        print(f"  {nombre:<22} {r['pedidos_por_segundo']:>8} req/s  p95 {r['p95_ms']} ms  errores {r['errores']}",
+              file=sys.stderr)
+
+    reporte = {
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "url": url if args.url else "local",
+        "costo": None if args.url else args.costo,
+        "hilos_hash": None if args.url else args.hilos_hash,
+        "ms_por_hash": None if args.url else round(ms_por_hash(args.costo), 2),
+        "concurrencia": args.concurrencia,
+        "lectores": args.lectores,
+        "duracion_s": args.duracion,
+        "escenarios": resultados,
+    }
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
+    return 1 if any(r["errores"] for r in resultados.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
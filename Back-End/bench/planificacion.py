@@ -0,0 +1,54 @@
+"""Micro-benchmark: cuanto tarda el plan de mantenimientos de toda la flota.
+
+Genera un historial al azar (cada maquina con su propio intervalo, ruido en cada brecha y
+un factor de uso) y mide database.planificacion.estimar + la lista de vencidas/proximas,
+que es lo que se recalcula cuando llegan mantenimientos nuevos. No necesita base de datos.
+
+Uso (desde Back-End/):
+    python -m bench.planificacion --maquinas 100000 --servicios 10
+"""
+import argparse
+import time
+from datetime import date
+import numpy as np
+from database.planificacion import estimar, factor_de_uso
+
+
+def generar_historial(maquinas, servicios, semilla):
+    """Historial al azar: cada maquina con su propio intervalo y algo de ruido"""
+    azar = np.random.default_rng(semilla)
+    cantidad = azar.poisson(servicios, maquinas) + 1
+    ids = np.repeat(np.arange(1, maquinas + 1), cantidad)
+    intervalo = np.repeat(azar.uniform(30, 180, maquinas), cantidad)
+    # El k-esimo servicio hacia atras de cada maquina, con +-20% de ruido en cada brecha
+    k = np.arange(len(ids)) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+    ultimo = np.repeat(azar.uniform(0, 1.5, maquinas), cantidad) * intervalo
+    hoy = int(np.datetime64(date.today(), "D").astype(np.int64))
+    dias = hoy - (ultimo + k * intervalo * azar.uniform(0.8, 1.2, len(ids))).astype(np.int64)
+    reciente = azar.gamma(2, 50, maquinas)
+    uso = factor_de_uso(np.arange(1, maquinas + 1), reciente, reciente + azar.gamma(6, 50, maquinas))
+    return ids, dias, uso
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo del calculo del plan de mantenimientos (sin base)")
+    parser.add_argument("--maquinas", type=int, default=100_000)
+    parser.add_argument("--servicios", type=int, default=10, help="Mantenimientos promedio por maquina")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    maquinas, dias, uso = generar_historial(args.maquinas, args.servicios, args.semilla)
+    tiempos = []
+    for _ in range(args.repeticiones):
+        inicio = time.perf_counter()
+        plan = estimar(maquinas, dias, *uso)
+        plan.listar(30, limit=100)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"{len(plan)} maquinas, {len(dias)} mantenimientos x {args.repeticiones} repeticiones")
+    print(f"  mejor {min(tiempos):.1f} ms, mediana {sorted(tiempos)[len(tiempos) // 2]:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+"""Micro-benchmark: filas/segundo al responder una lista de consumos.
+
+Compara el camino de siempre (FastAPI valida cada fila contra el response_model y arma un
+objeto por fila) contra database.serializacion (orjson directo de los dicts), con y sin
+RESPUESTAS_VALIDAR. No necesita base de datos: las filas se generan en memoria.
+
+Uso (desde Back-End/, necesita httpx para el TestClient):
+    python -m bench.serializacion --filas 10000 --repeticiones 20
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from database import serializacion
+from models.consumo import Consumo
+
+
+def generar_filas(cantidad, semilla=1):
+    azar = random.Random(semilla)
+    inicio = datetime(2024, 1, 1)
+    return [
+        {
+            "id_consumo": i,
+            "fecha": inicio + timedelta(minutes=azar.randint(0, 500000)),
+            "id_maquina": azar.randint(1, 200),
+            "cobro_mensual": round(azar.uniform(1, 500), 2),
+            "id_insumo": azar.randint(1, 40),
+        }
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def armar_app(filas):
+    app = FastAPI()
+
+    @app.get("/actual", response_model=List[Consumo])
+    async def actual():
+        return filas
+
+    @app.get("/rapido", response_model=List[Consumo])
+    async def rapido():
+        return serializacion.respuesta_json(filas, Consumo)
+
+    return app
+
+
+def medir(cliente, ruta, filas, repeticiones):
+    cliente.get(ruta)  # calentamiento (arma los validadores la primera vez)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        respuesta = cliente.get(ruta)
+        respuesta.raise_for_status()
+    segundos = time.perf_counter() - inicio
+    return filas * repeticiones / segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Filas/segundo de la serializacion de respuestas")
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    filas = generar_filas(args.filas)
+    cliente = TestClient(armar_app(filas))
+
+    if cliente.get("/actual").json() != cliente.get("/rapido").json():
+        print("❌ Las dos rutas no devuelven lo mismo")
+        return 1
+
+    resultados = {"actual (response_model)": medir(cliente, "/actual", args.filas, args.repeticiones)}
+    serializacion.RESPUESTAS_VALIDAR = False
+    resultados["rapido (orjson)"] = medir(cliente, "/rapido", args.filas, args.repeticiones)
+    serializacion.RESPUESTAS_VALIDAR = True
+    resultados["rapido + RESPUESTAS_VALIDAR"] = medir(cliente, "/rapido", args.filas, args.repeticiones)
+
+    base = resultados["actual (response_model)"]
+    print(f"{args.filas} filas x {args.repeticiones} repeticiones")
+    for nombre, por_segundo in resultados.items():
+        print(f"  {nombre:<30} {por_segundo:>12,.0f} filas/s  ({por_segundo / base:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
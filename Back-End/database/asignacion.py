@@ -0,0 +1,201 @@
+"""Reparto de los mantenimientos pendientes entre los tecnicos (greedy + busqueda local).
+
+Los trabajos son las maquinas que el plan (database/planificacion.py) da por vencidas o
+que vencen dentro del periodo. Un trabajo solo puede ir a un tecnico del cliente de la
+maquina cuyo tipo_visita coincida con el tipo del trabajo (sin tipo_visita hace de todo),
+un dia entre el inicio del periodo y su vencimiento (las vencidas cualquier dia, mejor
+cuanto antes) y sin pasar ASIGNACION_CAPACIDAD_DIA trabajos por tecnico y dia, contando
+los mantenimientos que ya estaban cargados.
+
+Costo = suma de los cuadrados de la carga de cada tecnico (en el periodo y por dia) +
+PESO_ESPERA por cada dia que espera una maquina vencida. El cuadrado hace que convenga
+repartir: pasar un trabajo de un tecnico con 8 a uno con 3 baja el costo.
+1. greedy: primero las mas atrasadas y las que tienen menos tecnicos posibles, cada una al
+   lugar (tecnico, dia) que menos sube el costo. A las que quedan sin lugar se les hace
+   espacio corriendo a otro lado un trabajo de un lugar lleno
+2. busqueda local: mover un trabajo a otro lugar mientras baje el costo, hasta que no haya
+   mejoras o pasen ASIGNACION_SEGUNDOS (despues se reintenta con las que no entraron)
+"""
+import os
+import time
+
+ASIGNACION_CAPACIDAD_DIA = int(os.getenv("ASIGNACION_CAPACIDAD_DIA", "6"))
+ASIGNACION_SEGUNDOS = float(os.getenv("ASIGNACION_SEGUNDOS", "2"))
+
+PESO_ESPERA = 2
+
+SIN_CLIENTE = "La maquina no esta asignada a un cliente"
+SIN_TECNICO = "El cliente no tiene tecnicos para este tipo de visita"
+SIN_CAPACIDAD = "Los tecnicos del cliente no tienen lugar en el periodo"
+
+
+def visita(texto):
+    """Tipo de visita comparable: 'Preventiva' (tecnico) y 'preventivo' (mantenimiento) son lo mismo"""
+    return (texto or "").strip().lower().rstrip("ao")
+
+
+def compatible(tecnico, id_cliente, tipo):
+    """Si el tecnico (dict con id_cliente y tipo_visita) puede hacer ese trabajo"""
+    if tecnico["id_cliente"] is None or tecnico["id_cliente"] != id_cliente:
+        return False
+    propia = visita(tecnico["tipo_visita"])
+    return not propia or propia == visita(tipo)
+
+
+class Asignador:
+    """Estado del reparto: donde quedo cada trabajo y la carga de cada tecnico y dia.
+
+    `trabajos` son dicts con id_cliente y `vence` (dia del periodo, 0 = el primero; negativo
+    si ya estaba vencida), `tecnicos` dicts con id_cliente y tipo_visita y `previa` la carga
+    ya cargada como {(posicion del tecnico, dia): cantidad}.
+    """
+
+    def __init__(self, trabajos, tecnicos, dias, tipo, previa=None, capacidad=ASIGNACION_CAPACIDAD_DIA):
+        self.trabajos = trabajos
+        self.dias = dias
+        self.capacidad = capacidad
+        self.total = [0] * len(tecnicos)
+        self.carga = [[0] * dias for _ in tecnicos]
+        for (t, d), cantidad in (previa or {}).items():
+            self.total[t] += cantidad
+            self.carga[t][d] += cantidad
+        self.previa = list(self.total)
+
+        por_cliente = {}
+        for t, tecnico in enumerate(tecnicos):
+            por_cliente.setdefault(tecnico["id_cliente"], []).append(t)
+        self.candidatos = [
+            [t for t in por_cliente.get(trabajo["id_cliente"], ()) if compatible(tecnicos[t], trabajo["id_cliente"], tipo)]
+            for trabajo in trabajos
+        ]
+        self.lugar = [None] * len(trabajos)
+        self.motivo = {}
+        self.en_lugar = {}
+        self.mejoras = 0
+        self.costo_greedy = None
+        self.segundos = 0.0
+
+    # ---------- costo ----------
+
+    def _dias(self, j):
+        vence = self.trabajos[j]["vence"]
+        return range(self.dias if vence < 0 else min(vence, self.dias - 1) + 1)
+
+    def _espera(self, j, d):
+        return PESO_ESPERA * d if self.trabajos[j]["vence"] < 0 else 0
+
+    def _suba(self, j, t, d):
+        """Cuanto sube el costo al poner j en (t, d)"""
+        return 2 * self.total[t] + 1 + 2 * self.carga[t][d] + 1 + self._espera(j, d)
+
+    def _lugares(self, j):
+        """(suba, t, d) de los lugares con capacidad para j"""
+        return [
+            (self._suba(j, t, d), t, d)
+            for t in self.candidatos[j] for d in self._dias(j)
+            if self.carga[t][d] < self.capacidad
+        ]
+
+    def costo(self):
+        return (
+            sum(n * n for n in self.total)
+            + sum(n * n for fila in self.carga for n in fila)
+            + sum(self._espera(j, l[1]) for j, l in enumerate(self.lugar) if l is not None)
+        )
+
+    # ---------- movimientos ----------
+
+    def _poner(self, j, t, d):
+        self.lugar[j] = (t, d)
+        self.total[t] += 1
+        self.carga[t][d] += 1
+        self.en_lugar.setdefault((t, d), set()).add(j)
+
+    def _quitar(self, j):
+        t, d = self.lugar[j]
+        self.lugar[j] = None
+        self.total[t] -= 1
+        self.carga[t][d] -= 1
+        self.en_lugar[(t, d)].discard(j)
+        # Lo que baja el costo al sacarlo
+        return 2 * self.total[t] + 1 + 2 * self.carga[t][d] + 1 + self._espera(j, d)
+
+    def greedy(self):
+        orden = sorted(
+            range(len(self.trabajos)),
+            key=lambda j: (self.trabajos[j]["vence"], len(self.candidatos[j]), j),
+        )
+        for j in orden:
+            if not self.candidatos[j]:
+                self.motivo[j] = SIN_TECNICO
+                continue
+            lugares = self._lugares(j)
+            if not lugares:
+                self.motivo[j] = SIN_CAPACIDAD
+                continue
+            _, t, d = min(lugares)
+            self._poner(j, t, d)
+
+    def mejorar(self, hasta):
+        """Mueve trabajos mientras baje el costo; corta al no encontrar mejoras o en `hasta` (monotonic)"""
+        hubo = True
+        while hubo and time.monotonic() < hasta:
+            hubo = False
+            for j, lugar in enumerate(self.lugar):
+                if lugar is None:
+                    continue
+                baja = self._quitar(j)
+                suba, t, d = min(self._lugares(j), default=(baja, None, None))
+                if suba < baja:
+                    self.mejoras += 1
+                    hubo = True
+                else:
+                    t, d = lugar
+                self._poner(j, t, d)
+
+    def _hacer_lugar(self, j):
+        """Pone j en un lugar lleno corriendo a otro lado uno de los trabajos que estaban ahi"""
+        for t in self.candidatos[j]:
+            for d in self._dias(j):
+                if self.carga[t][d] > self.capacidad:
+                    # Sobrecargado con lo que ya estaba: sacar uno no alcanza
+                    continue
+                for k in list(self.en_lugar.get((t, d), ())):
+                    anterior = self.lugar[k]
+                    self._quitar(k)
+                    lugares = [l for l in self._lugares(k) if (l[1], l[2]) != anterior]
+                    if lugares:
+                        _, t2, d2 = min(lugares)
+                        self._poner(k, t2, d2)
+                        self._poner(j, t, d)
+                        return True
+                    self._poner(k, *anterior)
+        return False
+
+    def rescatar(self):
+        # Rescatar no libera lugar (solo lo ocupa): si con unos tecnicos y dias no se pudo, no se va a poder
+        sin_salida = set()
+        for j in sorted(self.motivo, key=lambda j: self.trabajos[j]["vence"]):
+            clave = (tuple(self.candidatos[j]), self._dias(j))
+            if self.motivo[j] != SIN_CAPACIDAD or clave in sin_salida:
+                continue
+            lugares = self._lugares(j)
+            if lugares:
+                # Las mejoras pueden haber dejado lugar libre
+                _, t, d = min(lugares)
+                self._poner(j, t, d)
+                del self.motivo[j]
+            elif self._hacer_lugar(j):
+                del self.motivo[j]
+            else:
+                sin_salida.add(clave)
+
+    def resolver(self, segundos=ASIGNACION_SEGUNDOS):
+        inicio = time.monotonic()
+        self.greedy()
+        self.rescatar()
+        self.costo_greedy = self.costo()
+        self.mejorar(inicio + segundos)
+        self.rescatar()
+        self.segundos = time.monotonic() - inicio
+        return self
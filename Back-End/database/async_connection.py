@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+import aiomysql
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from database.connection import (
+    get_pool, elegir_replica, get_replicas, PoolTimeout, POOL_SIZE, POOL_TIMEOUT, ERRORES_CONEXION, es_caida,
+)
+from database import preparadas
+from database.replicas import leer_de_replica
+from database.metricas import ESPERA_POOL, Indicador, registrar_consulta
+
+# "async" usa aiomysql con su propio pool; "sync" manda las lecturas al pool de
+# mysql.connector dentro del threadpool (sirve para comparar ambos caminos)
+DB_MODO = os.getenv("DB_MODO", "async").lower()
+
+# Clases de los errores de conexion de aiomysql (se filtran con es_caida)
+ERRORES_CONEXION_ASYNC = (aiomysql.OperationalError, aiomysql.InterfaceError)
+
+
+def _es_caida(error):
+    return isinstance(error, aiomysql.InterfaceError) or es_caida(error)
+
+
+_pool = None
+# replica.nombre -> pool de aiomysql (se crean la primera vez que se leen)
+_pools_replica = {}
+
+
+def modo_async():
+    return DB_MODO == "async"
+
+
+async def _crear_pool(host, port):
+    return await aiomysql.create_pool(
+        host=host,
+        port=port,
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+        db=os.getenv("DB_NAME"),
+        minsize=0,
+        maxsize=int(os.getenv("DB_ASYNC_POOL_SIZE", str(POOL_SIZE * 5))),
+        # Las lecturas no necesitan transaccion y asi no quedan snapshots viejos
+        autocommit=True,
+        pool_recycle=3600,
+    )
+
+
+async def init_async_pool():
+    global _pool
+    if _pool is None and modo_async():
+        _pool = await _crear_pool(os.getenv("DB_HOST"), int(os.getenv("DB_PORT", "3306")))
+    return _pool
+
+
+async def _pool_replica(replica):
+    pool = _pools_replica.get(replica.nombre)
+    if pool is None:
+        pool = _pools_replica[replica.nombre] = await _crear_pool(replica.host, replica.port)
+    return pool
+
+
+async def close_async_pool():
+    global _pool
+    for pool in [_pool, *_pools_replica.values()]:
+        if pool is not None:
+            pool.close()
+            await pool.wait_closed()
+    _pool = None
+    _pools_replica.clear()
+
+
+def async_stats():
+    return _stats(_pool)
+
+
+def _stats(pool):
+    if pool is None:
+        return None
+    return {
+        "tamanio": pool.maxsize,
+        "abiertas": pool.size,
+        "inactivas": pool.freesize,
+        "en_uso": pool.size - pool.freesize,
+    }
+
+
+def replicas_stats():
+    return [
+        {**replica.stats(), "async": _stats(_pools_replica.get(replica.nombre))}
+        for replica in get_replicas()
+    ]
+
+
+def _conexiones_pools():
+    valores = {}
+    for nombre, stats in (("sync", get_pool().stats()), ("async", async_stats())):
+        for estado in ("abiertas", "en_uso", "inactivas"):
+            if stats is not None:
+                valores[(nombre, estado)] = stats[estado]
+    return valores
+
+
+Indicador("db_pool_conexiones", "Conexiones de cada pool por estado", ("pool", "estado"), _conexiones_pools)
+
+
+def _leer_sync(sql, params, uno, pool):
+    try:
+        conn = pool.acquire()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="La base de datos esta ocupada, intente de nuevo")
+    try:
+        # Con el pool sync las lecturas tambien usan sentencias preparadas
+        return (preparadas.fila if uno else preparadas.filas)(conn, sql, params or ())
+    finally:
+        pool.release(conn)
+
+
+async def _leer_en(replica, sql, params, uno):
+    if not modo_async():
+        pool = replica.pool if replica is not None else get_pool()
+        return await run_in_threadpool(_leer_sync, sql, params, uno, pool)
+
+    pool = await _pool_replica(replica) if replica is not None else await init_async_pool()
+    inicio = time.perf_counter()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="La base de datos esta ocupada, intente de nuevo")
+    finally:
+        ESPERA_POOL.observar(time.perf_counter() - inicio, "async")
+    try:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            inicio = time.perf_counter()
+            await cursor.execute(sql, params)
+            resultado = await (cursor.fetchone() if uno else cursor.fetchall())
+            filas = (resultado is not None) if uno else len(resultado)
+            registrar_consulta(sql, time.perf_counter() - inicio, int(filas), "async", params)
+            return resultado
+    finally:
+        pool.release(conn)
+
+
+async def _leer(sql, params, uno):
+    replica = elegir_replica() if leer_de_replica() else None
+    if replica is not None:
+        try:
+            return await _leer_en(replica, sql, params, uno)
+        except ERRORES_CONEXION + ERRORES_CONEXION_ASYNC as e:
+            # Un error del SQL no es culpa de la replica: se corta aca y no se repite en el primario
+            if not _es_caida(e):
+                raise
+            replica.marcar_caida(e)
+    return await _leer_en(None, sql, params, uno)
+
+
+async def fetch_all(sql, params=None):
+    """Ejecuta una consulta de lectura y devuelve todas las filas como dicts"""
+    return await _leer(sql, params, uno=False)
+
+
+async def fetch_one(sql, params=None):
+    """Ejecuta una consulta de lectura y devuelve la primera fila (o None)"""
+    return await _leer(sql, params, uno=True)
@@ -0,0 +1,32 @@
+"""Busqueda de texto con los indices FULLTEXT de la migracion 0005.
+
+Cada palabra escrita se busca como prefijo y todas tienen que aparecer (`+caf* +cen*` en
+BOOLEAN MODE): "caf cen" encuentra "Cafe Central". MySQL resuelve el MATCH por el indice,
+ordena por relevancia y corta en el LIMIT, asi que no depende del tamaño de la tabla.
+Ojo: InnoDB no indexa palabras de menos de innodb_ft_min_token_size letras (3 por defecto).
+"""
+import re
+from fastapi import Query
+
+BUSQUEDA_MAX = 50
+# Mas palabras no mejoran el resultado y cada una es un termino mas para el indice
+PALABRAS_MAX = 8
+
+_PALABRA = re.compile(r"\w+")
+
+
+def expresion(texto):
+    """Texto del usuario -> expresion de BOOLEAN MODE (se descartan los operadores que haya escrito)"""
+    return " ".join(f"+{palabra}*" for palabra in _PALABRA.findall(texto.lower())[:PALABRAS_MAX])
+
+
+class Busqueda:
+    """Parametros ?q=&limit= de las rutas /buscar (se usa con Depends())"""
+
+    def __init__(
+        self,
+        q: str = Query(..., min_length=1, max_length=100, description="Palabras a buscar (cada una como prefijo)"),
+        limit: int = Query(20, ge=1, le=BUSQUEDA_MAX, description="Cantidad maxima de resultados"),
+    ):
+        self.q = q
+        self.limit = limit
@@ -0,0 +1,163 @@
+"""Cache en memoria (read-through) para las tablas de referencia.
+
+Cada entrada guarda la "generacion" de la tabla con la que se cargo. Los handlers de
+escritura llaman a invalidar() despues del commit y eso sube la generacion: las listas de
+la tabla y la entrada por id afectada dejan de valer, el resto del cache sigue sirviendo.
+Con CACHE_REDIS_URL las generaciones viven en Redis, asi todos los workers de uvicorn ven
+las invalidaciones de los demas (los datos igual se guardan en la memoria de cada uno).
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX = int(os.getenv("CACHE_MAX_ENTRADAS", "1000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+
+def cantidad_workers():
+    """Workers del servidor: --workers N de la linea de comandos (los workers de uvicorn la
+    heredan) o WEB_CONCURRENCY, que uvicorn y gunicorn usan por defecto"""
+    try:
+        for i, arg in enumerate(sys.argv):
+            if arg.startswith("--workers="):
+                return int(arg.split("=", 1)[1])
+            if arg == "--workers" and i + 1 < len(sys.argv):
+                return int(sys.argv[i + 1])
+        return int(os.getenv("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        return 1
+
+# Contadores de generacion: "todo" (la tabla entera), "lista" (cualquier alta/cambio/baja) y uno por id
+_TODO = "todo"
+_LISTA = "lista"
+
+
+class _GeneracionesLocales:
+    def __init__(self):
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    async def leer(self, claves):
+        return [self._valores.get(c, 0) for c in claves]
+
+    def subir(self, claves):
+        with self._lock:
+            for c in claves:
+                self._valores[c] = self._valores.get(c, 0) + 1
+
+
+class _GeneracionesRedis:
+    def __init__(self, url):
+        import redis
+        import redis.asyncio
+        self._sync = redis.Redis.from_url(url)
+        self._async = redis.asyncio.Redis.from_url(url)
+
+    @staticmethod
+    def _nombre(clave):
+        return "marloy:cache:" + ":".join(str(p) for p in clave)
+
+    async def leer(self, claves):
+        valores = await self._async.mget([self._nombre(c) for c in claves])
+        return [int(v or 0) for v in valores]
+
+    def subir(self, claves):
+        pipe = self._sync.pipeline()
+        for c in claves:
+            pipe.incr(self._nombre(c))
+        pipe.execute()
+
+
+def _crear_generaciones():
+    if CACHE_REDIS_URL:
+        try:
+            return _GeneracionesRedis(CACHE_REDIS_URL)
+        except ImportError:
+            print("⚠️ CACHE_REDIS_URL configurado pero falta el paquete redis, se usa cache local")
+    return _GeneracionesLocales()
+
+
+class CacheReferencias:
+    """LRU con TTL y tamaño maximo; las claves son (tabla, id o None, parametros)"""
+
+    def __init__(self, ttl=CACHE_TTL, max_entradas=CACHE_MAX, generaciones=None):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._generaciones = generaciones or _crear_generaciones()
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._desalojos = 0
+        self._invalidaciones = 0
+
+    def _claves_generacion(self, tabla, id_):
+        return [(tabla, _TODO), (tabla, id_) if id_ is not None else (tabla, _LISTA)]
+
+    async def obtener(self, tabla, clave, cargar, id=None):
+        """Devuelve el valor cacheado o lo carga con `await cargar()` (los errores no se cachean)"""
+        generacion = tuple(await self._generaciones.leer(self._claves_generacion(tabla, id)))
+        k = (tabla, id, clave)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(k)
+            if entrada is not None and entrada[0] == generacion and entrada[1] > ahora:
+                self._datos.move_to_end(k)
+                self._hits += 1
+                return entrada[2]
+            self._misses += 1
+
+        valor = await cargar()
+        if valor is None:
+            # No se cachean los "no encontrado": el id puede crearse despues
+            return valor
+        with self._lock:
+            self._datos[k] = (generacion, ahora + self.ttl, valor)
+            self._datos.move_to_end(k)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self._desalojos += 1
+        return valor
+
+    def invalidar(self, tabla, id=None, todo=False):
+        """Llamar despues del commit de una escritura sobre `tabla`.
+
+        Un alta invalida solo las listas; un cambio o baja pasa ademas el `id` afectado;
+        todo=True descarta tambien todas las entradas por id (cuando no se sabe que filas cambiaron).
+        """
+        claves = [(tabla, _LISTA)]
+        if id is not None:
+            claves.append((tabla, id))
+        if todo:
+            claves.append((tabla, _TODO))
+        self._generaciones.subir(claves)
+        with self._lock:
+            self._invalidaciones += 1
+            # Lo local se borra ya para liberar lugar; en otros workers lo descarta la generacion
+            for k in [k for k in self._datos if k[0] == tabla and (todo or k[1] is None or k[1] == id)]:
+                del self._datos[k]
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def stats(self):
+        with self._lock:
+            consultas = self._hits + self._misses
+            return {
+                "backend": "redis" if isinstance(self._generaciones, _GeneracionesRedis) else "local",
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / consultas, 4) if consultas else 0.0,
+                "desalojos": self._desalojos,
+                "invalidaciones": self._invalidaciones,
+            }
+
+
+cache = CacheReferencias()
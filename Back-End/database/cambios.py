@@ -0,0 +1,47 @@
+"""Punto unico por el que pasan las escrituras despues del commit.
+
+Cada handler que modifica una tabla llama a registrar_cambio() y aca se avisa a todo lo que
+depende de los datos: el cache de referencias, la version de la tabla (ETag) y los
+clientes suscriptos al feed de eventos.
+"""
+import sys
+from database.cache import cache
+from database.eventos import hub
+from database.versiones import versiones, compartidas
+
+# Tablas que guarda el cache de referencias (ver routers)
+TABLAS_CACHEADAS = {"clientes", "proveedores", "insumos", "maquinas", "tecnicos"}
+
+
+def registrar_cambio(tabla, tipo, id, todo=False):
+    """Llamar despues del commit. `tipo` es insert, update o delete e `id` la fila afectada"""
+    registrar_cambios(tabla, tipo, [id], todo=todo)
+
+
+def registrar_cambios(tabla, tipo, ids, todo=False):
+    """Igual que registrar_cambio para varias filas de una misma escritura (ej. carga masiva)"""
+    versiones.subir(tabla)
+    if tabla in TABLAS_CACHEADAS:
+        if tipo == "insert":
+            # Un alta no cambia ninguna entrada por id, solo las listas
+            cache.invalidar(tabla, todo=todo)
+        else:
+            for id_ in ids:
+                cache.invalidar(tabla, id_, todo=todo)
+    hub.publicar(tabla, tipo, ids)
+
+
+def registrar_carga_externa(tablas, avisar=True):
+    """Para scripts que escriben la base por afuera de la API (bench, cargas masivas).
+
+    Sube la version y descarta el cache de cada tabla. Solo le llega a la API con el backend
+    compartido (CACHE_REDIS_URL); con el local queda en el proceso del script y hay que
+    reiniciar la API para que no siga sirviendo ETags y cache de antes de la carga.
+    `avisar=False` si la API todavia no esta levantada.
+    """
+    for tabla in tablas:
+        versiones.subir(tabla)
+        if tabla in TABLAS_CACHEADAS:
+            cache.invalidar(tabla, todo=True)
+    if avisar and not compartidas():
+        print("⚠️ Sin CACHE_REDIS_URL la API no se entera de esta carga: reiniciarla antes de usarla", file=sys.stderr)
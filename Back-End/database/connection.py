@@ -1,22 +1,339 @@
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.constants import ClientFlag
+from fastapi import HTTPException
+from database.metricas import ConexionMedida, ESPERA_POOL
 
 load_dotenv()  # Carga las variables desde .env asi que creenlo jaj
 
-def get_connection():
+# Configuracion del pool (se puede cambiar desde el .env)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+# Si una conexion estuvo quieta mas de estos segundos se le hace ping antes de prestarla (0 = siempre)
+POOL_PING_SEGUNDOS = float(os.getenv("DB_POOL_PING_SEGUNDOS", "5"))
+
+# Replicas de lectura "host:puerto,host:puerto" (mismo usuario, clave y base que el primario).
+# Una replica que falla queda afuera estos segundos y sus lecturas van al primario
+REPLICAS = [r.strip() for r in os.getenv("DB_REPLICAS", "").split(",") if r.strip()]
+REPLICA_REINTENTO_SEGUNDOS = float(os.getenv("DB_REPLICA_REINTENTO_SEGUNDOS", "10"))
+
+
+class PoolTimeout(Exception):
+    """No se libero ninguna conexion dentro del tiempo de espera"""
+
+
+# Clases donde llegan los errores de conexion; OperationalError tambien trae errores comunes
+# del servidor, asi que lo que decide es es_caida()
+ERRORES_CONEXION = (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError)
+# Can't connect, server has gone away, lost connection (durante y antes de la consulta)
+ERRNOS_CONEXION = {2003, 2006, 2013, 2055}
+
+
+def es_caida(error):
+    """Si el error es de "el servidor no responde" (y no del SQL): solo ahi se lee del primario.
+
+    Sirve para mysql.connector (errno) y para aiomysql/pymysql (args[0]).
+    """
+    if isinstance(error, mysql.connector.errors.InterfaceError):
+        return True
+    errno = getattr(error, "errno", None)
+    if errno is None and error.args and isinstance(error.args[0], int):
+        errno = error.args[0]
+    return errno in ERRNOS_CONEXION
+
+
+def _conectar(host=None, port=None, **opciones):
+    # Envuelta para que cada execute quede en las metricas (ver database/metricas.py)
+    return ConexionMedida(mysql.connector.connect(
+        host=host or os.getenv("DB_HOST"),
+        port=port or int(os.getenv("DB_PORT", "3306")),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+        database=os.getenv("DB_NAME"),
+        # rowcount de un UPDATE = filas encontradas (no solo las que cambiaron), asi un PUT
+        # con los mismos datos no se confunde con un 404
+        client_flags=[ClientFlag.FOUND_ROWS],
+        **opciones
+    ))
+
+
+def get_connection(**opciones):
+    """Conexion suelta fuera del pool (para scripts y tareas de mantenimiento).
+
+    `opciones` van directo a mysql.connector.connect (ej. allow_local_infile=True).
+    """
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            port=int(os.getenv("DB_PORT")),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASS"),
-            database=os.getenv("DB_NAME")
-        )
-        print("Conectando con:", os.getenv("DB_HOST"), os.getenv("DB_PORT"), os.getenv("DB_USER"), os.getenv("DB_PASS"))
-
-        return connection
+        return _conectar(**opciones)
     except Error as e:
         print("Error al conectar a MySQL:", e)
-        return None
\ No newline at end of file
+        return None
+
+
+class ConnectionPool:
+    """Pool de conexiones MySQL que se crea una sola vez al arrancar la app.
+
+    Las conexiones se abren a demanda hasta `size`; cuando estan todas prestadas
+    `acquire` espera hasta `timeout` segundos a que alguien devuelva una.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, ping_segundos=POOL_PING_SEGUNDOS, conectar=_conectar):
+        self.size = size
+        self.timeout = timeout
+        self.ping_segundos = ping_segundos
+        self._conectar = conectar
+        # LIFO para reusar primero las conexiones mas "calientes"
+        self._inactivas = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._abiertas = 0
+        self._en_uso = 0
+        self._cerrado = False
+        # Metricas
+        self._prestamos = 0
+        self._esperas = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._timeouts = 0
+        self._descartadas = 0
+
+    def _tomar_inactiva(self, espera):
+        """Devuelve (conexion, ultimo_uso) o None si no hubo ninguna a tiempo"""
+        try:
+            if espera is None:
+                return self._inactivas.get_nowait()
+            return self._inactivas.get(timeout=espera)
+        except queue.Empty:
+            return None
+
+    def _reservar_nueva(self):
+        with self._lock:
+            if self._abiertas < self.size:
+                self._abiertas += 1
+                return True
+            return False
+
+    def _descartar(self, conn):
+        with self._lock:
+            self._abiertas -= 1
+            self._descartadas += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _sana(self, conn, ultimo_uso):
+        if time.monotonic() - ultimo_uso < self.ping_segundos:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        if self._cerrado:
+            raise RuntimeError("El pool de conexiones esta cerrado")
+
+        inicio = time.perf_counter()
+        limite = inicio + self.timeout
+        espero = False
+        while True:
+            item = self._tomar_inactiva(None)
+            if item is None and not self._reservar_nueva():
+                espero = True
+                restante = limite - time.perf_counter()
+                item = self._tomar_inactiva(restante) if restante > 0 else None
+                if item is None:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(f"No hay conexiones libres despues de {self.timeout}s")
+
+            if item is None:
+                # Teniamos lugar para abrir una conexion nueva
+                try:
+                    conn = self._conectar()
+                except Exception:
+                    with self._lock:
+                        self._abiertas -= 1
+                    raise
+            else:
+                conn, ultimo_uso = item
+                if not self._sana(conn, ultimo_uso):
+                    self._descartar(conn)
+                    continue
+
+            espera = time.perf_counter() - inicio
+            with self._lock:
+                self._en_uso += 1
+                self._prestamos += 1
+                if espero:
+                    self._esperas += 1
+                self._espera_total += espera
+                self._espera_max = max(self._espera_max, espera)
+            ESPERA_POOL.observar(espera, "sync")
+            return conn
+
+    def release(self, conn, descartar=False):
+        """Devuelve la conexion al pool; con descartar=True se cierra (ej: quedo a mitad de un resultado)"""
+        with self._lock:
+            self._en_uso -= 1
+        if self._cerrado or descartar:
+            self._descartar(conn)
+            return
+        try:
+            # Que no quede ninguna transaccion abierta para el siguiente
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._descartar(conn)
+            return
+        self._inactivas.put((conn, time.monotonic()))
+
+    def close(self):
+        self._cerrado = True
+        while True:
+            item = self._tomar_inactiva(None)
+            if item is None:
+                break
+            self._descartar(item[0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tamanio": self.size,
+                "abiertas": self._abiertas,
+                "en_uso": self._en_uso,
+                "inactivas": self._inactivas.qsize(),
+                "prestamos": self._prestamos,
+                "esperas": self._esperas,
+                "espera_promedio_ms": round(self._espera_total / self._prestamos * 1000, 3) if self._prestamos else 0.0,
+                "espera_max_ms": round(self._espera_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "descartadas": self._descartadas,
+            }
+
+
+class Replica:
+    """Una replica de lectura con su pool sync; si falla se la saca un rato de la rotacion"""
+
+    def __init__(self, direccion):
+        host, _, puerto = direccion.partition(":")
+        self.host = host
+        self.port = int(puerto or 3306)
+        self.nombre = f"{self.host}:{self.port}"
+        self.pool = ConnectionPool(conectar=lambda: _conectar(host=self.host, port=self.port))
+        self._caida_hasta = 0.0
+
+    def sana(self):
+        return time.monotonic() >= self._caida_hasta
+
+    def marcar_caida(self, error):
+        if self.sana():
+            print(f"⚠️ Replica {self.nombre} fuera de servicio por {REPLICA_REINTENTO_SEGUNDOS:g}s, se lee del primario:", error)
+        self._caida_hasta = time.monotonic() + REPLICA_REINTENTO_SEGUNDOS
+
+    def stats(self):
+        return {"replica": self.nombre, "sana": self.sana(), "sync": self.pool.stats()}
+
+
+_pool = None
+_replicas = []
+_turno = 0
+
+
+def init_pool():
+    """Crea el pool global (se llama una vez desde el lifespan de main.py)"""
+    global _pool, _replicas
+    if _pool is None:
+        _pool = ConnectionPool()
+        _replicas = [Replica(direccion) for direccion in REPLICAS]
+    return _pool
+
+
+def close_pool():
+    global _pool, _replicas
+    if _pool is not None:
+        _pool.close()
+        for replica in _replicas:
+            replica.pool.close()
+        _pool = None
+        _replicas = []
+
+
+def get_pool():
+    return init_pool()
+
+
+def get_replicas():
+    init_pool()
+    return _replicas
+
+
+def elegir_replica():
+    """Siguiente replica sana (en ronda), o None si no hay ninguna y hay que leer del primario"""
+    global _turno
+    sanas = [r for r in get_replicas() if r.sana()]
+    if not sanas:
+        return None
+    _turno += 1
+    return sanas[_turno % len(sanas)]
+
+
+def get_db():
+    """Dependencia de FastAPI: presta una conexion del pool y la devuelve al terminar"""
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="La base de datos esta ocupada, intente de nuevo")
+    except Error as e:
+        print("❌ Error al conectar a MySQL:", e)
+        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
+
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+# Lo mismo que get_db pero con `with`, para tomar una conexion solo en parte de una ruta
+conexion = contextmanager(get_db)
+
+
+# innodb_autoinc_lock_mode y auto_increment_increment del primario (se leen una vez). Con
+# lock mode 0 o 1 un INSERT de varias filas recibe ids en secuencia, separados por el
+# incremento (1 salvo en multi-primario); con 2 (el default de MySQL 8) se pueden intercalar
+# con otros INSERT
+_autoinc = None
+
+
+def paso_ids(cursor):
+    """Distancia entre los ids de un INSERT de varias filas desde lastrowid, o None si no se sabe"""
+    global _autoinc
+    if _autoinc is None:
+        cursor.execute("SELECT @@innodb_autoinc_lock_mode AS modo, @@auto_increment_increment AS incremento")
+        fila = cursor.fetchone()
+        modo, incremento = (fila["modo"], fila["incremento"]) if isinstance(fila, dict) else fila
+        _autoinc = (int(modo), int(incremento))
+        if _autoinc[0] == 2:
+            print(
+                "⚠️ innodb_autoinc_lock_mode=2: los ids de un INSERT de varias filas pueden no ser consecutivos,"
+                " las cargas masivas insertan fila por fila (usar --innodb-autoinc-lock-mode=1)"
+            )
+    modo, incremento = _autoinc
+    return None if modo == 2 else incremento
+
+
+def verificar_autoinc():
+    """Se llama al arrancar para avisar del lock mode antes de la primera carga masiva"""
+    try:
+        with conexion() as conn, conn.cursor() as cursor:
+            paso_ids(cursor)
+    except Exception as e:
+        # Se vuelve a intentar en la primera carga masiva
+        print("❌ Error al leer innodb_autoinc_lock_mode:", e)
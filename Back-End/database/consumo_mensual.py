@@ -0,0 +1,136 @@
+"""Resumen mensual de consumos (tabla consumo_mensual) mantenido de forma incremental.
+
+Uso (desde Back-End/):
+    python -m database.consumo_mensual --verify   compara el resumen contra consumoInsumos
+    python -m database.consumo_mensual --rebuild  lo recalcula de cero y lo verifica
+"""
+import argparse
+import sys
+from datetime import date
+from database.connection import get_connection
+from database.preparadas import ejecutar
+
+# Tolerancia al comparar sumas (cobro_mensual es FLOAT y el resumen suma en DOUBLE)
+TOLERANCIA = 0.01
+
+SQL_SUMAR = """
+    INSERT INTO consumo_mensual (id_maquina, id_insumo, mes, registros, total_cobro)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        registros = registros + VALUES(registros),
+        total_cobro = total_cobro + VALUES(total_cobro)
+"""
+
+SQL_LIMPIAR = "DELETE FROM consumo_mensual WHERE id_maquina = %s AND id_insumo = %s AND mes = %s AND registros <= 0"
+
+SQL_AGREGADO = """
+    SELECT id_maquina, id_insumo, DATE_SUB(DATE(fecha), INTERVAL DAYOFMONTH(fecha) - 1 DAY) AS mes,
+           COUNT(*) AS registros, SUM(cobro_mensual) AS total_cobro
+    FROM consumoInsumos
+    WHERE fecha IS NOT NULL AND id_maquina IS NOT NULL AND id_insumo IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+
+def mes_de(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+
+def aplicar(conn, movimientos):
+    """Aplica una lista de (id_maquina, id_insumo, fecha, cobro, signo) al resumen.
+
+    signo es +1 para un alta y -1 para una baja; un cambio es una baja del valor
+    viejo mas un alta del nuevo. Los movimientos sin fecha, maquina o insumo se ignoran. Se agrupan por clave para hacer un solo upsert por fila
+    del resumen. Tiene que correr en la misma transaccion que el cambio en consumoInsumos.
+    Los cambios de una fila (lo normal en la API) van por sentencias preparadas; la carga
+    masiva usa executemany, que arma un unico INSERT de varias filas.
+    """
+    deltas = {}
+    for id_maquina, id_insumo, fecha, cobro, signo in movimientos:
+        if fecha is None or id_maquina is None or id_insumo is None:
+            # Igual que SQL_AGREGADO (recalcular / --verify): esas filas no entran al resumen
+            continue
+        clave = (id_maquina, id_insumo, mes_de(fecha))
+        registros, total = deltas.get(clave, (0, 0.0))
+        deltas[clave] = (registros + signo, total + signo * float(cobro or 0))
+
+    filas = [clave + delta for clave, delta in deltas.items() if delta[0] != 0 or delta[1] != 0]
+    if not filas:
+        return
+    if len(filas) == 1:
+        ejecutar(conn, SQL_SUMAR, filas[0])
+    else:
+        with conn.cursor() as cursor:
+            cursor.executemany(SQL_SUMAR, filas)
+    # Los meses que se quedaron sin consumos se borran para no dejar filas en cero
+    for clave, (registros, _) in deltas.items():
+        if registros < 0:
+            ejecutar(conn, SQL_LIMPIAR, clave)
+
+
+def diferencias(conn):
+    """Claves donde el resumen no coincide con lo que hay en consumoInsumos"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_AGREGADO)
+        esperado = {(f[0], f[1], f[2]): (f[3], float(f[4] or 0)) for f in cursor.fetchall()}
+        cursor.execute("SELECT id_maquina, id_insumo, mes, registros, total_cobro FROM consumo_mensual")
+        actual = {(f[0], f[1], f[2]): (f[3], float(f[4] or 0)) for f in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    malas = []
+    for clave in esperado.keys() | actual.keys():
+        e = esperado.get(clave, (0, 0.0))
+        a = actual.get(clave, (0, 0.0))
+        if e[0] != a[0] or abs(e[1] - a[1]) > TOLERANCIA:
+            malas.append((clave, e, a))
+    return sorted(malas, key=lambda m: m[0])
+
+
+def recalcular(conn):
+    """Rehace todo el resumen desde consumoInsumos en una transaccion"""
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.execute("DELETE FROM consumo_mensual")
+        cursor.execute(
+            "INSERT INTO consumo_mensual (id_maquina, id_insumo, mes, registros, total_cobro) " + SQL_AGREGADO
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumen mensual de consumos")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--rebuild", action="store_true", help="Recalcular el resumen de cero y verificarlo")
+    grupo.add_argument("--verify", action="store_true", help="Comparar el resumen contra consumoInsumos")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    if conn is None:
+        return 2
+    try:
+        if args.rebuild:
+            recalcular(conn)
+            print("✅ Resumen recalculado")
+        malas = diferencias(conn)
+    finally:
+        conn.close()
+
+    for clave, esperado, actual in malas[:50]:
+        print(f"❌ {clave}: esperado {esperado}, hay {actual}")
+    if malas:
+        print(f"❌ {len(malas)} filas del resumen no coinciden")
+        return 1
+    print("✅ El resumen coincide con consumoInsumos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
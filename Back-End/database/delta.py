@@ -0,0 +1,118 @@
+"""Sincronizacion incremental de las listas (?since=).
+
+Cada tabla principal tiene updated_at (lo mantiene MySQL en cada INSERT/UPDATE) y las bajas
+se anotan en `eliminados` dentro de la misma transaccion del DELETE. Con un cursor
+(updated_at, id) se devuelve solo lo que cambio despues, asi el cliente hace trabajo
+proporcional a los cambios y no a la tabla.
+
+Las filas mas nuevas que DELTA_MARGEN_SEGUNDOS no se entregan todavia: una transaccion
+larga (ej. una carga masiva) puede hacer commit despues con un updated_at anterior al
+cursor que ya se devolvio. El margen tiene que ser mayor que la escritura mas larga.
+"""
+import asyncio
+import os
+from datetime import datetime
+from fastapi import HTTPException
+from database.async_connection import fetch_all
+from database.preparadas import ejecutar
+from database.paginacion import LIMITE_MAX, codificar_cursor, decodificar_cursor
+from database.serializacion import respuesta_json
+
+DELTA_MARGEN_SEGUNDOS = float(os.getenv("DELTA_MARGEN_SEGUNDOS", "5"))
+
+DESCRIPCION_SINCE = "Cursor de sincronizacion (o fecha ISO para la primera vez): devuelve solo lo que cambio despues"
+
+SQL_BAJA = """
+    INSERT INTO eliminados (tabla, id) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE eliminado_en = CURRENT_TIMESTAMP(6)
+"""
+
+SQL_ELIMINADOS = """
+    SELECT id, eliminado_en AS _cambio FROM eliminados
+    WHERE tabla = %s AND (eliminado_en > %s OR (eliminado_en = %s AND id > %s))
+      AND eliminado_en < NOW(6) - INTERVAL %s SECOND
+    ORDER BY eliminado_en, id
+    LIMIT %s
+"""
+
+
+def sql_cambios(tabla, columnas, col_id):
+    """Filas de `tabla` cambiadas despues de (updated_at, id), en orden y sin las del margen"""
+    return f"""
+        SELECT {columnas}, updated_at AS _cambio FROM {tabla}
+        WHERE (updated_at > %s OR (updated_at = %s AND {col_id} > %s))
+          AND updated_at < NOW(6) - INTERVAL %s SECOND
+        ORDER BY updated_at, {col_id}
+        LIMIT %s
+    """
+
+
+def registrar_baja(conn, tabla, id):
+    """Anota el tombstone; va en la misma transaccion que el DELETE"""
+    ejecutar(conn, SQL_BAJA, (tabla, id))
+
+
+def _desde(since):
+    """El cursor que devolvio el ultimo pedido, o una fecha ISO para arrancar"""
+    try:
+        return datetime.fromisoformat(since), 0
+    except ValueError:
+        return decodificar_cursor(since, por_fecha=True)
+
+
+def sin_filtros(**filtros):
+    """Con since se sincroniza la tabla entera: una fila que deja de cumplir un filtro no se podria informar"""
+    usados = [nombre for nombre, valor in filtros.items() if valor is not None]
+    if usados:
+        raise HTTPException(status_code=400, detail=f"since no se puede combinar con: {', '.join(usados)}")
+
+
+async def cambios_desde(tabla, columnas, col_id, since, limit=None, clave_id=None):
+    """Filas de `tabla` cambiadas y borradas despues de `since`, en el orden en que cambiaron.
+
+    `columnas` es la lista del SELECT de la ruta (la misma forma que la lista normal) y
+    `clave_id` el nombre del id en esas filas si tiene alias.
+    """
+    fecha, id_ = _desde(since)
+    limit = limit or LIMITE_MAX
+    clave_id = clave_id or col_id
+
+    # Se pide una fila de mas en cada consulta para saber si queda algo despues de esta pagina
+    filas, bajas = await asyncio.gather(
+        fetch_all(sql_cambios(tabla, columnas, col_id), (fecha, fecha, id_, DELTA_MARGEN_SEGUNDOS, limit + 1)),
+        fetch_all(SQL_ELIMINADOS, (tabla, fecha, fecha, id_, DELTA_MARGEN_SEGUNDOS, limit + 1)),
+    )
+
+    eventos = sorted(
+        [(f["_cambio"], f[clave_id], f) for f in filas] + [(b["_cambio"], b["id"], None) for b in bajas],
+        key=lambda e: (e[0], e[1]),
+    )
+    pagina = eventos[:limit]
+    cambios, eliminados = [], []
+    for _, id_fila, fila in pagina:
+        if fila is None:
+            eliminados.append(id_fila)
+        else:
+            del fila["_cambio"]
+            cambios.append(fila)
+
+    ultimo = (pagina[-1][0], pagina[-1][1]) if pagina else (fecha, id_)
+    return {
+        "cambios": cambios,
+        "eliminados": eliminados,
+        "cursor": codificar_cursor(list(ultimo)),
+        "hay_mas": len(eventos) > limit,
+    }
+
+
+async def responder_delta(tabla, columnas, col_id, since, pag, clave_id=None, **filtros):
+    """Respuesta de una lista en modo ?since= (ver models/delta.py)"""
+    sin_filtros(after=pag.after, **filtros)
+    try:
+        delta = await cambios_desde(tabla, columnas, col_id, since, pag.limit, clave_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error al obtener cambios de {tabla}:", e)
+        raise HTTPException(status_code=500, detail=f"Error al obtener cambios de {tabla}")
+    return respuesta_json(delta, headers={"Cache-Control": "no-store"})
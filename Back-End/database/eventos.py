@@ -0,0 +1,116 @@
+"""Hub en memoria que reparte los cambios de las tablas a los clientes conectados (SSE / WebSocket).
+
+Los handlers de escritura publican despues del commit (via database/cambios.py), casi
+siempre desde un thread del threadpool; cada suscriptor tiene su cola acotada en el event
+loop y se le entrega con call_soon_threadsafe. Si un cliente lento llena su cola no se
+frena a nadie: se le vacia la cola y recibe un evento "desborde" para que vuelva a pedir
+los datos (o use ?since=). Se guardan los ultimos eventos para reenviarlos al reconectar
+con Last-Event-ID.
+
+Es por proceso: con varios workers de uvicorn cada cliente ve solo las escrituras que
+atendio su worker.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+EVENTOS_COLA = int(os.getenv("EVENTOS_COLA", "100"))
+EVENTOS_HISTORIAL = int(os.getenv("EVENTOS_HISTORIAL", "500"))
+
+# Ademas de insert / update / delete: el cliente perdio eventos y tiene que volver a leer
+DESBORDE = "desborde"
+
+
+class Suscriptor:
+    def __init__(self, loop, tablas, maximo):
+        self.loop = loop
+        self.tablas = set(tablas) if tablas else None
+        self.cola = asyncio.Queue(maxsize=maximo)
+        self.desbordes = 0
+
+    def _quiere(self, evento):
+        return self.tablas is None or evento["tabla"] in self.tablas
+
+    def entregar(self, eventos):
+        """Corre en el loop del suscriptor"""
+        for evento in eventos:
+            if not self._quiere(evento):
+                continue
+            if self.cola.full():
+                # El seq del desborde es el ultimo del lote: al reconectar no se repite lo que ya cubre
+                self._desbordar(eventos[-1]["seq"])
+                return
+            self.cola.put_nowait(evento)
+
+    def _desbordar(self, seq):
+        # Lo que quedaba en la cola ya no sirve: el cliente tiene que volver a leer
+        while not self.cola.empty():
+            self.cola.get_nowait()
+        self.cola.put_nowait({"seq": seq, "tabla": None, "tipo": DESBORDE, "id": None, "ts": datetime.now().isoformat()})
+        self.desbordes += 1
+
+
+class Hub:
+    def __init__(self, maximo_cola=EVENTOS_COLA, historial=EVENTOS_HISTORIAL):
+        self.maximo_cola = maximo_cola
+        self._lock = threading.Lock()
+        self._suscriptores = set()
+        self._historial = deque(maxlen=historial)
+        self._seq = 0
+        self._publicados = 0
+        self._desbordes = 0
+
+    def suscribir(self, tablas=None, desde=None):
+        """Llamar desde el event loop. `desde` es el ultimo seq que vio el cliente (Last-Event-ID)"""
+        suscriptor = Suscriptor(asyncio.get_running_loop(), tablas, self.maximo_cola)
+        with self._lock:
+            self._suscriptores.add(suscriptor)
+            if desde is None:
+                return suscriptor
+            perdidos = bool(self._historial) and self._historial[0]["seq"] > desde + 1
+            pendientes = [e for e in self._historial if e["seq"] > desde]
+            ultimo = self._seq
+        if perdidos or desde > ultimo:
+            # Se perdio parte de lo que paso mientras estaba desconectado (o el servidor se reinicio)
+            suscriptor._desbordar(ultimo)
+        else:
+            suscriptor.entregar(pendientes)
+        return suscriptor
+
+    def desuscribir(self, suscriptor):
+        with self._lock:
+            self._suscriptores.discard(suscriptor)
+            self._desbordes += suscriptor.desbordes
+
+    def publicar(self, tabla, tipo, ids):
+        """Thread-safe; un evento por id"""
+        ahora = datetime.now().isoformat()
+        with self._lock:
+            eventos = []
+            for id_ in ids:
+                self._seq += 1
+                eventos.append({"seq": self._seq, "tabla": tabla, "tipo": tipo, "id": id_, "ts": ahora})
+            self._historial.extend(eventos)
+            self._publicados += len(eventos)
+            suscriptores = list(self._suscriptores)
+        for s in suscriptores:
+            try:
+                s.loop.call_soon_threadsafe(s.entregar, eventos)
+            except RuntimeError:
+                # El loop ya se cerro (apagando el servidor)
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "suscriptores": len(self._suscriptores),
+                "publicados": self._publicados,
+                "ultimo_seq": self._seq,
+                "desbordes": self._desbordes + sum(s.desbordes for s in self._suscriptores),
+                "max_cola": self.maximo_cola,
+            }
+
+
+hub = Hub()
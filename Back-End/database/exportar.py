@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from database.connection import get_pool, elegir_replica, PoolTimeout, ERRORES_CONEXION, es_caida
+from database.replicas import leer_de_replica
+
+# Filas que se piden al servidor por vuelta (la memoria queda acotada a esto)
+LOTE = 1000
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"No se puede serializar {type(valor)}")
+
+
+def _filas(sql, params):
+    """Generador que lee con un cursor sin buffer: MySQL manda las filas a medida que se consumen"""
+    replica = elegir_replica() if leer_de_replica() else None
+    pool = replica.pool if replica is not None else get_pool()
+    try:
+        conn = pool.acquire()
+    except ERRORES_CONEXION as e:
+        if replica is None or not es_caida(e):
+            raise
+        replica.marcar_caida(e)
+        pool = get_pool()
+        conn = pool.acquire()
+    completo = False
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(sql, params)
+        yield [d[0] for d in cursor.description]
+        while True:
+            filas = cursor.fetchmany(LOTE)
+            if not filas:
+                break
+            yield filas
+        cursor.close()
+        completo = True
+    finally:
+        # Si el cliente corto a mitad quedan filas sin leer: la conexion no se puede reusar
+        pool.release(conn, descartar=not completo)
+
+
+def _ndjson(columnas, filas):
+    for lote in filas:
+        yield "".join(json.dumps(dict(zip(columnas, fila)), default=_valor_json) + "\n" for fila in lote)
+
+
+def _csv(columnas, filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    for lote in filas:
+        writer.writerows(
+            [v.isoformat() if isinstance(v, (datetime, date)) else v for v in fila] for fila in lote
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def exportar(sql, params, formato, nombre):
+    """StreamingResponse con el resultado de `sql` en NDJSON o CSV, sin armarlo entero en memoria"""
+    filas = _filas(sql, params)
+    # Se arranca aca para que la conexion y la consulta fallen con un error HTTP normal
+    # y no a mitad del stream
+    try:
+        columnas = next(filas)
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="La base de datos esta ocupada, intente de nuevo")
+    cuerpo = _csv(columnas, filas) if formato == "csv" else _ndjson(columnas, filas)
+    return StreamingResponse(
+        cuerpo,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
@@ -0,0 +1,274 @@
+"""Metricas de la API en formato texto de Prometheus (GET /metrics).
+
+Sin dependencias: contadores e histogramas en memoria con un lock cada uno, pensados para
+quedar prendidos en produccion (por pedido son un par de perf_counter y sumas). Se mide:
+- cada request HTTP por ruta (la plantilla, ej. /api/maquinas/{id}), metodo y estado
+- cada cursor.execute del pool sync (ConexionMedida) y de las lecturas con aiomysql, por
+  "huella" de la consulta (el SQL con los valores reemplazados por ?)
+- la espera para conseguir una conexion de cada pool
+Son por proceso: con varios workers Prometheus tiene que scrapear cada uno.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+# Tope de huellas distintas para que un SQL armado a mano no haga crecer las series sin limite
+MAX_CONSULTAS = 300
+OTRAS = "otras"
+
+_registro = []
+
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ""
+    partes = []
+    for nombre, valor in zip(nombres, valores):
+        valor = str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        partes.append(f'{nombre}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _registro.append(self)
+
+    def _lineas(self):
+        raise NotImplementedError
+
+    def exportar(self):
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"] + list(self._lineas())
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def sumar(self, valor=1, *etiquetas):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def _lineas(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        for etiquetas, valor in valores:
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {valor}"
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_HTTP):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, *etiquetas):
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            entrada = self._valores.get(etiquetas)
+            if entrada is None:
+                entrada = self._valores[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+            entrada[0][i] += 1
+            entrada[1] += valor
+
+    def _lineas(self):
+        with self._lock:
+            valores = [(e, list(conteos), suma) for e, (conteos, suma) in self._valores.items()]
+        nombres = self.etiquetas + ("le",)
+        for etiquetas, conteos, suma in valores:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ("+Inf",), conteos):
+                acumulado += conteo
+                yield f"{self.nombre}_bucket{_etiquetas(nombres, etiquetas + (limite,))} {acumulado}"
+            yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {suma}"
+            yield f"{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {acumulado}"
+
+
+class Indicador(_Metrica):
+    """Gauge que se lee recien al exportar: `leer()` devuelve {tupla de etiquetas: valor}"""
+    tipo = "gauge"
+
+    def __init__(self, nombre, ayuda, etiquetas, leer):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._leer = leer
+
+    def _lineas(self):
+        try:
+            valores = self._leer() or {}
+        except Exception as e:
+            print(f"❌ Error al leer la metrica {self.nombre}:", e)
+            return
+        for etiquetas, valor in valores.items():
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {valor}"
+
+
+def exportar():
+    """Texto para GET /metrics"""
+    lineas = []
+    for metrica in _registro:
+        lineas += metrica.exportar()
+    return "\n".join(lineas) + "\n"
+
+
+PEDIDOS = Contador("http_requests_total", "Requests atendidos", ("metodo", "ruta", "estado"))
+DURACION_PEDIDOS = Histograma(
+    "http_request_duration_seconds", "Duracion de los requests", ("metodo", "ruta"), BUCKETS_HTTP
+)
+DURACION_CONSULTAS = Histograma(
+    "db_query_duration_seconds", "Duracion de cada execute", ("consulta", "modo"), BUCKETS_DB
+)
+FILAS_CONSULTAS = Contador("db_query_rows_total", "Filas devueltas (SELECT) o afectadas (DML)", ("consulta", "modo"))
+ESPERA_POOL = Histograma(
+    "db_pool_wait_seconds", "Espera para conseguir una conexion del pool", ("pool",), BUCKETS_DB
+)
+
+
+_ESPACIOS = re.compile(r"\s+")
+_CADENAS = re.compile(r"'(?:[^'\\]|\\.)*'")
+_LISTAS = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_huellas = set()
+_huellas_lock = threading.Lock()
+
+
+@lru_cache(maxsize=2048)
+def _normalizar(sql):
+    texto = _CADENAS.sub("?", sql)
+    texto = _LISTAS.sub("(...)", texto)
+    texto = _NUMEROS.sub("?", texto)
+    return _ESPACIOS.sub(" ", texto).strip()[:200]
+
+
+def huella(sql):
+    """SQL sin valores ni espacios de mas; una etiqueta por forma de consulta"""
+    texto = _normalizar(sql)
+    if texto not in _huellas:
+        with _huellas_lock:
+            if len(_huellas) >= MAX_CONSULTAS:
+                return OTRAS
+            _huellas.add(texto)
+    return texto
+
+
+# Funciones (consulta, duracion, params) que se llaman en cada execute (ej. database/perfilado.py)
+observadores = []
+
+
+def registrar_consulta(sql, duracion, filas, modo, params=None):
+    """Anota un execute; devuelve la huella para seguir sumando filas en los fetch"""
+    consulta = huella(sql)
+    DURACION_CONSULTAS.observar(duracion, consulta, modo)
+    if filas:
+        FILAS_CONSULTAS.sumar(filas, consulta, modo)
+    for observador in observadores:
+        observador(consulta, duracion, params)
+    return consulta
+
+
+class CursorMedido:
+    """Envuelve un cursor de mysql.connector y mide execute/executemany y las filas leidas"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._consulta = None
+
+    def _medir(self, metodo, sql, args, kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(sql, *args, **kwargs)
+        finally:
+            duracion = time.perf_counter() - inicio
+            # En un SELECT las filas se cuentan al hacer fetch; en un INSERT/UPDATE/DELETE son las afectadas
+            filas = 0 if self._cursor.with_rows else max(self._cursor.rowcount or 0, 0)
+            params = args[0] if args else kwargs.get("params", kwargs.get("seq_params"))
+            self._consulta = registrar_consulta(sql, duracion, filas, "sync", params)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._medir(self._cursor.execute, sql, args, kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._medir(self._cursor.executemany, sql, args, kwargs)
+
+    def _leidas(self, cantidad):
+        if cantidad and self._consulta is not None:
+            FILAS_CONSULTAS.sumar(cantidad, self._consulta, "sync")
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        self._leidas(1 if fila is not None else 0)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = self._cursor.fetchmany(*args, **kwargs)
+        self._leidas(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        self._leidas(len(filas))
+        return filas
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class ConexionMedida:
+    """Conexion de mysql.connector cuyos cursores se miden; el resto pasa directo"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return CursorMedido(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+class MetricasMiddleware:
+    """Cuenta requests y mide su duracion por ruta (middleware ASGI puro)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        inicio = time.perf_counter()
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # La plantilla de la ruta (no el path real) para no crear una serie por id
+            ruta = scope.get("route")
+            plantilla = getattr(ruta, "path", None) or "sin_ruta"
+            PEDIDOS.sumar(1, scope["method"], plantilla, estado)
+            DURACION_PEDIDOS.observar(time.perf_counter() - inicio, scope["method"], plantilla)
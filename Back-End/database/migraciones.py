@@ -0,0 +1,320 @@
+"""Migraciones de esquema versionadas y solo hacia adelante.
+
+Cada archivo sql/migraciones/NNNN_nombre.sql se aplica una sola vez, en orden, y
+queda anotado en la tabla schema_migrations con su checksum. Una migracion ya
+aplicada no se edita: los cambios van en un archivo nuevo.
+
+La API no arranca si falta alguna (ver verificar_migraciones); el compose.yml las aplica
+antes de levantar uvicorn.
+
+Uso (desde Back-End/):
+    python -m database.migraciones           aplica las pendientes
+    python -m database.migraciones --estado  lista aplicadas y pendientes
+    python -m database.migraciones --check   EXPLAIN de las consultas de los routers con filtro o LIMIT
+                                             (--filas-min N: tablas mas chicas no se evaluan)
+"""
+import argparse
+import hashlib
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from mysql.connector import Error
+from database.connection import conexion, get_connection
+from database.paginacion import Paginacion
+from database.repositorio import (
+    CLIENTES, CONSUMOS, INSUMOS, MANTENIMIENTOS, MAQUINAS, PROVEEDORES, TECNICOS, USUARIOS,
+)
+from database import delta
+
+CARPETA = Path(__file__).resolve().parent.parent / "sql" / "migraciones"
+PATRON = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Con menos filas que esto MySQL elige un scan aunque exista el indice (es lo mas barato),
+# asi que esas tablas no se evaluan en --check
+CHECK_FILAS_MIN = 1000
+
+REPOSITORIOS = (CLIENTES, PROVEEDORES, INSUMOS, TECNICOS, MAQUINAS, MANTENIMIENTOS, CONSUMOS, USUARIOS)
+
+
+class MigracionError(Exception):
+    pass
+
+
+def _migraciones():
+    """Lista ordenada de (version, nombre, sql, checksum) de los archivos en disco"""
+    resultado = []
+    for archivo in sorted(CARPETA.iterdir()):
+        m = PATRON.match(archivo.name)
+        if not m:
+            continue
+        sql = archivo.read_text(encoding="utf-8")
+        resultado.append((m.group(1), m.group(2), sql, hashlib.sha256(sql.encode()).hexdigest()))
+    return resultado
+
+
+def _sentencias(sql):
+    """Separa un archivo en sentencias (una por ';' al final de linea, sin comentarios --)"""
+    lineas = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lineas), flags=re.M) if s.strip()]
+
+
+def _aplicadas(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version CHAR(4) PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            aplicada_en DATETIME NOT NULL
+        )
+    """)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def pendientes(cursor):
+    """Migraciones en disco ("NNNN_nombre") que no estan en schema_migrations, sin crear la tabla"""
+    try:
+        cursor.execute("SELECT version FROM schema_migrations")
+        aplicadas = {f["version"] if isinstance(f, dict) else f[0] for f in cursor.fetchall()}
+    except Error as e:
+        if e.errno != 1146:  # ER_NO_SUCH_TABLE: base sin ninguna migracion
+            raise
+        aplicadas = set()
+    return [f"{version}_{nombre}" for version, nombre, _, _ in _migraciones() if version not in aplicadas]
+
+
+def verificar_migraciones():
+    """Se llama al arrancar: sin las migraciones las rutas que usan sus tablas y columnas dan 500"""
+    try:
+        with conexion() as conn, conn.cursor() as cursor:
+            faltan = pendientes(cursor)
+    except Exception as e:
+        # Sin base al arrancar no se puede saber; las rutas ya devuelven el error de conexion
+        print("❌ Error al leer schema_migrations:", e)
+        return
+    if faltan:
+        raise MigracionError(f"❌ faltan migraciones: {', '.join(faltan)} (correr python -m database.migraciones)")
+
+
+def migrar(conn):
+    """Aplica las migraciones pendientes; devuelve las versiones aplicadas"""
+    cursor = conn.cursor()
+    # Que dos procesos (por ej. varios workers arrancando) no migren a la vez
+    cursor.execute("SELECT GET_LOCK('schema_migrations', 60)")
+    if cursor.fetchone()[0] != 1:
+        raise MigracionError("No se pudo tomar el lock de migraciones")
+    try:
+        aplicadas = _aplicadas(cursor)
+        nuevas = []
+        for version, nombre, sql, checksum in _migraciones():
+            if version in aplicadas:
+                if aplicadas[version] != checksum:
+                    raise MigracionError(f"La migracion {version}_{nombre} cambio despues de aplicada")
+                continue
+            # Ojo: en MySQL el DDL hace commit implicito, una migracion a medias no se deshace sola
+            for sentencia in _sentencias(sql):
+                cursor.execute(sentencia)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, nombre, checksum, aplicada_en) VALUES (%s, %s, %s, %s)",
+                (version, nombre, checksum, datetime.now())
+            )
+            conn.commit()
+            print(f"✅ Migracion {version}_{nombre} aplicada")
+            nuevas.append(version)
+        return nuevas
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+        cursor.fetchall()
+        cursor.close()
+
+
+def estado(conn):
+    cursor = conn.cursor()
+    try:
+        aplicadas = _aplicadas(cursor)
+    finally:
+        cursor.close()
+    for version, nombre, _, checksum in _migraciones():
+        if version not in aplicadas:
+            marca = "pendiente"
+        elif aplicadas[version] != checksum:
+            marca = "MODIFICADA"
+        else:
+            marca = "aplicada"
+        print(f"{version}_{nombre}: {marca}")
+
+
+def _consultas_a_verificar():
+    """Las consultas de los routers con filtro o LIMIT, armadas con las mismas piezas (parametros de ejemplo).
+
+    Las que leen la tabla entera a proposito (listas sin limit, /export, el alquiler del
+    dashboard y la facturacion sin id_cliente) no estan: ahi el scan es lo esperado.
+    """
+    # Aca y no arriba: aplicar migraciones no necesita levantar los routers (ni sus avisos)
+    from routers import consumos, dashboard, facturacion, mantenimientos, usuarios
+
+    pag = Paginacion(limit=100, after=None)
+    fecha = datetime(2025, 1, 1)
+    mes, siguiente = date(2025, 1, 1), date(2025, 3, 1)
+    por_cliente = "id_maquina IN (SELECT id_maquina FROM maquinas WHERE id_cliente = %s)"
+
+    def lista(repo, filtros=(), col_fecha=None, base=None, alias=""):
+        consulta = repo.consulta(pag, col_fecha=col_fecha, alias=alias)
+        for condicion, valor in filtros:
+            consulta.filtro(condicion, valor)
+        return consulta.armar(base or repo.select)
+
+    consultas = {}
+    for repo in REPOSITORIOS:
+        col_fecha = "fecha" if repo in (CONSUMOS, MANTENIMIENTOS) else None
+        consultas[f"{repo.plural} paginados"] = lista(repo, col_fecha=col_fecha)
+        if hasattr(repo, "sql_buscar"):
+            consultas[f"busqueda de {repo.plural}"] = (repo.sql_buscar, ["+caf*", "+caf*", 20])
+        if repo.delta:
+            consultas[f"cambios de {repo.plural} (since)"] = (
+                delta.sql_cambios(repo.tabla, repo.columnas, repo.clave), [fecha, fecha, 0, 5, 101]
+            )
+            consultas[f"bajas de {repo.plural} (since)"] = (delta.SQL_ELIMINADOS, [repo.tabla, fecha, fecha, 0, 5, 101])
+
+    consultas.update({
+        "consumos por maquina": lista(CONSUMOS, [("id_maquina = %s", 1)], "fecha"),
+        "consumos por fecha": lista(CONSUMOS, [("fecha >= %s", fecha)], "fecha"),
+        "consumos por insumo": lista(CONSUMOS, [("id_insumo = %s", 1)], "fecha"),
+        "consumos por cliente": lista(CONSUMOS, [(por_cliente, 1)], "fecha"),
+        "consumos expandido": lista(CONSUMOS, (), "fecha", consumos.SELECT_CONSUMOS_EXPANDIDO, "c."),
+        "consumos expandido por maquina": lista(
+            CONSUMOS, [("c.id_maquina = %s", 1)], "fecha", consumos.SELECT_CONSUMOS_EXPANDIDO, "c."
+        ),
+        "consumos expandido por cliente": lista(
+            CONSUMOS, [("m.id_cliente = %s", 1)], "fecha", consumos.SELECT_CONSUMOS_EXPANDIDO, "c."
+        ),
+        "mantenimientos por maquina": lista(MANTENIMIENTOS, [("id_maquina = %s", 1)], "fecha"),
+        "mantenimientos por tecnico": lista(MANTENIMIENTOS, [("id_tecnico = %s", 1)], "fecha"),
+        "mantenimientos por fecha": lista(MANTENIMIENTOS, [("fecha >= %s", fecha)], "fecha"),
+        "mantenimientos por cliente": lista(MANTENIMIENTOS, [(por_cliente, 1)], "fecha"),
+        "mantenimientos expandido": lista(
+            MANTENIMIENTOS, (), "fecha", mantenimientos.SELECT_MANTENIMIENTOS_EXPANDIDO, "mt."
+        ),
+        "mantenimientos expandido por tecnico": lista(
+            MANTENIMIENTOS, [("mt.id_tecnico = %s", 1)], "fecha", mantenimientos.SELECT_MANTENIMIENTOS_EXPANDIDO, "mt."
+        ),
+        "mantenimientos expandido por cliente": lista(
+            MANTENIMIENTOS, [("m.id_cliente = %s", 1)], "fecha", mantenimientos.SELECT_MANTENIMIENTOS_EXPANDIDO, "mt."
+        ),
+        "insumos por proveedor": lista(INSUMOS, [("id_proveedor = %s", 1)]),
+        "insumos por tipo": lista(INSUMOS, [("tipo = %s", "cafe")]),
+        "maquinas por cliente": lista(MAQUINAS, [("id_cliente = %s", 1)]),
+        "tecnicos por cliente": lista(TECNICOS, [("id_cliente = %s", 1)]),
+        "usuarios por cargo": lista(USUARIOS, [("cargo = %s", "admin")]),
+        "login de usuario": (usuarios.SQL_LOGIN, ["admin"]),
+        "facturacion: maquinas del cliente": (
+            facturacion.SQL_MAQUINAS + " WHERE m.id_cliente = %s ORDER BY m.id_maquina", [1]
+        ),
+        "facturacion: consumos de los meses": (
+            facturacion.SQL_CONSUMOS + " WHERE c.mes >= %s AND c.mes < %s", [mes, siguiente]
+        ),
+        "facturacion: consumos del cliente": (
+            facturacion.SQL_CONSUMOS + " WHERE c.mes >= %s AND c.mes < %s AND c." + por_cliente, [mes, siguiente, 1]
+        ),
+        "dashboard: consumos": (dashboard.SQL_CONSUMOS, [mes, siguiente]),
+        "dashboard: mantenimientos": (dashboard.SQL_MANTENIMIENTOS, [mes, mes, siguiente]),
+        "dashboard: maquinas activas": (dashboard.SQL_ACTIVAS, [mes, siguiente, mes, siguiente]),
+    })
+    return consultas
+
+
+def _filas(cursor, tabla, cache, minimo):
+    """Filas de `tabla` contadas hasta `minimo` (None si no es una tabla, ej. una derivada)"""
+    if tabla not in cache:
+        try:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM (SELECT 1 FROM `{tabla}` LIMIT {int(minimo)}) t")
+            cache[tabla] = cursor.fetchall()[0]["n"]
+        except Exception:
+            cache[tabla] = None
+    return cache[tabla]
+
+
+def _explicar(cursor, consultas):
+    planes = {}
+    for nombre, (sql, params) in consultas.items():
+        cursor.execute("EXPLAIN " + sql, params)
+        planes[nombre] = cursor.fetchall()
+    return planes
+
+
+def check(conn, filas_min=CHECK_FILAS_MIN):
+    """Corre EXPLAIN sobre cada consulta y devuelve la lista de problemas (scan completo o filesort).
+
+    Los planes sobre tablas con menos de `filas_min` filas no cuentan: ahi el scan es la eleccion
+    correcta y una base recien creada fallaria siempre.
+    """
+    problemas = []
+    filas = {}
+    consultas = _consultas_a_verificar()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        planes = _explicar(cursor, consultas)
+        tablas = {f["table"] for plan in planes.values() for f in plan if f.get("table")}
+        grandes = [t for t in sorted(tablas) if (_filas(cursor, t, filas, filas_min) or 0) >= filas_min]
+        if grandes:
+            # Estadisticas al dia (ej. recien cargado bench.datos) y se vuelve a explicar con ellas
+            cursor.execute("ANALYZE TABLE " + ", ".join(f"`{t}`" for t in grandes))
+            cursor.fetchall()
+            planes = _explicar(cursor, consultas)
+
+        for nombre, plan in planes.items():
+            for fila in plan:
+                tabla = fila.get("table")
+                if tabla and tabla.startswith("<"):
+                    # <derivedN> / <unionN,M>: resultado intermedio que siempre se recorre entero;
+                    # las tablas de las que sale tienen su propia fila en el plan
+                    continue
+                cantidad = _filas(cursor, tabla, filas, filas_min)
+                if cantidad is not None and cantidad < filas_min:
+                    continue
+                extra = fila.get("Extra") or ""
+                if fila.get("type") == "ALL":
+                    problemas.append(f"{nombre}: full scan de {tabla}")
+                elif "Using filesort" in extra:
+                    problemas.append(f"{nombre}: filesort en {tabla}")
+    finally:
+        cursor.close()
+    return problemas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones de esquema de Marloy")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--estado", action="store_true", help="Mostrar migraciones aplicadas y pendientes")
+    grupo.add_argument("--check", action="store_true", help="Fallar si alguna consulta de los routers con filtro o LIMIT hace full scan o filesort")
+    parser.add_argument("--filas-min", type=int, default=CHECK_FILAS_MIN,
+                        help="Con --check, las tablas con menos filas no se evaluan")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    if conn is None:
+        return 2
+    try:
+        if args.estado:
+            estado(conn)
+        elif args.check:
+            problemas = check(conn, args.filas_min)
+            for problema in problemas:
+                print("❌", problema)
+            if problemas:
+                return 1
+            print("✅ Todas las consultas usan indices")
+        else:
+            if not migrar(conn):
+                print("No hay migraciones pendientes")
+    except MigracionError as e:
+        print("❌", e)
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Query
+from database.serializacion import respuesta_json
+
+LIMITE_MAX = 1000
+HEADER_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(valores):
+    crudo = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in valores])
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, por_fecha):
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if por_fecha:
+            fecha, id_ = valores
+            return datetime.fromisoformat(fecha), int(id_)
+        (id_,) = valores
+        return (int(id_),)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor invalido")
+
+
+class Paginacion:
+    """Parametros ?limit=&after= comunes a todas las listas (se usa con Depends()).
+
+    Sin `limit` se devuelve la lista completa como antes; el cursor de la
+    pagina siguiente viaja en el header X-Next-Cursor.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAX, description="Cantidad maxima de filas"),
+        after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+class Consulta:
+    """Arma el WHERE/ORDER BY/LIMIT de una lista con filtros opcionales y paginacion keyset.
+
+    Con `col_fecha` se ordena por (fecha DESC, id DESC); si no, por id ASC.
+    `clave_id` es el nombre de la columna id en las filas devueltas (por si tiene alias).
+    """
+
+    def __init__(self, pag, col_id, col_fecha=None, clave_id=None, clave_fecha=None):
+        self.pag = pag
+        self.col_id = col_id
+        self.col_fecha = col_fecha
+        self.clave_id = clave_id or col_id.split(".")[-1]
+        self.clave_fecha = clave_fecha or (col_fecha.split(".")[-1] if col_fecha else None)
+        self.condiciones = []
+        self.params = []
+
+    def filtro(self, condicion, valor):
+        """Agrega `condicion` (con un %s) solo si vino el valor"""
+        if valor is not None:
+            self.condiciones.append(condicion)
+            self.params.append(valor)
+        return self
+
+    def armar(self, select):
+        condiciones = list(self.condiciones)
+        params = list(self.params)
+
+        if self.pag.after:
+            if self.col_fecha:
+                fecha, id_ = decodificar_cursor(self.pag.after, por_fecha=True)
+                condiciones.append(f"({self.col_fecha} < %s OR ({self.col_fecha} = %s AND {self.col_id} < %s))")
+                params += [fecha, fecha, id_]
+            else:
+                (id_,) = decodificar_cursor(self.pag.after, por_fecha=False)
+                condiciones.append(f"{self.col_id} > %s")
+                params.append(id_)
+
+        sql = select
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        if self.col_fecha:
+            sql += f" ORDER BY {self.col_fecha} DESC, {self.col_id} DESC"
+        else:
+            sql += f" ORDER BY {self.col_id}"
+        if self.pag.limit:
+            sql += " LIMIT %s"
+            params.append(self.pag.limit)
+        return sql, params
+
+    def cursor_siguiente(self, filas):
+        """Cursor para pedir la pagina siguiente, o None si ya no hay mas"""
+        if not self.pag.limit or len(filas) < self.pag.limit:
+            return None
+        ultima = filas[-1]
+        if self.col_fecha:
+            return codificar_cursor([ultima[self.clave_fecha], ultima[self.clave_id]])
+        return codificar_cursor([ultima[self.clave_id]])
+
+    def poner_cursor(self, response, filas):
+        cursor = self.cursor_siguiente(filas)
+        if cursor:
+            response.headers[HEADER_CURSOR] = cursor
+        return filas
+
+    def responder(self, filas, modelo=None):
+        """Respuesta JSON armada directo de las filas (camino rapido), con el cursor en el header"""
+        cursor = self.cursor_siguiente(filas)
+        return respuesta_json(filas, modelo, headers={HEADER_CURSOR: cursor} if cursor else None)
@@ -0,0 +1,106 @@
+"""Perfil de las consultas de cada request (se engancha en metricas.registrar_consulta).
+
+- Cuenta consultas y tiempo de base por request (en un ContextVar, asi sirve tanto para los
+  handlers async como para los sync que corren en el threadpool).
+- Loguea las consultas que tardan mas de DB_CONSULTA_LENTA_MS, con los valores ocultos.
+- Avisa cuando un request repite la misma forma de consulta mas de DB_REPETIDAS_UMBRAL
+  veces (el patron tipico de N+1).
+- Con DB_DEBUG_HEADERS=1 agrega X-DB-Queries y X-DB-Time (ms) a cada respuesta.
+"""
+import os
+from contextvars import ContextVar
+from database import metricas
+
+CONSULTA_LENTA_MS = float(os.getenv("DB_CONSULTA_LENTA_MS", "200"))
+REPETIDAS_UMBRAL = int(os.getenv("DB_REPETIDAS_UMBRAL", "10"))
+DEBUG_HEADERS = os.getenv("DB_DEBUG_HEADERS", "0") == "1"
+
+HEADER_CONSULTAS = "X-DB-Queries"
+HEADER_TIEMPO = "X-DB-Time"
+
+CONSULTAS_POR_PEDIDO = metricas.Histograma(
+    "http_request_db_queries", "Consultas por request", ("ruta",), (0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+LENTAS = metricas.Contador("db_slow_queries_total", "Consultas mas lentas que DB_CONSULTA_LENTA_MS", ("consulta",))
+REPETIDAS = metricas.Contador(
+    "db_repeated_queries_total", "Requests que repitieron una consulta mas de DB_REPETIDAS_UMBRAL veces", ("ruta", "consulta")
+)
+
+
+class Perfil:
+    __slots__ = ("pedido", "consultas", "tiempo", "por_consulta")
+
+    def __init__(self, pedido):
+        self.pedido = pedido
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.por_consulta = {}
+
+
+_perfil = ContextVar("perfil_db", default=None)
+
+
+def actual():
+    """Perfil del request en curso (None fuera de un request, ej. en los scripts)"""
+    return _perfil.get()
+
+
+def _redactar(params):
+    """Solo el tipo de cada valor: en los logs no tienen que quedar datos de clientes ni contraseñas"""
+    if params is None:
+        return "-"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    if isinstance(params, list) and params and isinstance(params[0], (list, tuple, dict)):
+        # executemany
+        return f"[{len(params)} filas]"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+
+def anotar(consulta, duracion, params):
+    perfil = _perfil.get()
+    if perfil is not None:
+        perfil.consultas += 1
+        perfil.tiempo += duracion
+        perfil.por_consulta[consulta] = perfil.por_consulta.get(consulta, 0) + 1
+
+    if duracion * 1000 >= CONSULTA_LENTA_MS:
+        LENTAS.sumar(1, consulta)
+        donde = perfil.pedido if perfil is not None else "fuera de un request"
+        print(f"🐢 Consulta lenta ({duracion * 1000:.0f} ms) en {donde}: {consulta} params={_redactar(params)}")
+
+
+metricas.observadores.append(anotar)
+
+
+class PerfilMiddleware:
+    """Abre un Perfil por request y al terminar revisa las consultas repetidas (ASGI puro)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        perfil = Perfil(f"{scope['method']} {scope['path']}")
+        token = _perfil.set(perfil)
+
+        async def enviar(mensaje):
+            if DEBUG_HEADERS and mensaje["type"] == "http.response.start":
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [
+                    (HEADER_CONSULTAS.lower().encode(), str(perfil.consultas).encode()),
+                    (HEADER_TIEMPO.lower().encode(), f"{perfil.tiempo * 1000:.1f}".encode()),
+                ]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _perfil.reset(token)
+            ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+            CONSULTAS_POR_PEDIDO.observar(perfil.consultas, ruta)
+            for consulta, veces in perfil.por_consulta.items():
+                if veces > REPETIDAS_UMBRAL:
+                    REPETIDAS.sumar(1, ruta, consulta)
+                    print(f"⚠️ Posible N+1 en {perfil.pedido}: la misma consulta {veces} veces: {consulta}")
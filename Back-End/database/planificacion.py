@@ -0,0 +1,290 @@
+"""Proximo mantenimiento de cada maquina estimado con su historial (NumPy, columnar).
+
+El historial de mantenimientos vive en memoria como tres arreglos (id, maquina, dia) y el
+plan se recalcula entero con operaciones vectorizadas, sin loops por maquina:
+- intervalo de cada maquina = promedio de sus brechas entre servicios (recortadas a
+  3 veces la mediana de la flota), mezclado con la mediana segun cuantas brechas tenga:
+  con poca historia pesa mas la flota
+- factor de uso = consumo mensual de los ultimos PLAN_MESES_RECIENTES sobre el de los
+  ultimos PLAN_MESES_CONSUMO (consumo_mensual); la que se usa mas se atiende antes
+- proximo = ultimo servicio + intervalo / factor
+
+La primera consulta carga todo; despues solo se traen los cambios (updated_at y
+tombstones, igual que ?since=) cuando sube la version de mantenimientos. Lo que se da de
+alta, cambia o borra en este proceso se aplica enseguida, sin esperar el margen del delta.
+Las maquinas sin ningun mantenimiento no tienen desde donde contar y no se planifican.
+Cuanto tarda el calculo con 100k maquinas: python -m bench.planificacion
+"""
+import asyncio
+import os
+import threading
+import time
+from datetime import date
+import numpy as np
+from database.async_connection import fetch_all, fetch_one
+from database.delta import DELTA_MARGEN_SEGUNDOS, cambios_desde
+from database.paginacion import LIMITE_MAX
+from database.replicas import cambio_reciente, leer_del_primario
+from database.versiones import versiones
+
+PLAN_INTERVALO_DIAS = float(os.getenv("PLAN_INTERVALO_DIAS", "90"))
+PLAN_MESES_CONSUMO = int(os.getenv("PLAN_MESES_CONSUMO", "12"))
+PLAN_MESES_RECIENTES = int(os.getenv("PLAN_MESES_RECIENTES", "3"))
+PLAN_CONSUMOS_SEGUNDOS = float(os.getenv("PLAN_CONSUMOS_SEGUNDOS", "600"))
+
+# Brechas "virtuales" de la mediana de la flota que se suman a las de cada maquina
+PESO_FLOTA = 2
+# El uso puede adelantar o atrasar el servicio hasta este punto
+FACTOR_MIN, FACTOR_MAX = 0.5, 2.0
+# Dias desde 1970 en los bits bajos de la clave de orden (alcanza para +-1400 años)
+BITS_DIA = 20
+BASE_DIA = 1 << (BITS_DIA - 1)
+# Con un delta mas grande que esto conviene recargar todo
+PAGINAS_DELTA_MAX = 20
+
+COLUMNAS = "id_mantenimiento, id_maquina, DATEDIFF(fecha, '1970-01-01') AS dia"
+SQL_HISTORIAL = f"SELECT {COLUMNAS} FROM mantenimientos WHERE id_maquina IS NOT NULL AND fecha IS NOT NULL"
+SQL_DESDE = "SELECT NOW(6) - INTERVAL %s SECOND AS desde"
+SQL_CONSUMOS = """
+    SELECT id_maquina,
+           SUM(CASE WHEN mes >= %s THEN total_cobro ELSE 0 END) AS reciente,
+           SUM(total_cobro) AS total
+    FROM consumo_mensual
+    WHERE mes >= %s
+    GROUP BY id_maquina
+"""
+
+_VACIO = np.empty(0, dtype=np.int64)
+
+
+def _hoy():
+    return np.datetime64(date.today(), "D").astype(np.int64)
+
+
+def _meses_atras(meses):
+    hoy = date.today()
+    total = hoy.year * 12 + hoy.month - 1 - meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _arreglos(filas, *columnas):
+    return [np.fromiter((f[c] for f in filas), dtype=np.int64, count=len(filas)) for c in columnas]
+
+
+class Plan:
+    """Resultado del calculo: un arreglo por columna, una posicion por maquina (ordenadas por id)"""
+
+    def __init__(self, maquinas, servicios, ultimo, intervalo, proximo):
+        self.maquinas = maquinas
+        self.servicios = servicios
+        self.ultimo = ultimo
+        self.intervalo = intervalo
+        self.proximo = proximo
+
+    def __len__(self):
+        return len(self.maquinas)
+
+    def listar(self, horizonte, estado=None, limit=None, hoy=None):
+        """Vencidas (proximo ya paso) y/o proximas (dentro de `horizonte` dias), las mas atrasadas primero"""
+        restantes = self.proximo - (_hoy() if hoy is None else hoy)
+        if estado == "vencidos":
+            mascara = restantes < 0
+        elif estado == "proximos":
+            mascara = (restantes >= 0) & (restantes <= horizonte)
+        else:
+            mascara = restantes <= horizonte
+        elegidas = np.flatnonzero(mascara)
+        if limit is not None and len(elegidas) > limit:
+            # Solo se ordenan las que van a salir
+            elegidas = elegidas[np.argpartition(restantes[elegidas], limit - 1)[:limit]]
+        elegidas = elegidas[np.lexsort((self.maquinas[elegidas], restantes[elegidas]))]
+
+        fechas = lambda dias: dias.astype("datetime64[D]").tolist()
+        return [
+            {
+                "id_maquina": id_maquina,
+                "servicios": servicios,
+                "ultimo": ultimo,
+                "intervalo_dias": round(intervalo, 1),
+                "proximo": proximo,
+                "dias_restantes": dias,
+                "estado": "vencido" if dias < 0 else "proximo",
+            }
+            for id_maquina, servicios, ultimo, intervalo, proximo, dias in zip(
+                self.maquinas[elegidas].tolist(),
+                self.servicios[elegidas].tolist(),
+                fechas(self.ultimo[elegidas]),
+                self.intervalo[elegidas].tolist(),
+                fechas(self.proximo[elegidas]),
+                restantes[elegidas].tolist(),
+            )
+        ]
+
+    def vencen_antes(self, fin):
+        """(ids, proximo) de las maquinas que vencen antes de `fin` (date), las vencidas incluidas"""
+        elegidas = np.flatnonzero(self.proximo < np.datetime64(fin, "D").astype(np.int64))
+        return self.maquinas[elegidas].tolist(), self.proximo[elegidas].tolist()
+
+
+def estimar(maquinas, dias, uso_maquinas=_VACIO, uso_factor=None):
+    """Plan de toda la flota a partir de (maquina, dia) de cada servicio y el factor de uso por maquina"""
+    if not len(maquinas):
+        return Plan(_VACIO, _VACIO, _VACIO, np.empty(0), _VACIO)
+    # Ordenar una sola clave (maquina, dia) es varias veces mas rapido que un lexsort de dos columnas
+    clave = np.sort((maquinas << BITS_DIA) | (dias + BASE_DIA))
+    maquinas, dias = clave >> BITS_DIA, (clave & (2 * BASE_DIA - 1)) - BASE_DIA
+    inicio = np.flatnonzero(np.r_[True, maquinas[1:] != maquinas[:-1]])
+    servicios = np.diff(np.r_[inicio, len(maquinas)])
+    ids = maquinas[inicio]
+    ultimo = dias[inicio + servicios - 1]
+
+    # Brechas entre servicios consecutivos de la misma maquina (dos el mismo dia cuentan como uno)
+    brechas = np.diff(dias)
+    posicion = np.repeat(np.arange(len(ids)), servicios)[1:]
+    validas = (maquinas[1:] == maquinas[:-1]) & (brechas > 0)
+    brechas, posicion = brechas[validas], posicion[validas]
+
+    mediana = float(np.median(brechas)) if len(brechas) else PLAN_INTERVALO_DIAS
+    recortadas = np.minimum(brechas, 3 * mediana)
+    suma = np.bincount(posicion, weights=recortadas, minlength=len(ids))
+    cantidad = np.bincount(posicion, minlength=len(ids))
+    intervalo = (suma + PESO_FLOTA * mediana) / (cantidad + PESO_FLOTA)
+
+    if uso_factor is not None and len(uso_maquinas):
+        lugar = np.minimum(np.searchsorted(uso_maquinas, ids), len(uso_maquinas) - 1)
+        factor = np.where(uso_maquinas[lugar] == ids, uso_factor[lugar], 1.0)
+        intervalo = intervalo / factor
+
+    proximo = ultimo + np.rint(intervalo).astype(np.int64)
+    return Plan(ids, servicios, ultimo, intervalo, proximo)
+
+
+def factor_de_uso(maquinas, reciente, total):
+    """Consumo mensual reciente sobre el del periodo completo, acotado; 1 si no hay consumo"""
+    por_mes_reciente = reciente / PLAN_MESES_RECIENTES
+    por_mes = total / PLAN_MESES_CONSUMO
+    factor = np.divide(por_mes_reciente, por_mes, out=np.ones(len(maquinas)), where=por_mes > 0)
+    orden = np.argsort(maquinas)
+    return maquinas[orden], np.clip(factor, FACTOR_MIN, FACTOR_MAX)[orden]
+
+
+class Planificador:
+    """Historial en memoria y plan calculado, al dia con la base"""
+
+    def __init__(self):
+        self._ids = None
+        self._maquinas = _VACIO
+        self._dias = _VACIO
+        self._since = None
+        self._vista = None
+        self._revisar_hasta = 0.0
+        self._uso = (_VACIO, None)
+        self._uso_vence = 0.0
+        self._plan = None
+        self._lock = asyncio.Lock()
+        # Altas / cambios / bajas de este proceso, anotadas desde el threadpool
+        self._pendientes = []
+        self._lock_pendientes = threading.Lock()
+
+    # ---------- avisos de los handlers de escritura ----------
+
+    def anotar(self, id_mantenimiento, id_maquina, fecha):
+        with self._lock_pendientes:
+            self._pendientes.append((id_mantenimiento, id_maquina, fecha))
+
+    def quitar(self, id_mantenimiento):
+        self.anotar(id_mantenimiento, None, None)
+
+    # ---------- carga ----------
+
+    async def _cargar(self):
+        # El cursor arranca antes de la carga: lo que cambie durante se vuelve a traer (aplicarlo es idempotente)
+        desde = (await fetch_one(SQL_DESDE, (DELTA_MARGEN_SEGUNDOS,)))["desde"]
+        filas = await fetch_all(SQL_HISTORIAL)
+        self._ids, self._maquinas, self._dias = _arreglos(filas, "id_mantenimiento", "id_maquina", "dia")
+        self._since = desde.isoformat()
+        with self._lock_pendientes:
+            self._pendientes.clear()
+
+    async def _cargar_uso(self):
+        filas = await fetch_all(SQL_CONSUMOS, (_meses_atras(PLAN_MESES_RECIENTES), _meses_atras(PLAN_MESES_CONSUMO)))
+        maquinas = np.fromiter((f["id_maquina"] for f in filas), dtype=np.int64, count=len(filas))
+        reciente = np.fromiter((f["reciente"] or 0 for f in filas), dtype=np.float64, count=len(filas))
+        total = np.fromiter((f["total"] or 0 for f in filas), dtype=np.float64, count=len(filas))
+        self._uso = factor_de_uso(maquinas, reciente, total)
+        self._uso_vence = time.monotonic() + PLAN_CONSUMOS_SEGUNDOS
+
+    def _aplicar(self, filas):
+        """Reemplaza por id las filas (id, maquina, dia); maquina o dia None es una baja"""
+        ids = np.array([f[0] for f in filas], dtype=np.int64)
+        quedan = ~np.isin(self._ids, ids)
+        # Si un id viene varias veces vale la ultima
+        ultimas = {f[0]: f for f in filas}.values()
+        altas = [f for f in ultimas if f[1] is not None and f[2] is not None]
+        self._ids = np.concatenate([self._ids[quedan], np.array([f[0] for f in altas], dtype=np.int64)])
+        self._maquinas = np.concatenate([self._maquinas[quedan], np.array([f[1] for f in altas], dtype=np.int64)])
+        self._dias = np.concatenate([self._dias[quedan], np.array([f[2] for f in altas], dtype=np.int64)])
+
+    def _tomar_pendientes(self):
+        with self._lock_pendientes:
+            pendientes, self._pendientes = self._pendientes, []
+        return [
+            (id_, id_maquina, None if fecha is None else int(np.datetime64(fecha, "D").astype(np.int64)))
+            for id_, id_maquina, fecha in pendientes
+        ]
+
+    async def _traer_cambios(self):
+        """Cambios de la base despues del cursor (incluye los de otros workers)"""
+        filas = []
+        for _ in range(PAGINAS_DELTA_MAX):
+            delta = await cambios_desde("mantenimientos", COLUMNAS, "id_mantenimiento", self._since, LIMITE_MAX)
+            filas += [(f["id_mantenimiento"], f["id_maquina"], f["dia"]) for f in delta["cambios"]]
+            filas += [(id_, None, None) for id_ in delta["eliminados"]]
+            self._since = delta["cursor"]
+            if not delta["hay_mas"]:
+                return filas
+        return None
+
+    async def _version(self):
+        epoca, [(version, ts)] = await versiones.leer(["mantenimientos"])
+        return (epoca, version), ts
+
+    # ---------- plan ----------
+
+    async def _al_dia(self, vista, ultima):
+        """Trae el historial nuevo; True si cambio algo"""
+        if self._ids is None:
+            await self._cargar()
+            return True
+        # Primero lo de este proceso: el delta trae el estado de la base y se aplica encima
+        pendientes = self._tomar_pendientes()
+        if pendientes:
+            self._aplicar(pendientes)
+        # Lo escrito hace menos que el margen del delta todavia no llega: se vuelve a mirar hasta que pase
+        if vista == self._vista and time.time() >= self._revisar_hasta:
+            return bool(pendientes)
+        cambios = await self._traer_cambios()
+        if cambios is None:
+            await self._cargar()
+        elif cambios:
+            self._aplicar(cambios)
+        return bool(pendientes or cambios is None or cambios)
+
+    async def plan(self):
+        async with self._lock:
+            vista, ultima = await self._version()
+            if cambio_reciente(ultima):
+                leer_del_primario()
+            recalcular = await self._al_dia(vista, ultima)
+            self._vista = vista
+            self._revisar_hasta = ultima + DELTA_MARGEN_SEGUNDOS
+
+            if time.monotonic() >= self._uso_vence:
+                await self._cargar_uso()
+                recalcular = True
+            if recalcular or self._plan is None:
+                self._plan = estimar(self._maquinas, self._dias, *self._uso)
+            return self._plan
+
+
+planificador = Planificador()
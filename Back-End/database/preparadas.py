@@ -0,0 +1,79 @@
+"""Sentencias preparadas del lado del servidor, cacheadas por conexion del pool sync.
+
+La primera vez que una conexion ejecuta un SQL se prepara (COM_STMT_PREPARE) con un
+cursor(prepared=True) que queda guardado; las siguientes solo mandan los parametros
+(COM_STMT_EXECUTE), sin que MySQL vuelva a parsear ni planificar. Las conexiones del pool
+son de un thread a la vez, asi que el cache de cada una no necesita lock.
+
+Cada conexion guarda hasta DB_PREPARADAS_MAX sentencias (las menos usadas se cierran);
+cuidado con max_prepared_stmt_count del servidor: DB_POOL_SIZE x DB_PREPARADAS_MAX.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+PREPARADAS_MAX = int(os.getenv("DB_PREPARADAS_MAX", "64"))
+
+_por_conexion = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _cache(conn):
+    cache = _por_conexion.get(conn)
+    if cache is None:
+        with _lock:
+            cache = _por_conexion.setdefault(conn, OrderedDict())
+    return cache
+
+
+def cursor_preparado(conn, sql):
+    """(sql, cursor) con `sql` ya preparado en esta conexion.
+
+    Hay que ejecutar con el `sql` devuelto: mysql.connector compara el texto por identidad
+    para decidir si vuelve a preparar.
+    """
+    cache = _cache(conn)
+    entrada = cache.get(sql)
+    if entrada is not None:
+        cache.move_to_end(sql)
+        return entrada
+    entrada = cache[sql] = (sql, conn.cursor(prepared=True))
+    if len(cache) > PREPARADAS_MAX:
+        _, (_, viejo) = cache.popitem(last=False)
+        # Cierra tambien la sentencia en el servidor
+        viejo.close()
+    return entrada
+
+
+def ejecutar(conn, sql, params=()):
+    """Ejecuta con la sentencia preparada de esta conexion; devuelve el cursor (rowcount, lastrowid)"""
+    sql, cursor = cursor_preparado(conn, sql)
+    try:
+        cursor.execute(sql, tuple(params))
+    except Exception:
+        # Un cursor que fallo a mitad de un resultado no se reusa
+        _cache(conn).pop(sql, None)
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        raise
+    return cursor
+
+
+def filas(conn, sql, params=()):
+    """Todas las filas como dicts (los cursores preparados devuelven tuplas)"""
+    cursor = ejecutar(conn, sql, params)
+    nombres = cursor.column_names
+    return [dict(zip(nombres, fila)) for fila in cursor.fetchall()]
+
+
+def fila(conn, sql, params=()):
+    resultado = filas(conn, sql, params)
+    return resultado[0] if resultado else None
+
+
+def stats():
+    """Sentencias preparadas por conexion (para /api/db/pool)"""
+    return [len(cache) for cache in list(_por_conexion.values())]
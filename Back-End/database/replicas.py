@@ -0,0 +1,97 @@
+"""A que servidor va cada lectura: al primario o a una replica (DB_REPLICAS).
+
+Las lecturas de los GET van a las replicas. Todo lo demas va al primario: las escrituras
+(usan get_db) y las lecturas de POST/PUT/DELETE, login y scripts. Para no leer algo mas
+viejo que lo que se acaba de escribir:
+- la sesion que escribio (el usuario del token, o la IP si no manda token) lee del
+  primario durante DB_LEER_PRIMARIO_SEGUNDOS;
+- las rutas con `condicional` leen del primario si alguna de sus tablas cambio en esa
+  ventana, asi el cache y el ETag nunca se arman con datos de una replica atrasada.
+Sin replicas configuradas todo va al primario, como antes.
+"""
+import os
+import time
+from contextvars import ContextVar
+from database.connection import REPLICAS
+
+LEER_PRIMARIO_SEGUNDOS = float(os.getenv("DB_LEER_PRIMARIO_SEGUNDOS", "5"))
+# Pasado este tamaño se limpian las sesiones cuya ventana ya vencio
+SESIONES_MAX = 10000
+
+
+class Destino:
+    """Se comparte por referencia, asi lo que decide una dependencia vale para todo el pedido"""
+    __slots__ = ("replica",)
+
+    def __init__(self, replica):
+        self.replica = replica
+
+
+_destino = ContextVar("destino_lectura", default=None)
+# sesion -> time.monotonic() de su ultima escritura
+_escrituras = {}
+
+
+def leer_de_replica():
+    destino = _destino.get()
+    return destino is not None and destino.replica
+
+
+def leer_del_primario():
+    """El resto del pedido lee del primario"""
+    destino = _destino.get()
+    if destino is not None:
+        destino.replica = False
+
+
+def cambio_reciente(ultima):
+    """`ultima` (epoch) cae dentro de la ventana en la que una replica puede estar atrasada"""
+    return time.time() - ultima < LEER_PRIMARIO_SEGUNDOS
+
+
+def _sesion(scope):
+    usuario = scope.get("state", {}).get("usuario")
+    if usuario:
+        return f"u:{usuario['sub']}"
+    cliente = scope.get("client")
+    return f"ip:{cliente[0]}" if cliente else None
+
+
+def _anotar_escritura(sesion):
+    ahora = time.monotonic()
+    if len(_escrituras) >= SESIONES_MAX:
+        for clave, cuando in list(_escrituras.items()):
+            if ahora - cuando >= LEER_PRIMARIO_SEGUNDOS:
+                del _escrituras[clave]
+    _escrituras[sesion] = ahora
+
+
+class EnrutamientoMiddleware:
+    """Marca los GET para leer de una replica y anota las escrituras de cada sesion (ASGI puro)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REPLICAS:
+            await self.app(scope, receive, send)
+            return
+
+        sesion = _sesion(scope)
+        if scope["method"] in ("GET", "HEAD"):
+            escribio = _escrituras.get(sesion)
+            reciente = escribio is not None and time.monotonic() - escribio < LEER_PRIMARIO_SEGUNDOS
+            token = _destino.set(Destino(replica=not reciente))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _destino.reset(token)
+            return
+
+        async def enviar(mensaje):
+            # Al salir la respuesta el commit ya se hizo
+            if mensaje["type"] == "http.response.start" and mensaje["status"] < 400 and sesion:
+                _anotar_escritura(sesion)
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
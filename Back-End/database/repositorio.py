@@ -0,0 +1,234 @@
+"""Acceso a datos comun a los routers: cada tabla se describe una vez y de ahi sale todo el SQL.
+
+Un Repositorio conoce la tabla, su clave, las columnas editables y el modelo de respuesta,
+y resuelve las operaciones de siempre con los mismos mensajes de error:
+- listar (paginado, con cache si la tabla es de referencia) y ?since= (delta)
+- buscar por texto (FULLTEXT, ver database/busqueda.py) en las tablas con `texto`
+- obtener por id (404 si no existe)
+- insertar / actualizar / eliminar con commit y registrar_cambio
+Las escrituras van por sentencias preparadas cacheadas por conexion (database/preparadas.py);
+las lecturas por fetch_all / fetch_one (aiomysql, o preparadas tambien con DB_MODO=sync).
+Lo que es propio de una ruta (joins, resumen mensual, login) sigue en su router pero usa
+las mismas piezas.
+"""
+from fastapi import HTTPException
+from database.async_connection import fetch_all, fetch_one
+from database.busqueda import expresion
+from database.cache import cache
+from database.cambios import registrar_cambio, TABLAS_CACHEADAS
+from database.connection import paso_ids
+from database.delta import responder_delta, registrar_baja
+from database.paginacion import Consulta
+from database.preparadas import ejecutar
+from models.cliente import Cliente
+from models.consumo import Consumo
+from models.insumo import Insumo
+from models.mantenimiento import Mantenimiento
+from models.maquina import Maquina
+from models.proveedor import Proveedor
+from models.tecnico import Tecnico
+from models.usuario import Usuario
+
+
+def error_interno(accion, e):
+    """Loguea y devuelve el 500 generico (el detalle del error queda en el log, no en la respuesta)"""
+    print(f"❌ Error al {accion}:", e)
+    return HTTPException(status_code=500, detail=f"Error al {accion}")
+
+
+def insertar_filas(cursor, sql, filas):
+    """Inserta `filas` con el INSERT de una fila `sql` y devuelve sus ids en el mismo orden.
+
+    Si los ids de un INSERT de varias filas son predecibles (innodb_autoinc_lock_mode 0 o 1)
+    executemany arma un unico INSERT y los ids salen de lastrowid y auto_increment_increment;
+    si no, va fila por fila.
+    """
+    paso = paso_ids(cursor)
+    if paso is not None:
+        cursor.executemany(sql, filas)
+        return [cursor.lastrowid + k * paso for k in range(len(filas))]
+    ids = []
+    for valores in filas:
+        cursor.execute(sql, valores)
+        ids.append(cursor.lastrowid)
+    return ids
+
+
+class Repositorio:
+    """Descripcion de una tabla.
+
+    `campos` son las columnas que se escriben (en el orden del modelo Base), `alias_clave`
+    el nombre de la clave en las respuestas si no es el de la columna (clientes usa "id"),
+    `delta` si la tabla tiene updated_at y tombstones para ?since= y `texto` las columnas
+    de su indice FULLTEXT.
+    """
+
+    def __init__(
+        self, tabla, clave, campos, modelo, singular, plural, no_encontrado, alias_clave=None, delta=False, texto=(),
+    ):
+        self.tabla = tabla
+        self.clave = clave
+        self.campos = tuple(campos)
+        self.modelo = modelo
+        self.singular = singular
+        self.plural = plural
+        self.no_encontrado = no_encontrado
+        self.clave_fila = alias_clave or clave
+        self.delta = delta
+        self.cacheada = tabla in TABLAS_CACHEADAS
+
+        clave_select = f"{clave} AS {alias_clave}" if alias_clave else clave
+        self.columnas = ", ".join((clave_select,) + self.campos)
+        self.select = f"SELECT {self.columnas} FROM {tabla}"
+        self.sql_por_id = f"{self.select} WHERE {clave} = %s"
+        self.sql_insertar = (
+            f"INSERT INTO {tabla} ({', '.join(self.campos)}) VALUES ({', '.join(['%s'] * len(self.campos))})"
+        )
+        self.sql_actualizar = f"UPDATE {tabla} SET {', '.join(c + ' = %s' for c in self.campos)} WHERE {clave} = %s"
+        self.sql_eliminar = f"DELETE FROM {tabla} WHERE {clave} = %s"
+        if texto:
+            # Ordenar solo por el mismo MATCH del WHERE permite que MySQL corte en el LIMIT sin filesort
+            match = f"MATCH({', '.join(texto)}) AGAINST (%s IN BOOLEAN MODE)"
+            self.sql_buscar = f"{self.select} WHERE {match} ORDER BY {match} DESC LIMIT %s"
+
+    # ---------- lecturas ----------
+
+    def consulta(self, pag, col_fecha=None, alias=""):
+        """Consulta paginada sobre la tabla (por id, o por (fecha, id) con `col_fecha`)"""
+        return Consulta(
+            pag, f"{alias}{self.clave}", col_fecha=f"{alias}{col_fecha}" if col_fecha else None, clave_id=self.clave_fila
+        )
+
+    async def listar(self, consulta, clave_cache=None, base=None, modelo=None):
+        """Corre la consulta (ya con sus filtros) y arma la respuesta con el cursor siguiente.
+
+        En las tablas de referencia, con `clave_cache` se sirve desde el cache.
+        `base` y `modelo` son para las variantes con joins (ej. /expandido).
+        """
+        sql, params = consulta.armar(base or self.select)
+        try:
+            if self.cacheada and clave_cache is not None:
+                filas = await cache.obtener(self.tabla, clave_cache, lambda: fetch_all(sql, params))
+            else:
+                filas = await fetch_all(sql, params)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise error_interno(f"obtener {self.plural}", e)
+        return consulta.responder(filas, modelo or self.modelo)
+
+    async def cambios(self, since, pag, **filtros):
+        """Respuesta de ?since= con las mismas columnas que la lista"""
+        return await responder_delta(self.tabla, self.columnas, self.clave, since, pag, clave_id=self.clave_fila, **filtros)
+
+    async def buscar(self, busqueda):
+        """Filas que contienen todas las palabras (como prefijo), las mas relevantes primero"""
+        termino = expresion(busqueda.q)
+        if not termino:
+            return []
+        params = (termino, termino, busqueda.limit)
+        try:
+            if self.cacheada:
+                return await cache.obtener(
+                    self.tabla, ("buscar", termino, busqueda.limit), lambda: fetch_all(self.sql_buscar, params)
+                )
+            return await fetch_all(self.sql_buscar, params)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise error_interno(f"buscar {self.plural}", e)
+
+    async def obtener(self, id):
+        try:
+            if self.cacheada:
+                fila = await cache.obtener(self.tabla, None, lambda: fetch_one(self.sql_por_id, (id,)), id=id)
+            else:
+                fila = await fetch_one(self.sql_por_id, (id,))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise error_interno(f"obtener {self.singular}", e)
+        if fila is None:
+            raise HTTPException(status_code=404, detail=self.no_encontrado)
+        return fila
+
+    # ---------- escrituras (conexion del pool sync) ----------
+
+    def valores(self, datos):
+        return [getattr(datos, campo) for campo in self.campos]
+
+    def escribir(self, conn, accion, operacion):
+        """Corre `operacion()` (que hace el commit); ante un error hace rollback y responde 500 o el HTTPException"""
+        try:
+            return operacion()
+        except HTTPException:
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            raise error_interno(f"{accion} {self.singular}", e)
+
+    def insertar(self, conn, datos):
+        def operacion():
+            nuevo_id = ejecutar(conn, self.sql_insertar, self.valores(datos)).lastrowid
+            conn.commit()
+            registrar_cambio(self.tabla, "insert", nuevo_id)
+            return self.modelo(**{self.clave_fila: nuevo_id}, **datos.model_dump())
+        return self.escribir(conn, "crear", operacion)
+
+    def actualizar(self, conn, id, datos):
+        def operacion():
+            if ejecutar(conn, self.sql_actualizar, self.valores(datos) + [id]).rowcount == 0:
+                raise HTTPException(status_code=404, detail=self.no_encontrado)
+            conn.commit()
+            registrar_cambio(self.tabla, "update", id)
+            return self.modelo(**{self.clave_fila: id}, **datos.model_dump())
+        return self.escribir(conn, "actualizar", operacion)
+
+    def eliminar(self, conn, id, mensaje):
+        def operacion():
+            if ejecutar(conn, self.sql_eliminar, (id,)).rowcount == 0:
+                raise HTTPException(status_code=404, detail=self.no_encontrado)
+            if self.delta:
+                registrar_baja(conn, self.tabla, id)
+            conn.commit()
+            registrar_cambio(self.tabla, "delete", id)
+            return {"message": mensaje}
+        return self.escribir(conn, "eliminar", operacion)
+
+
+CLIENTES = Repositorio(
+    "clientes", "id_cliente", ("nombre", "direccion", "telefono", "correo"), Cliente,
+    "cliente", "clientes", "Cliente no encontrado", alias_clave="id", delta=True,
+    texto=("nombre", "direccion", "correo"),
+)
+PROVEEDORES = Repositorio(
+    "proveedores", "id_proveedor", ("nombre",), Proveedor,
+    "proveedor", "proveedores", "Proveedor no encontrado", texto=("nombre",),
+)
+INSUMOS = Repositorio(
+    "insumos", "id_insumo", ("tipo", "precio", "id_proveedor"), Insumo,
+    "insumo", "insumos", "Insumo no encontrado", delta=True, texto=("tipo",),
+)
+TECNICOS = Repositorio(
+    "tecnicos", "id_tecnico", ("nombre", "tipo_visita", "id_cliente"), Tecnico,
+    "técnico", "técnicos", "Técnico no encontrado", delta=True,
+)
+MAQUINAS = Repositorio(
+    "maquinas", "id_maquina", ("modelo", "id_cliente", "ubicacion_cliente", "costo_alquiler_mensual"), Maquina,
+    "maquina", "maquinas", "Maquina no encontrada", delta=True,
+    texto=("modelo", "ubicacion_cliente"),
+)
+MANTENIMIENTOS = Repositorio(
+    "mantenimientos", "id_mantenimiento", ("id_maquina", "id_tecnico", "tipo", "fecha", "observaciones"), Mantenimiento,
+    "mantenimiento", "mantenimientos", "Mantenimiento no encontrado", delta=True,
+)
+CONSUMOS = Repositorio(
+    "consumoInsumos", "id_consumo", ("fecha", "id_maquina", "cobro_mensual", "id_insumo"), Consumo,
+    "consumo", "consumos", "Consumo no encontrado", delta=True,
+)
+# La contraseña no es un campo editable ni sale en las respuestas (ver routers/usuarios.py)
+USUARIOS = Repositorio(
+    "usuarios", "id_usuario", ("nombre", "cargo"), Usuario,
+    "usuario", "usuarios", "Usuario no encontrado",
+)
@@ -0,0 +1,173 @@
+"""Contraseñas con bcrypt y tokens de sesion firmados que se validan sin ir a la base.
+
+bcrypt es lento a proposito (2^AUTH_BCRYPT_COSTO rondas) y libera el GIL, asi que corre en
+un pool propio de AUTH_HILOS_HASH hilos: un pico de logins hace cola ahi y no frena el event
+loop ni ocupa el threadpool de las rutas sync. Si ya hay AUTH_COLA_MAX hasheos esperando se
+responde 503 en vez de acumular esperas.
+
+El token es `payload.firma` en base64url: el payload es JSON {sub, nombre, cargo, exp} y la
+firma HMAC-SHA256 con AUTH_SECRETO. AutenticacionMiddleware lo valida en memoria en cada
+pedido; con AUTH_REQUERIDO=1 rechaza con 401 lo que vaya a /api sin token valido.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+import bcrypt
+from fastapi import HTTPException
+
+BCRYPT_COSTO = int(os.getenv("AUTH_BCRYPT_COSTO", "12"))
+HILOS_HASH = int(os.getenv("AUTH_HILOS_HASH", str(min(4, os.cpu_count() or 1))))
+COLA_MAX = int(os.getenv("AUTH_COLA_MAX", "64"))
+TOKEN_MINUTOS = int(os.getenv("AUTH_TOKEN_MINUTOS", "480"))
+AUTH_REQUERIDO = os.getenv("AUTH_REQUERIDO", "0") == "1"
+
+SECRETO = os.getenv("AUTH_SECRETO", "").encode()
+if not SECRETO:
+    SECRETO = secrets.token_bytes(32)
+    print("⚠️ AUTH_SECRETO no esta configurado: los tokens no sirven entre workers ni despues de reiniciar")
+
+# Rutas de /api que se pueden usar sin token (para conseguir uno)
+RUTAS_PUBLICAS = {"/api/usuarios/login", "/api/usuarios/register"}
+
+_pool = ThreadPoolExecutor(max_workers=HILOS_HASH, thread_name_prefix="bcrypt")
+_pendientes = 0
+
+
+# ---------- contraseñas ----------
+
+def _bytes(contrasenia):
+    # bcrypt solo usa los primeros 72 bytes (las versiones nuevas fallan si vienen mas)
+    return contrasenia.encode()[:72]
+
+
+def es_hash(guardada):
+    return bool(guardada) and guardada.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hay_que_rehashear(guardada):
+    """Contraseñas viejas en texto plano o hasheadas con otro costo"""
+    return not es_hash(guardada) or int(guardada.split("$")[2]) != BCRYPT_COSTO
+
+
+async def _en_pool(funcion, *args):
+    global _pendientes
+    if _pendientes >= COLA_MAX:
+        raise HTTPException(status_code=503, detail="Demasiados inicios de sesion a la vez, intente de nuevo")
+    _pendientes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, funcion, *args)
+    finally:
+        _pendientes -= 1
+
+
+def _hashear(contrasenia):
+    return bcrypt.hashpw(_bytes(contrasenia), bcrypt.gensalt(BCRYPT_COSTO)).decode()
+
+
+async def hashear(contrasenia):
+    return await _en_pool(_hashear, contrasenia)
+
+
+async def verificar(contrasenia, guardada):
+    if not es_hash(guardada):
+        # Usuarios de antes de bcrypt: se compara el texto plano y el login lo rehashea
+        return hmac.compare_digest(contrasenia.encode(), (guardada or "").encode())
+    return await _en_pool(bcrypt.checkpw, _bytes(contrasenia), guardada.encode())
+
+
+# ---------- tokens ----------
+
+def _b64(datos):
+    return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+
+def _desde_b64(texto):
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _firma(payload):
+    return _b64(hmac.new(SECRETO, payload.encode(), hashlib.sha256).digest())
+
+
+def emitir_token(usuario):
+    """(token, vencimiento) para un usuario con id_usuario, nombre y cargo"""
+    exp = int(time.time()) + TOKEN_MINUTOS * 60
+    payload = _b64(json.dumps(
+        {"sub": usuario["id_usuario"], "nombre": usuario["nombre"], "cargo": usuario["cargo"], "exp": exp},
+        separators=(",", ":"),
+    ).encode())
+    return f"{payload}.{_firma(payload)}", datetime.fromtimestamp(exp, timezone.utc)
+
+
+def leer_token(token):
+    """Los datos del token si la firma es valida y no vencio; si no, None"""
+    try:
+        payload, firma = token.split(".")
+        if not hmac.compare_digest(firma, _firma(payload)):
+            return None
+        datos = json.loads(_desde_b64(payload))
+    except (ValueError, TypeError):
+        return None
+    if datos.get("exp", 0) < time.time():
+        return None
+    return datos
+
+
+def _token_de(scope):
+    for nombre, valor in scope.get("headers", ()):
+        if nombre == b"authorization":
+            tipo, _, token = valor.decode("latin-1").partition(" ")
+            return token.strip() if tipo.lower() == "bearer" else None
+    # EventSource y WebSocket del navegador no pueden mandar headers: ?token=
+    if b"token=" in scope.get("query_string", b""):
+        valores = parse_qs(scope["query_string"].decode("latin-1")).get("token")
+        return valores[0] if valores else None
+    return None
+
+
+class AutenticacionMiddleware:
+    """Valida el token de cada pedido (sin consultar la base) y lo deja en request.state.usuario"""
+
+    def __init__(self, app, requerido=None):
+        self.app = app
+        self.requerido = AUTH_REQUERIDO if requerido is None else requerido
+
+    def _protegida(self, scope):
+        ruta = scope["path"]
+        return ruta.startswith("/api/") and ruta not in RUTAS_PUBLICAS and scope.get("method") != "OPTIONS"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        token = _token_de(scope)
+        usuario = leer_token(token) if token else None
+        scope.setdefault("state", {})["usuario"] = usuario
+        if usuario is not None or not self.requerido or not self._protegida(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            await receive()
+            await send({"type": "websocket.close", "code": 4401})
+            return
+        cuerpo = json.dumps({"detail": "Token invalido o vencido" if token else "No autenticado"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 401,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(cuerpo)).encode()),
+                (b"www-authenticate", b"Bearer"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
@@ -0,0 +1,47 @@
+"""Camino rapido para responder listas de filas de la base.
+
+Por defecto FastAPI valida cada fila contra el response_model, arma un objeto Pydantic por
+fila y lo vuelve a convertir a JSON. Las filas que salen de nuestras propias consultas ya
+tienen la forma del modelo, asi que se serializan de una con orjson. Con
+RESPUESTAS_VALIDAR=1 se valida la lista entera en una sola pasada (pydantic-core) antes.
+El response_model sigue declarado en cada ruta, asi que el OpenAPI no cambia.
+"""
+import os
+from decimal import Decimal
+from functools import lru_cache
+from typing import List
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+RESPUESTAS_VALIDAR = os.getenv("RESPUESTAS_VALIDAR", "0") == "1"
+
+
+def _default(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode()
+    raise TypeError(f"No se puede serializar {type(valor)}")
+
+
+@lru_cache(maxsize=None)
+def _adaptador(modelo):
+    return TypeAdapter(List[modelo])
+
+
+def a_json(filas, modelo=None):
+    """bytes JSON de una lista de filas (dicts), validando en bloque solo si esta activado"""
+    if RESPUESTAS_VALIDAR and modelo is not None:
+        adaptador = _adaptador(modelo)
+        return adaptador.dump_json(adaptador.validate_python(filas))
+    return orjson.dumps(filas, default=_default)
+
+
+def respuesta_json(filas, modelo=None, headers=None, status_code=200):
+    return Response(
+        content=a_json(filas, modelo),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,176 @@
+"""Version de cada tabla para los GET condicionales (ETag / Last-Modified).
+
+Los handlers de escritura suben la version de la tabla despues del commit (ver
+database/cambios.py). El ETag de una ruta se arma con las versiones de las tablas que lee,
+asi que se puede contestar 304 sin ir a MySQL ni serializar nada. Igual que el cache, con
+CACHE_REDIS_URL las versiones viven en Redis y todos los workers ven las de los demas.
+Sin Redis son por proceso, asi que con mas de un worker no se arranca: el worker que no
+recibio la escritura seguiria contestando 304 con el ETag viejo.
+
+Solo se enteran de los cambios hechos por la API: si se toca la base a mano hay que
+reiniciar (con el backend local) o borrar las claves marloy:version:* de Redis.
+"""
+import secrets
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import HTTPException, Request
+from database.cache import CACHE_REDIS_URL, cantidad_workers
+from database.replicas import cambio_reciente, leer_del_primario
+
+HEADER_ETAG = "ETag"
+HEADER_LAST_MODIFIED = "Last-Modified"
+
+# El front tiene que volver a preguntar siempre (con If-None-Match), nunca usar la copia sin validar
+CACHE_CONTROL = "no-cache"
+
+
+class _VersionesLocales:
+    def __init__(self):
+        # La epoca es de este proceso: las versiones vuelven a 0 en cada arranque y un ETag de otro
+        # proceso (o de antes de reiniciar) nunca coincide
+        self._epoca = secrets.token_hex(4)
+        self._inicio = time.time()
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    async def leer(self, tablas):
+        with self._lock:
+            return self._epoca, [self._valores.get(t, (0, self._inicio)) for t in tablas]
+
+    def subir(self, tabla):
+        with self._lock:
+            version, _ = self._valores.get(tabla, (0, self._inicio))
+            self._valores[tabla] = (version + 1, time.time())
+
+
+class _VersionesRedis:
+    def __init__(self, url):
+        import redis
+        import redis.asyncio
+        self._sync = redis.Redis.from_url(url)
+        self._async = redis.asyncio.Redis.from_url(url)
+        self._epoca = None
+
+    @staticmethod
+    def _nombre(tabla):
+        return f"marloy:version:{tabla}"
+
+    async def _leer_epoca(self):
+        # La comparten todos los workers; si Redis se vacia se genera otra y los ETags viejos dejan de valer
+        await self._async.set("marloy:version:epoca", secrets.token_hex(4), nx=True)
+        epoca = await self._async.get("marloy:version:epoca")
+        return epoca.decode()
+
+    async def leer(self, tablas):
+        if self._epoca is None:
+            self._epoca = await self._leer_epoca()
+        pipe = self._async.pipeline()
+        for t in tablas:
+            pipe.hmget(self._nombre(t), "v", "ts")
+        valores = await pipe.execute()
+        return self._epoca, [(int(v or 0), float(ts or 0)) for v, ts in valores]
+
+    def subir(self, tabla):
+        pipe = self._sync.pipeline()
+        pipe.hincrby(self._nombre(tabla), "v", 1)
+        pipe.hset(self._nombre(tabla), "ts", time.time())
+        pipe.execute()
+
+
+def _crear_versiones():
+    if CACHE_REDIS_URL:
+        try:
+            return _VersionesRedis(CACHE_REDIS_URL)
+        except ImportError:
+            print("⚠️ CACHE_REDIS_URL configurado pero falta el paquete redis, se usan versiones locales")
+    workers = cantidad_workers()
+    if workers > 1:
+        raise RuntimeError(
+            f"Hay {workers} workers y las versiones de las tablas (ETag, cache) quedarian por proceso: "
+            "configurar CACHE_REDIS_URL (y pip install redis) o correr un solo worker"
+        )
+    return _VersionesLocales()
+
+
+versiones = _crear_versiones()
+
+
+def compartidas():
+    """Si las versiones viven en Redis (los subir() de otro proceso, ej. un script, llegan a la API)"""
+    return isinstance(versiones, _VersionesRedis)
+
+
+def _coincide(if_none_match, etag):
+    """Comparacion debil de If-None-Match (ignora W/ y acepta listas y *)"""
+    if if_none_match.strip() == "*":
+        return True
+    propio = etag.removeprefix("W/")
+    return any(e.strip().removeprefix("W/") == propio for e in if_none_match.split(","))
+
+
+def _no_modificado_desde(if_modified_since, ultima):
+    try:
+        return int(ultima) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def condicional(*tablas):
+    """Dependencia para GETs que leen `tablas`: contesta 304 si el cliente ya tiene la version actual.
+
+    Si no, deja los validadores en request.state y ValidadoresMiddleware los pone en la respuesta
+    (asi funciona tambien con las rutas que devuelven un Response armado a mano).
+    """
+    async def verificar(request: Request):
+        if "since" in request.query_params:
+            # Los deltas dependen del reloj (ver database/delta.py), no solo de la version
+            return
+        epoca, valores = await versiones.leer(tablas)
+        etag = 'W/"%s-%s"' % (epoca, ".".join(str(v) for v, _ in valores))
+        ultima = max(ts for _, ts in valores)
+        if cambio_reciente(ultima):
+            # Una replica atrasada dejaria en el cache (y con el ETag nuevo) datos de antes del cambio
+            leer_del_primario()
+        headers = {
+            HEADER_ETAG: etag,
+            HEADER_LAST_MODIFIED: formatdate(ultima, usegmt=True),
+            "Cache-Control": CACHE_CONTROL,
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            no_modificado = _coincide(if_none_match, etag)
+        else:
+            if_modified_since = request.headers.get("if-modified-since")
+            no_modificado = if_modified_since is not None and _no_modificado_desde(if_modified_since, ultima)
+        if no_modificado:
+            raise HTTPException(status_code=304, headers=headers)
+        request.state.validadores = headers
+
+    return verificar
+
+
+class ValidadoresMiddleware:
+    """Agrega a las respuestas 200 los headers que dejo `condicional` (middleware ASGI puro)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start" and mensaje["status"] == 200:
+                validadores = scope.get("state", {}).get("validadores")
+                if validadores:
+                    existentes = {k.lower() for k, _ in mensaje.get("headers", [])}
+                    extra = [
+                        (k.lower().encode("latin-1"), v.encode("latin-1"))
+                        for k, v in validadores.items() if k.lower().encode("latin-1") not in existentes
+                    ]
+                    mensaje["headers"] = list(mensaje.get("headers", [])) + extra
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
@@ -1,8 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routers import clientes, proveedores, insumos, maquinas,tecnicos, usuarios, mantenimientos, consumos
+from starlette.concurrency import run_in_threadpool
+from database.connection import init_pool, close_pool, get_pool, verificar_autoinc
+from database.async_connection import init_async_pool, close_async_pool, async_stats, replicas_stats
+from database.paginacion import HEADER_CURSOR
+from database.cache import cache
+from database.versiones import ValidadoresMiddleware, HEADER_ETAG, HEADER_LAST_MODIFIED
+from database import metricas, preparadas
+from database.perfilado import PerfilMiddleware, HEADER_CONSULTAS, HEADER_TIEMPO
+from database.seguridad import AutenticacionMiddleware
+from database.replicas import EnrutamientoMiddleware
+from database.migraciones import verificar_migraciones
+from routers import clientes, proveedores, insumos, maquinas,tecnicos, usuarios, mantenimientos, consumos, facturacion, eventos, dashboard, asignaciones
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El pool se crea una sola vez al arrancar y se cierra al apagar
+    init_pool()
+    await init_async_pool()
+    # Sin las migraciones aplicadas la API no arranca (mejor que 500 en las rutas que las usan)
+    await run_in_threadpool(verificar_migraciones)
+    # Las cargas masivas necesitan saber si los ids de un INSERT de varias filas son consecutivos
+    await run_in_threadpool(verificar_autoinc)
+    yield
+    await close_async_pool()
+    close_pool()
+
+app = FastAPI(lifespan=lifespan)
+
+# ETag / Last-Modified de los GET (los calcula la dependencia condicional de cada ruta)
+app.add_middleware(ValidadoresMiddleware)
+
+# Lecturas de los GET a las replicas (DB_REPLICAS) salvo que la sesion acabe de escribir;
+# va adentro de la autenticacion porque la sesion sale del token
+app.add_middleware(EnrutamientoMiddleware)
+
+# Token de sesion (Authorization: Bearer); con AUTH_REQUERIDO=1 las rutas de /api lo exigen.
+# Va adentro de CORS para que los 401 tambien lleven los headers de CORS
+app.add_middleware(AutenticacionMiddleware)
 
 # 🔓 CORS sin restricciones para desarrollo
 app.add_middleware(
@@ -10,9 +47,16 @@ app.add_middleware(
     allow_origins=["*"],         # Aceptar cualquier origen
     allow_credentials=False,     # ⚠️ Tiene que ser False para que funcione con "*"
     allow_methods=["*"],         # Permitir todos los métodos (GET, POST, etc)
-    allow_headers=["*"]          # Permitir todos los headers (incluidos los de Axios)
+    allow_headers=["*"],         # Permitir todos los headers (incluidos los de Axios)
+    expose_headers=[HEADER_CURSOR, HEADER_ETAG, HEADER_LAST_MODIFIED, HEADER_CONSULTAS, HEADER_TIEMPO]  # Cursor, validadores de cache y perfil de la base
 )
 
+# Consultas por request: log de lentas, aviso de N+1 y headers X-DB-* con DB_DEBUG_HEADERS=1
+app.add_middleware(PerfilMiddleware)
+
+# Cantidad y duracion de requests por ruta (afuera de todo, asi incluye CORS y validadores)
+app.add_middleware(metricas.MetricasMiddleware)
+
 app.include_router(clientes.router, prefix="/api/clientes")
 app.include_router(proveedores.router, prefix="/api/proveedores")
 app.include_router(insumos.router, prefix="/api/insumos")
@@ -21,7 +65,31 @@ app.include_router(tecnicos.router, prefix="/api/tecnicos")
 app.include_router(usuarios.router, prefix="/api/usuarios")
 app.include_router(mantenimientos.router, prefix="/api/mantenimientos")
 app.include_router(consumos.router, prefix="/api/consumos")
+app.include_router(facturacion.router, prefix="/api/facturacion")
+app.include_router(eventos.router, prefix="/api/eventos")
+app.include_router(dashboard.router, prefix="/api/dashboard")
+app.include_router(asignaciones.router, prefix="/api/asignaciones")
 
 @app.get("/")
 def read_root():
-    return {"message": "Bienvenido a la API de Cafés Marloy. /api/ruta"}
\ No newline at end of file
+    return {"message": "Bienvenido a la API de Cafés Marloy. /api/ruta"}
+
+# Estado del pool de conexiones (en uso, inactivas, esperas, timeouts)
+@app.get("/api/db/pool")
+def estado_pool():
+    return {
+        "sync": get_pool().stats(),
+        "async": async_stats(),
+        "replicas": replicas_stats(),
+        "preparadas_por_conexion": preparadas.stats(),
+    }
+
+# Aciertos / fallos del cache de tablas de referencia
+@app.get("/api/db/cache")
+def estado_cache():
+    return cache.stats()
+
+# Metricas para Prometheus (requests por ruta, consultas, espera de los pools)
+@app.get("/metrics", include_in_schema=False)
+def exportar_metricas():
+    return PlainTextResponse(metricas.exportar(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from datetime import date
+from typing import List, Optional
+
+# Un mantenimiento a cargar: que maquina, que tecnico y que dia
+class Asignacion(BaseModel):
+    id_maquina: int
+    id_tecnico: int
+    fecha: date
+    tipo: str
+
+# Asignacion de la propuesta, con los datos para mostrarla
+class AsignacionPropuesta(Asignacion):
+    id_cliente: int
+    tecnico: Optional[str] = None
+    vencimiento: date
+
+# Maquina que vence en el periodo y no se pudo asignar
+class SinAsignar(BaseModel):
+    id_maquina: int
+    id_cliente: Optional[int] = None
+    vencimiento: date
+    motivo: str
+
+# Trabajos de un tecnico en el periodo: los que ya tenia y los que agrega la propuesta
+class CargaTecnico(BaseModel):
+    id_tecnico: int
+    nombre: Optional[str] = None
+    previos: int
+    asignados: int
+
+# Reparto propuesto; se confirma mandando `asignaciones` a POST /api/asignaciones/confirmar
+class PropuestaAsignacion(BaseModel):
+    desde: date
+    hasta: date
+    tipo: str
+    asignaciones: List[AsignacionPropuesta]
+    sin_asignar: List[SinAsignar]
+    carga: List[CargaTecnico]
+    costo_greedy: float
+    costo: float
+    mejoras: int
+    segundos: float
+
+class ConfirmarAsignacion(BaseModel):
+    asignaciones: List[Asignacion] = Field(..., min_length=1)
+    observaciones: Optional[str] = Field("Asignado automaticamente", max_length=200)
+
+class AsignacionConfirmada(BaseModel):
+    insertados: int
+    ids: List[int]
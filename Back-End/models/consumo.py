@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class ConsumoBase(BaseModel):
     fecha: datetime
@@ -22,3 +22,21 @@ class Consumo(ConsumoBase):
 
     class Config:
         from_attributes = True
+
+# Resultado de la carga masiva: ids alineados con las filas enviadas (None si la fila fallo)
+class ConsumoBulkError(BaseModel):
+    indice: int
+    error: str
+
+class ConsumoBulkResultado(BaseModel):
+    insertados: int
+    ids: List[Optional[int]]
+    errores: List[ConsumoBulkError]
+
+# Consumo con los datos de la maquina, el cliente y el insumo ya resueltos (un solo JOIN)
+class ConsumoExpandido(Consumo):
+    modelo: Optional[str] = None
+    id_cliente: Optional[int] = None
+    cliente: Optional[str] = None
+    tipo_insumo: Optional[str] = None
+    precio_insumo: Optional[float] = None
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+# Un valor del mes con el del mes anterior y la variacion en % (None si no hay con que comparar)
+class Indicador(BaseModel):
+    actual: float
+    anterior: Optional[float] = None
+    variacion: Optional[float] = None
+
+class MantenimientosPorTipo(BaseModel):
+    tipo: str
+    cantidad: Indicador
+
+# Lo facturado a un cliente en el mes (alquiler + insumos, igual que /api/facturacion)
+class ClienteDestacado(BaseModel):
+    id_cliente: int
+    nombre: str
+    facturado: Indicador
+
+# Todos los indicadores del tablero en una respuesta. maquinas_activas cuenta las maquinas con
+# consumos o mantenimientos en el mes; los ingresos son en pesos, como en /api/facturacion
+class Dashboard(BaseModel):
+    mes: str
+    mes_anterior: str
+    generado: datetime
+    maquinas_activas: Indicador
+    ingreso_alquiler: Indicador
+    ingreso_consumos: Indicador
+    mantenimientos: Indicador
+    mantenimientos_por_tipo: List[MantenimientosPorTipo]
+    top_clientes: List[ClienteDestacado]
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+# Respuesta de una lista pedida con ?since=: lo que cambio despues del cursor
+class Delta(BaseModel, Generic[T]):
+    cambios: List[T]        # filas nuevas o modificadas (version actual)
+    eliminados: List[int]   # ids borrados (tombstones)
+    cursor: str             # pasarlo como since en el proximo pedido
+    hay_mas: bool           # si es True hay que volver a pedir enseguida con el cursor nuevo
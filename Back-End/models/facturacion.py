@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Renglon de la factura: el alquiler de una maquina o un insumo consumido.
+# En los insumos cantidad = consumos registrados en el mes, importe = suma de su cobro_mensual
+# (en pesos) y precio_unitario = importe / cantidad
+class LineaFactura(BaseModel):
+    concepto: str
+    id_insumo: Optional[int] = None
+    descripcion: str
+    cantidad: float
+    precio_unitario: float
+    importe: float
+
+# Lo que se cobra por una maquina en el mes
+class FacturaMaquina(BaseModel):
+    id_maquina: int
+    modelo: Optional[str] = None
+    alquiler: float
+    insumos: float
+    total: float
+    lineas: List[LineaFactura]
+
+# Lo que debe un cliente en un mes
+class FacturaCliente(BaseModel):
+    id_cliente: int
+    nombre: str
+    mes: str
+    total_alquiler: float
+    total_insumos: float
+    total: float
+    maquinas: List[FacturaMaquina]
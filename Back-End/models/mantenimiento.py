@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 # Base del mantenimiento
@@ -13,3 +13,21 @@ class MantenimientoBase(BaseModel):
 # Modelo del mantenimiento con ID para respuestas
 class Mantenimiento(MantenimientoBase):
     id_mantenimiento: int
+
+# Mantenimiento con maquina, cliente y tecnico ya resueltos (un solo JOIN)
+class MantenimientoExpandido(Mantenimiento):
+    modelo: Optional[str] = None
+    id_cliente: Optional[int] = None
+    cliente: Optional[str] = None
+    tecnico: Optional[str] = None
+    tipo_visita: Optional[str] = None
+
+# Proximo servicio estimado de una maquina segun su historial (ver database/planificacion.py)
+class MantenimientoProgramado(BaseModel):
+    id_maquina: int
+    servicios: int
+    ultimo: date
+    intervalo_dias: float
+    proximo: date
+    dias_restantes: int
+    estado: str   # "vencido" o "proximo"
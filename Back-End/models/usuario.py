@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 # Base del usuario para login
 class UsuarioLogin(BaseModel):
@@ -21,6 +22,11 @@ class UsuarioBase(BaseModel):
 class Usuario(UsuarioBase):
     id_usuario: int
 
+# Respuesta del login y del registro: el usuario y el token para el header Authorization
+class UsuarioSesion(Usuario):
+    token: str
+    expira: datetime
+
 # Modelo completo del usuario (con contraseña, solo para uso interno)
 class UsuarioCompleto(BaseModel):
     id_usuario: int
@@ -0,0 +1,198 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from database.asignacion import ASIGNACION_CAPACIDAD_DIA, SIN_CLIENTE, Asignador, compatible
+from database.async_connection import fetch_all
+from database.cambios import registrar_cambios
+from database.connection import get_db
+from database.planificacion import planificador
+from database.repositorio import MANTENIMIENTOS, error_interno, insertar_filas
+from models.asignacion import (
+    AsignacionConfirmada, AsignacionPropuesta, CargaTecnico, ConfirmarAsignacion, PropuestaAsignacion, SinAsignar,
+)
+
+router = APIRouter()
+
+DIAS_MAX = 7
+MAX_CONFIRMAR = 5000
+# Ids por consulta IN (...)
+LOTE = 1000
+
+SQL_TECNICOS = "SELECT id_tecnico, nombre, tipo_visita, id_cliente FROM tecnicos WHERE id_cliente IS NOT NULL ORDER BY id_tecnico"
+
+# Mantenimientos que ya estaban cargados en el periodo, por tecnico y dia
+SQL_CARGA = """
+    SELECT id_tecnico, DATEDIFF(fecha, %s) AS dia, COUNT(*) AS cantidad
+    FROM mantenimientos
+    WHERE fecha >= %s AND fecha < %s AND id_tecnico IS NOT NULL
+    GROUP BY id_tecnico, dia
+"""
+
+
+def _en(cantidad):
+    return ", ".join(["%s"] * cantidad)
+
+
+def _lotes(ids):
+    return [ids[i:i + LOTE] for i in range(0, len(ids), LOTE)]
+
+
+async def _clientes(ids):
+    """{id_maquina: id_cliente} de las maquinas pendientes"""
+    resultados = await asyncio.gather(*(
+        fetch_all(f"SELECT id_maquina, id_cliente FROM maquinas WHERE id_maquina IN ({_en(len(lote))})", lote)
+        for lote in _lotes(ids)
+    ))
+    return {f["id_maquina"]: f["id_cliente"] for filas in resultados for f in filas}
+
+
+def armar_propuesta(asignador, desde, dias, tipo, tecnicos, pendientes):
+    """Pasa el reparto (posiciones y dias del periodo) a fechas e ids"""
+    dia = lambda d: desde + timedelta(days=d)
+    asignaciones, sin_asignar = [], []
+    for j, trabajo in enumerate(asignador.trabajos):
+        lugar = asignador.lugar[j]
+        if lugar is None:
+            continue
+        t, d = lugar
+        asignaciones.append(AsignacionPropuesta(
+            id_maquina=trabajo["id_maquina"],
+            id_tecnico=tecnicos[t]["id_tecnico"],
+            tecnico=tecnicos[t]["nombre"],
+            id_cliente=trabajo["id_cliente"],
+            fecha=dia(d),
+            tipo=tipo,
+            vencimiento=dia(trabajo["vence"]),
+        ))
+    for j, motivo in asignador.motivo.items():
+        trabajo = asignador.trabajos[j]
+        sin_asignar.append(SinAsignar(
+            id_maquina=trabajo["id_maquina"], id_cliente=trabajo["id_cliente"], vencimiento=dia(trabajo["vence"]), motivo=motivo,
+        ))
+    for trabajo in pendientes:
+        sin_asignar.append(SinAsignar(id_maquina=trabajo["id_maquina"], vencimiento=dia(trabajo["vence"]), motivo=SIN_CLIENTE))
+
+    asignaciones.sort(key=lambda a: (a.fecha, a.id_tecnico, a.id_maquina))
+    sin_asignar.sort(key=lambda s: (s.vencimiento, s.id_maquina))
+    return PropuestaAsignacion(
+        desde=desde,
+        hasta=dia(dias - 1),
+        tipo=tipo,
+        asignaciones=asignaciones,
+        sin_asignar=sin_asignar,
+        carga=[
+            CargaTecnico(
+                id_tecnico=tecnico["id_tecnico"],
+                nombre=tecnico["nombre"],
+                previos=asignador.previa[t],
+                asignados=asignador.total[t] - asignador.previa[t],
+            )
+            for t, tecnico in enumerate(tecnicos) if asignador.total[t]
+        ],
+        costo_greedy=asignador.costo_greedy,
+        costo=asignador.costo(),
+        mejoras=asignador.mejoras,
+        segundos=round(asignador.segundos, 3),
+    )
+
+
+# Reparto propuesto de los mantenimientos que vencen en el periodo (no guarda nada)
+@router.get("/propuesta", response_model=PropuestaAsignacion)
+async def proponer_asignacion(
+    desde: Optional[date] = Query(None, description="Primer dia del periodo, por defecto hoy"),
+    dias: int = Query(DIAS_MAX, ge=1, le=DIAS_MAX, description="1 para un dia, 7 para una semana"),
+    tipo: str = Query("preventivo", min_length=1, max_length=50),
+    capacidad: int = Query(ASIGNACION_CAPACIDAD_DIA, ge=1, le=50, description="Trabajos por tecnico y dia"),
+):
+    desde = desde or date.today()
+    # El plan cuenta dias desde 1970
+    inicio = (desde - date(1970, 1, 1)).days
+    try:
+        plan = await planificador.plan()
+        ids, proximos = plan.vencen_antes(desde + timedelta(days=dias))
+        clientes, tecnicos, carga = await asyncio.gather(
+            _clientes(ids),
+            fetch_all(SQL_TECNICOS),
+            fetch_all(SQL_CARGA, (desde, desde, desde + timedelta(days=dias))),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise error_interno("proponer la asignacion", e)
+
+    trabajos, sin_cliente = [], []
+    for id_maquina, proximo in zip(ids, proximos):
+        trabajo = {"id_maquina": id_maquina, "id_cliente": clientes.get(id_maquina), "vence": proximo - inicio}
+        (trabajos if trabajo["id_cliente"] is not None else sin_cliente).append(trabajo)
+    posicion = {t["id_tecnico"]: i for i, t in enumerate(tecnicos)}
+    previa = {(posicion[f["id_tecnico"]], f["dia"]): f["cantidad"] for f in carga if f["id_tecnico"] in posicion}
+
+    # El calculo es CPU puro: va al threadpool para no frenar el event loop
+    asignador = Asignador(trabajos, tecnicos, dias, tipo, previa, capacidad)
+    await run_in_threadpool(asignador.resolver)
+    return armar_propuesta(asignador, desde, dias, tipo, tecnicos, sin_cliente)
+
+
+def _validar(cursor, asignaciones):
+    """Errores de la propuesta contra el estado actual (maquina o tecnico que cambio de cliente, etc.)"""
+    maquinas, tecnicos = {}, {}
+    for lote in _lotes(sorted({a.id_maquina for a in asignaciones})):
+        cursor.execute(f"SELECT id_maquina, id_cliente FROM maquinas WHERE id_maquina IN ({_en(len(lote))})", lote)
+        maquinas.update({f["id_maquina"]: f["id_cliente"] for f in cursor.fetchall()})
+    for lote in _lotes(sorted({a.id_tecnico for a in asignaciones})):
+        cursor.execute(f"SELECT id_tecnico, tipo_visita, id_cliente FROM tecnicos WHERE id_tecnico IN ({_en(len(lote))})", lote)
+        tecnicos.update({f["id_tecnico"]: f for f in cursor.fetchall()})
+
+    errores, vistas = [], set()
+    for a in asignaciones:
+        if (a.id_maquina, a.fecha) in vistas:
+            errores.append(f"La maquina {a.id_maquina} esta dos veces el {a.fecha}")
+        vistas.add((a.id_maquina, a.fecha))
+        if a.id_maquina not in maquinas:
+            errores.append(f"La maquina {a.id_maquina} no existe")
+        elif a.id_tecnico not in tecnicos:
+            errores.append(f"El tecnico {a.id_tecnico} no existe")
+        elif not compatible(tecnicos[a.id_tecnico], maquinas[a.id_maquina], a.tipo):
+            errores.append(f"El tecnico {a.id_tecnico} no atiende la maquina {a.id_maquina} ({a.tipo})")
+
+    # Confirmar dos veces la misma propuesta no duplica los mantenimientos
+    fechas = [a.fecha for a in asignaciones]
+    for lote in _lotes(sorted({a.id_maquina for a in asignaciones})):
+        cursor.execute(f"""
+            SELECT id_maquina, DATE(fecha) AS dia FROM mantenimientos
+            WHERE id_maquina IN ({_en(len(lote))}) AND fecha >= %s AND fecha < %s
+        """, lote + [min(fechas), max(fechas) + timedelta(days=1)])
+        existentes = {(f["id_maquina"], f["dia"]) for f in cursor.fetchall()}
+        errores += [
+            f"La maquina {a.id_maquina} ya tiene un mantenimiento el {a.fecha}"
+            for a in asignaciones if (a.id_maquina, a.fecha) in existentes
+        ]
+    return errores
+
+
+# Carga todas las asignaciones de una propuesta en una sola transaccion (o ninguna)
+@router.post("/confirmar", response_model=AsignacionConfirmada)
+def confirmar_asignacion(datos: ConfirmarAsignacion, conn=Depends(get_db)):
+    if len(datos.asignaciones) > MAX_CONFIRMAR:
+        raise HTTPException(status_code=413, detail=f"Maximo {MAX_CONFIRMAR} asignaciones por pedido")
+
+    def operacion():
+        with conn.cursor(dictionary=True) as cursor:
+            errores = _validar(cursor, datos.asignaciones)
+            if errores:
+                raise HTTPException(status_code=409, detail=errores[:20])
+            ids = []
+            for lote in _lotes(datos.asignaciones):
+                ids += insertar_filas(cursor, MANTENIMIENTOS.sql_insertar, [
+                    (a.id_maquina, a.id_tecnico, a.tipo, datetime.combine(a.fecha, datetime.min.time()), datos.observaciones)
+                    for a in lote
+                ])
+        conn.commit()
+        registrar_cambios("mantenimientos", "insert", ids)
+        for id_, a in zip(ids, datos.asignaciones):
+            planificador.anotar(id_, a.id_maquina, a.fecha)
+        return AsignacionConfirmada(insertados=len(ids), ids=ids)
+
+    return MANTENIMIENTOS.escribir(conn, "confirmar la asignacion de", operacion)
@@ -1,197 +1,314 @@
-from fastapi import APIRouter, Depends, HTTPException
-from database.connection import get_connection
-from models.consumo import Consumo, ConsumoCreate, ConsumoUpdate
-from typing import List
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+from database.connection import get_db
+from database.paginacion import Paginacion
+from database.cambios import registrar_cambio, registrar_cambios
+from database.exportar import exportar
+from database import consumo_mensual
+from database.preparadas import ejecutar, fila
+from database.repositorio import CONSUMOS, error_interno, insertar_filas
+from database.versiones import condicional
+from database.delta import DESCRIPCION_SINCE, registrar_baja
+from models.consumo import Consumo, ConsumoCreate, ConsumoUpdate, ConsumoBulkResultado, ConsumoBulkError, ConsumoExpandido
+from models.delta import Delta
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Consumo])
-def get_consumos():
-    """Obtener todos los consumos"""
-    connection = get_connection()
+SELECT_CONSUMOS_EXPANDIDO = """
+    SELECT c.id_consumo, c.fecha, c.id_maquina, c.cobro_mensual, c.id_insumo,
+           m.modelo, m.id_cliente, cl.nombre AS cliente,
+           i.tipo AS tipo_insumo, i.precio AS precio_insumo
+    FROM consumoInsumos c
+    LEFT JOIN maquinas m ON m.id_maquina = c.id_maquina
+    LEFT JOIN clientes cl ON cl.id_cliente = m.id_cliente
+    LEFT JOIN insumos i ON i.id_insumo = c.id_insumo
+"""
+
+def filtrar_consumos(pag, desde, hasta, alias=""):
+    """Consulta de consumos paginada por (fecha, id) con filtro de rango de fechas"""
+    consulta = CONSUMOS.consulta(pag, col_fecha="fecha", alias=alias)
+    consulta.filtro(f"{alias}fecha >= %s", desde).filtro(f"{alias}fecha <= %s", hasta)
+    return consulta
+
+@router.get("/", response_model=Union[List[Consumo], Delta[Consumo]], dependencies=[Depends(condicional("consumoInsumos", "maquinas"))])
+async def get_consumos(
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_maquina: Optional[int] = None,
+    id_cliente: Optional[int] = None,
+    id_insumo: Optional[int] = None,
+    since: Optional[str] = Query(None, description=DESCRIPCION_SINCE),
+):
+    """Obtener los consumos (filtrados y paginados por fecha), o solo los cambios con since"""
+    if since is not None:
+        return await CONSUMOS.cambios(
+            since, pag, desde=desde, hasta=hasta, id_maquina=id_maquina, id_cliente=id_cliente, id_insumo=id_insumo,
+        )
+    consulta = filtrar_consumos(pag, desde, hasta)
+    consulta.filtro("id_maquina = %s", id_maquina).filtro("id_insumo = %s", id_insumo)
+    consulta.filtro("id_maquina IN (SELECT id_maquina FROM maquinas WHERE id_cliente = %s)", id_cliente)
+    return await CONSUMOS.listar(consulta)
+
+@router.get("/expandido", response_model=List[ConsumoExpandido], dependencies=[Depends(condicional("consumoInsumos", "maquinas", "clientes", "insumos"))])
+async def get_consumos_expandido(
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_maquina: Optional[int] = None,
+    id_cliente: Optional[int] = None,
+    id_insumo: Optional[int] = None,
+):
+    """Consumos con maquina, cliente e insumo ya unidos (mismos filtros y paginacion que la lista)"""
+    consulta = filtrar_consumos(pag, desde, hasta, alias="c.")
+    consulta.filtro("c.id_maquina = %s", id_maquina).filtro("c.id_insumo = %s", id_insumo)
+    consulta.filtro("m.id_cliente = %s", id_cliente)
+    return await CONSUMOS.listar(consulta, base=SELECT_CONSUMOS_EXPANDIDO, modelo=ConsumoExpandido)
+
+@router.get("/export", dependencies=[Depends(condicional("consumoInsumos"))])
+def exportar_consumos(
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_maquina: Optional[int] = None,
+):
+    """Exportar consumos en NDJSON o CSV sin cargarlos en memoria (para el cierre de mes)"""
+    consulta = CONSUMOS.consulta(Paginacion(limit=None, after=None))
+    consulta.filtro("fecha >= %s", desde).filtro("fecha <= %s", hasta).filtro("id_maquina = %s", id_maquina)
+    sql, params = consulta.armar(CONSUMOS.select)
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT id_consumo, fecha, id_maquina, cobro_mensual, id_insumo 
-                FROM consumoInsumos 
-                ORDER BY fecha DESC
-            """)
-            results = cursor.fetchall()
-            return [
-                Consumo(
-                    id_consumo=row[0],
-                    fecha=row[1],
-                    id_maquina=row[2],
-                    cobro_mensual=row[3],
-                    id_insumo=row[4]
-                )
-                for row in results
-            ]
+        return exportar(sql, params, formato, "consumos")
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener consumos: {str(e)}")
-    finally:
-        connection.close()
+        raise error_interno("exportar consumos", e)
 
-@router.get("/{consumo_id}", response_model=Consumo)
-def get_consumo(consumo_id: int):
+@router.get("/{consumo_id}", response_model=Consumo, dependencies=[Depends(condicional("consumoInsumos"))])
+async def get_consumo(consumo_id: int):
     """Obtener un consumo por ID"""
-    connection = get_connection()
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT id_consumo, fecha, id_maquina, cobro_mensual, id_insumo 
-                FROM consumoInsumos 
-                WHERE id_consumo = %s
-            """, (consumo_id,))
-            result = cursor.fetchone()
-            if not result:
-                raise HTTPException(status_code=404, detail="Consumo no encontrado")
-            
-            return Consumo(
-                id_consumo=result[0],
-                fecha=result[1],
-                id_maquina=result[2],
-                cobro_mensual=result[3],
-                id_insumo=result[4]
-            )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener consumo: {str(e)}")
-    finally:
-        connection.close()
+    return await CONSUMOS.obtener(consumo_id)
 
 @router.post("/", response_model=Consumo)
-def create_consumo(consumo: ConsumoCreate):
+def create_consumo(consumo: ConsumoCreate, connection=Depends(get_db)):
     """Crear un nuevo consumo"""
-    connection = get_connection()
+    def operacion():
+        consumo_id = ejecutar(connection, CONSUMOS.sql_insertar, CONSUMOS.valores(consumo)).lastrowid
+        consumo_mensual.aplicar(connection, [
+            (consumo.id_maquina, consumo.id_insumo, consumo.fecha, consumo.cobro_mensual, 1)
+        ])
+        connection.commit()
+        registrar_cambio("consumoInsumos", "insert", consumo_id)
+        return Consumo(id_consumo=consumo_id, **consumo.model_dump())
+    return CONSUMOS.escribir(connection, "crear", operacion)
+
+LOTE_BULK = 1000
+MAX_BULK = 50000
+_lista_consumos = TypeAdapter(List[ConsumoCreate])
+
+def _leer_filas_bulk(cuerpo, content_type, errores):
+    """Parsea el cuerpo como array JSON o NDJSON (una fila por linea)"""
+    if "ndjson" in content_type:
+        filas = []
+        for linea in cuerpo.splitlines():
+            if not linea.strip():
+                continue
+            try:
+                filas.append(json.loads(linea))
+            except ValueError as e:
+                errores[len(filas)] = f"JSON invalido: {e}"
+                filas.append(None)
+        return filas
+
+    try:
+        filas = json.loads(cuerpo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"JSON invalido: {e}")
+    if not isinstance(filas, list):
+        raise HTTPException(status_code=400, detail="Se esperaba un array de consumos")
+    return filas
+
+def _validar_bulk(filas, errores):
+    """Valida todo el array de una vez; si hay filas malas las anota y valida el resto"""
+    try:
+        return dict(enumerate(_lista_consumos.validate_python(filas)))
+    except ValidationError as e:
+        for err in e.errors():
+            indice = err["loc"][0]
+            campo = ".".join(str(parte) for parte in err["loc"][1:])
+            errores.setdefault(indice, f"{campo}: {err['msg']}" if campo else err["msg"])
+    buenos = [i for i in range(len(filas)) if i not in errores]
+    return dict(zip(buenos, _lista_consumos.validate_python([filas[i] for i in buenos])))
+
+def _existentes(cursor, tabla, columna, valores):
+    if not valores:
+        return set()
+    marcas = ", ".join(["%s"] * len(valores))
+    cursor.execute(f"SELECT {columna} FROM {tabla} WHERE {columna} IN ({marcas})", list(valores))
+    return {fila[0] for fila in cursor.fetchall()}
+
+def _insertar_bulk(connection, validos, errores):
+    """Inserta las filas validas en lotes de executemany dentro de una sola transaccion"""
     try:
         with connection.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO consumoInsumos (fecha, id_maquina, cobro_mensual, id_insumo)
-                VALUES (%s, %s, %s, %s)
-            """, (consumo.fecha, consumo.id_maquina, consumo.cobro_mensual, consumo.id_insumo))
-            
-            consumo_id = cursor.lastrowid
+            # Chequear las FK de todas las filas con dos consultas en vez de que falle el lote
+            maquinas = _existentes(cursor, "maquinas", "id_maquina", {c.id_maquina for c in validos.values()})
+            insumos = _existentes(cursor, "insumos", "id_insumo", {c.id_insumo for c in validos.values()})
+            for i, c in validos.items():
+                if c.id_maquina not in maquinas:
+                    errores[i] = f"La maquina {c.id_maquina} no existe"
+                elif c.id_insumo not in insumos:
+                    errores[i] = f"El insumo {c.id_insumo} no existe"
+
+            indices = [i for i in sorted(validos) if i not in errores]
+            ids = {}
+            for inicio in range(0, len(indices), LOTE_BULK):
+                lote = indices[inicio:inicio + LOTE_BULK]
+                nuevos = insertar_filas(cursor, CONSUMOS.sql_insertar, [CONSUMOS.valores(validos[i]) for i in lote])
+                ids.update(zip(lote, nuevos))
+
+            consumo_mensual.aplicar(connection, [
+                (validos[i].id_maquina, validos[i].id_insumo, validos[i].fecha, validos[i].cobro_mensual, 1)
+                for i in indices
+            ])
             connection.commit()
-            
-            return Consumo(
-                id_consumo=consumo_id,
-                fecha=consumo.fecha,
-                id_maquina=consumo.id_maquina,
-                cobro_mensual=consumo.cobro_mensual,
-                id_insumo=consumo.id_insumo
-            )
-    except Exception as e:
+            registrar_cambios("consumoInsumos", "insert", [ids[i] for i in indices])
+            return ids
+    except Exception:
         connection.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al crear consumo: {str(e)}")
-    finally:
-        connection.close()
+        raise
 
-@router.put("/{consumo_id}", response_model=Consumo)
-def update_consumo(consumo_id: int, consumo: ConsumoUpdate):
-    """Actualizar un consumo"""
-    connection = get_connection()
+def _cargar_bulk(connection, cuerpo, content_type):
+    """Parseo, validacion e insercion: todo CPU o base, corre entero en el threadpool"""
+    errores = {}
+    filas = _leer_filas_bulk(cuerpo, content_type, errores)
+    if len(filas) > MAX_BULK:
+        raise HTTPException(status_code=413, detail=f"Maximo {MAX_BULK} consumos por pedido")
+
+    validos = _validar_bulk(filas, errores)
     try:
-        with connection.cursor() as cursor:
-            # Verificar si el consumo existe
-            cursor.execute("SELECT * FROM consumoInsumos WHERE id_consumo = %s", (consumo_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Consumo no encontrado")
-            
-            # Construir la consulta de actualización dinámicamente
-            update_fields = []
-            values = []
-            
-            if consumo.fecha is not None:
-                update_fields.append("fecha = %s")
-                values.append(consumo.fecha)
-            if consumo.id_maquina is not None:
-                update_fields.append("id_maquina = %s")
-                values.append(consumo.id_maquina)
-            if consumo.cobro_mensual is not None:
-                update_fields.append("cobro_mensual = %s")
-                values.append(consumo.cobro_mensual)
-            if consumo.id_insumo is not None:
-                update_fields.append("id_insumo = %s")
-                values.append(consumo.id_insumo)
-            
-            if not update_fields:
-                raise HTTPException(status_code=400, detail="No hay campos para actualizar")
-            
-            values.append(consumo_id)
-            
-            cursor.execute(f"""
-                UPDATE consumoInsumos 
-                SET {', '.join(update_fields)}
-                WHERE id_consumo = %s
-            """, values)
-            
-            connection.commit()
-            
-            # Obtener el consumo actualizado
-            cursor.execute("""
-                SELECT id_consumo, fecha, id_maquina, cobro_mensual, id_insumo 
-                FROM consumoInsumos 
-                WHERE id_consumo = %s
-            """, (consumo_id,))
-            result = cursor.fetchone()
-            
-            return Consumo(
-                id_consumo=result[0],
-                fecha=result[1],
-                id_maquina=result[2],
-                cobro_mensual=result[3],
-                id_insumo=result[4]
-            )
+        ids = _insertar_bulk(connection, validos, errores)
     except Exception as e:
-        connection.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al actualizar consumo: {str(e)}")
-    finally:
-        connection.close()
+        raise error_interno("crear consumos", e)
+
+    return ConsumoBulkResultado(
+        insertados=len(ids),
+        ids=[ids.get(i) for i in range(len(filas))],
+        errores=[ConsumoBulkError(indice=i, error=msg) for i, msg in sorted(errores.items())],
+    )
+
+@router.post(
+    "/bulk",
+    response_model=ConsumoBulkResultado,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/ConsumoCreate"}}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def create_consumos_bulk(request: Request, connection=Depends(get_db)):
+    """Crear muchos consumos de una vez (array JSON o NDJSON) en una sola transaccion"""
+    # Con MAX_BULK filas el parseo y la validacion tardan: en el event loop frenarian a todos
+    # los demas pedidos (incluidos SSE y WebSocket)
+    cuerpo = await request.body()
+    return await run_in_threadpool(_cargar_bulk, connection, cuerpo, request.headers.get("content-type", ""))
+
+SQL_BLOQUEAR = """
+    SELECT id_maquina, id_insumo, fecha, cobro_mensual
+    FROM consumoInsumos
+    WHERE id_consumo = %s
+    FOR UPDATE
+"""
+
+def _bloquear(connection, consumo_id):
+    """Valores actuales del consumo (bloqueado hasta el commit) o 404"""
+    anterior = fila(connection, SQL_BLOQUEAR, (consumo_id,))
+    if not anterior:
+        raise HTTPException(status_code=404, detail="Consumo no encontrado")
+    return (anterior["id_maquina"], anterior["id_insumo"], anterior["fecha"], anterior["cobro_mensual"])
+
+@router.put("/{consumo_id}", response_model=Consumo)
+def update_consumo(consumo_id: int, consumo: ConsumoUpdate, connection=Depends(get_db)):
+    """Actualizar un consumo"""
+    def operacion():
+        # Verificar si el consumo existe (y bloquearlo para ajustar el resumen mensual)
+        anterior = _bloquear(connection, consumo_id)
+
+        # Construir la consulta de actualización dinámicamente
+        update_fields = []
+        values = []
+
+        if consumo.fecha is not None:
+            update_fields.append("fecha = %s")
+            values.append(consumo.fecha)
+        if consumo.id_maquina is not None:
+            update_fields.append("id_maquina = %s")
+            values.append(consumo.id_maquina)
+        if consumo.cobro_mensual is not None:
+            update_fields.append("cobro_mensual = %s")
+            values.append(consumo.cobro_mensual)
+        if consumo.id_insumo is not None:
+            update_fields.append("id_insumo = %s")
+            values.append(consumo.id_insumo)
+
+        if not update_fields:
+            raise HTTPException(status_code=400, detail="No hay campos para actualizar")
+
+        values.append(consumo_id)
+
+        # Son a lo sumo 15 combinaciones de campos: cada una queda preparada en la conexion
+        ejecutar(connection, f"UPDATE consumoInsumos SET {', '.join(update_fields)} WHERE id_consumo = %s", values)
+
+        # Si cambio de mes, de maquina o de insumo se mueve entre filas del resumen
+        nuevo = (
+            consumo.id_maquina if consumo.id_maquina is not None else anterior[0],
+            consumo.id_insumo if consumo.id_insumo is not None else anterior[1],
+            consumo.fecha if consumo.fecha is not None else anterior[2],
+            consumo.cobro_mensual if consumo.cobro_mensual is not None else anterior[3],
+        )
+        consumo_mensual.aplicar(connection, [anterior + (-1,), nuevo + (1,)])
+        connection.commit()
+        registrar_cambio("consumoInsumos", "update", consumo_id)
+
+        # `nuevo` ya tiene la fila como quedo (la bloqueamos con FOR UPDATE): no hace falta releerla
+        return Consumo(
+            id_consumo=consumo_id,
+            fecha=nuevo[2],
+            id_maquina=nuevo[0],
+            cobro_mensual=nuevo[3],
+            id_insumo=nuevo[1]
+        )
+    return CONSUMOS.escribir(connection, "actualizar", operacion)
 
 @router.delete("/{consumo_id}")
-def delete_consumo(consumo_id: int):
+def delete_consumo(consumo_id: int, connection=Depends(get_db)):
     """Eliminar un consumo"""
-    connection = get_connection()
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM consumoInsumos WHERE id_consumo = %s", (consumo_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Consumo no encontrado")
-            
-            cursor.execute("DELETE FROM consumoInsumos WHERE id_consumo = %s", (consumo_id,))
-            connection.commit()
-            
-            return {"message": "Consumo eliminado exitosamente"}
-    except Exception as e:
-        connection.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al eliminar consumo: {str(e)}")
-    finally:
-        connection.close()
+    def operacion():
+        anterior = _bloquear(connection, consumo_id)
+        ejecutar(connection, CONSUMOS.sql_eliminar, (consumo_id,))
+        registrar_baja(connection, "consumoInsumos", consumo_id)
+        consumo_mensual.aplicar(connection, [anterior + (-1,)])
+        connection.commit()
+        registrar_cambio("consumoInsumos", "delete", consumo_id)
+        return {"message": "Consumo eliminado exitosamente"}
+    return CONSUMOS.escribir(connection, "eliminar", operacion)
 
-@router.get("/maquina/{maquina_id}", response_model=List[Consumo])
-def get_consumos_by_maquina(maquina_id: int):
+@router.get("/maquina/{maquina_id}", response_model=List[Consumo], dependencies=[Depends(condicional("consumoInsumos"))])
+async def get_consumos_by_maquina(
+    maquina_id: int,
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_insumo: Optional[int] = None,
+):
     """Obtener consumos por ID de máquina"""
-    connection = get_connection()
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT id_consumo, fecha, id_maquina, cobro_mensual, id_insumo 
-                FROM consumoInsumos 
-                WHERE id_maquina = %s 
-                ORDER BY fecha DESC
-            """, (maquina_id,))
-            results = cursor.fetchall()
-            return [
-                Consumo(
-                    id_consumo=row[0],
-                    fecha=row[1],
-                    id_maquina=row[2],
-                    cobro_mensual=row[3],
-                    id_insumo=row[4]
-                )
-                for row in results
-            ]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener consumos por máquina: {str(e)}")
-    finally:
-        connection.close()
+    consulta = filtrar_consumos(pag, desde, hasta)
+    consulta.filtro("id_maquina = %s", maquina_id).filtro("id_insumo = %s", id_insumo)
+    return await CONSUMOS.listar(consulta)
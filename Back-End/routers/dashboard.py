@@ -0,0 +1,156 @@
+import asyncio
+import os
+import time
+from datetime import date, datetime
+from fastapi import APIRouter, Response
+from database.async_connection import fetch_all
+from database.repositorio import error_interno
+from models.dashboard import ClienteDestacado, Dashboard, Indicador, MantenimientosPorTipo
+
+router = APIRouter()
+
+# Segundos que se reusa el tablero ya calculado (por proceso) y cuantos clientes se listan
+DASHBOARD_TTL = float(os.getenv("DASHBOARD_TTL", "30"))
+DASHBOARD_TOP = int(os.getenv("DASHBOARD_TOP", "5"))
+
+# Alquiler por cliente: la facturacion cobra el costo actual de cada maquina alquilada en
+# todos los meses, asi que es el mismo para los dos meses
+SQL_ALQUILER = """
+    SELECT c.id_cliente, c.nombre, COALESCE(SUM(m.costo_alquiler_mensual), 0) AS alquiler
+    FROM maquinas m
+    JOIN clientes c ON c.id_cliente = m.id_cliente
+    GROUP BY c.id_cliente, c.nombre
+"""
+
+# Insumos de los dos meses desde el resumen consumo_mensual (id_cliente NULL: maquina sin asignar).
+# total_cobro ya es plata, igual que en /api/facturacion
+SQL_CONSUMOS = """
+    SELECT m.id_cliente, c.mes, SUM(c.total_cobro) AS importe
+    FROM consumo_mensual c
+    LEFT JOIN maquinas m ON m.id_maquina = c.id_maquina
+    WHERE c.mes >= %s AND c.mes < %s
+    GROUP BY m.id_cliente, c.mes
+"""
+
+SQL_MANTENIMIENTOS = """
+    SELECT tipo, fecha >= %s AS del_mes, COUNT(*) AS cantidad
+    FROM mantenimientos
+    WHERE fecha >= %s AND fecha < %s
+    GROUP BY tipo, del_mes
+"""
+
+# Maquinas activas por mes: las que tuvieron consumos o mantenimientos (sale igual para
+# cualquier mes pasado, no depende del estado actual de maquinas)
+SQL_ACTIVAS = """
+    SELECT mes, COUNT(DISTINCT id_maquina) AS maquinas
+    FROM (
+        SELECT id_maquina, mes FROM consumo_mensual WHERE mes >= %s AND mes < %s
+        UNION
+        SELECT id_maquina, DATE_SUB(DATE(fecha), INTERVAL DAYOFMONTH(fecha) - 1 DAY)
+        FROM mantenimientos WHERE fecha >= %s AND fecha < %s AND id_maquina IS NOT NULL
+    ) actividad
+    GROUP BY mes
+"""
+
+_calculado = {}
+_lock = asyncio.Lock()
+
+
+def _siguiente(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _anterior(mes):
+    return date(mes.year - (mes.month == 1), (mes.month - 2) % 12 + 1, 1)
+
+
+def indicador(actual, anterior=None):
+    actual = round(float(actual or 0), 2)
+    if anterior is None:
+        return Indicador(actual=actual)
+    anterior = round(float(anterior), 2)
+    variacion = round((actual - anterior) / anterior * 100, 1) if anterior else None
+    return Indicador(actual=actual, anterior=anterior, variacion=variacion)
+
+
+def armar_dashboard(mes, alquileres, consumos, mantenimientos, activas):
+    """Junta los agregados de los dos meses en los indicadores del tablero"""
+    anterior = _anterior(mes)
+    maquinas = {fila["mes"]: fila["maquinas"] for fila in activas}
+    alquiler_total = sum(float(f["alquiler"]) for f in alquileres)
+
+    ingreso = {mes: 0.0, anterior: 0.0}
+    insumos_cliente = {}
+    for fila in consumos:
+        importe = float(fila["importe"] or 0)
+        ingreso[fila["mes"]] = ingreso.get(fila["mes"], 0.0) + importe
+        if fila["id_cliente"] is not None:
+            insumos_cliente[(fila["id_cliente"], fila["mes"])] = importe
+
+    por_tipo = {}
+    for fila in mantenimientos:
+        por_tipo.setdefault(fila["tipo"] or "", [0, 0])[0 if fila["del_mes"] else 1] += fila["cantidad"]
+
+    # El alquiler se factura todos los meses con el costo actual (como en /api/facturacion):
+    # entre los dos meses solo cambian los insumos
+    clientes = []
+    for fila in alquileres:
+        alquiler = float(fila["alquiler"])
+        clientes.append(ClienteDestacado(
+            id_cliente=fila["id_cliente"],
+            nombre=fila["nombre"],
+            facturado=indicador(
+                alquiler + insumos_cliente.get((fila["id_cliente"], mes), 0),
+                alquiler + insumos_cliente.get((fila["id_cliente"], anterior), 0),
+            ),
+        ))
+    clientes.sort(key=lambda c: (-c.facturado.actual, c.id_cliente))
+
+    return Dashboard(
+        mes=mes.strftime("%Y-%m"),
+        mes_anterior=anterior.strftime("%Y-%m"),
+        generado=datetime.now(),
+        maquinas_activas=indicador(maquinas.get(mes, 0), maquinas.get(anterior, 0)),
+        # Sale del estado actual de maquinas: no hay un alquiler del mes anterior con que comparar
+        ingreso_alquiler=indicador(alquiler_total),
+        ingreso_consumos=indicador(ingreso[mes], ingreso[anterior]),
+        mantenimientos=indicador(
+            sum(c[0] for c in por_tipo.values()), sum(c[1] for c in por_tipo.values())
+        ),
+        mantenimientos_por_tipo=[
+            MantenimientosPorTipo(tipo=tipo, cantidad=indicador(actual, previo))
+            for tipo, (actual, previo) in sorted(por_tipo.items(), key=lambda t: (-t[1][0], t[0]))
+        ],
+        top_clientes=clientes[:DASHBOARD_TOP],
+    )
+
+
+async def _calcular(mes):
+    anterior, fin = _anterior(mes), _siguiente(mes)
+    try:
+        # Consultas independientes (y de solo lectura): van en paralelo por conexiones distintas
+        alquileres, consumos, mantenimientos, activas = await asyncio.gather(
+            fetch_all(SQL_ALQUILER),
+            fetch_all(SQL_CONSUMOS, (anterior, fin)),
+            fetch_all(SQL_MANTENIMIENTOS, (mes, anterior, fin)),
+            fetch_all(SQL_ACTIVAS, (anterior, fin, anterior, fin)),
+        )
+    except Exception as e:
+        raise error_interno("calcular el dashboard", e)
+    return armar_dashboard(mes, alquileres, consumos, mantenimientos, activas)
+
+
+# Indicadores del mes en curso contra el mes anterior, en una sola llamada
+@router.get("/", response_model=Dashboard)
+async def dashboard(response: Response):
+    mes = date.today().replace(day=1)
+    guardado = _calculado.get(mes)
+    if guardado is None or guardado[0] <= time.monotonic():
+        # Un solo calculo a la vez: los pedidos que llegan mientras tanto esperan y reusan el resultado
+        async with _lock:
+            guardado = _calculado.get(mes)
+            if guardado is None or guardado[0] <= time.monotonic():
+                _calculado.clear()
+                guardado = _calculado[mes] = (time.monotonic() + DASHBOARD_TTL, await _calcular(mes))
+    response.headers["Cache-Control"] = f"private, max-age={max(0, int(guardado[0] - time.monotonic()))}"
+    return guardado[1]
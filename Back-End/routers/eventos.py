@@ -0,0 +1,73 @@
+import asyncio
+import orjson
+from fastapi import APIRouter, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from database.eventos import hub
+
+router = APIRouter()
+
+# Cada cuanto se manda algo aunque no haya cambios (mantiene viva la conexion y detecta clientes caidos)
+LATIDO_SEGUNDOS = 15
+
+DESCRIPCION_TABLAS = "Tablas separadas por coma (ej. maquinas,consumoInsumos); sin esto llegan todas"
+
+
+def _tablas(texto):
+    return [t.strip() for t in texto.split(",") if t.strip()] if texto else None
+
+
+async def _siguiente(suscriptor):
+    """El proximo evento, o None si paso el latido sin novedades"""
+    try:
+        return await asyncio.wait_for(suscriptor.cola.get(), LATIDO_SEGUNDOS)
+    except asyncio.TimeoutError:
+        return None
+
+
+# Feed de cambios por Server-Sent Events: eventos insert/update/delete (y desborde) con la tabla y el id
+@router.get("/")
+async def feed_eventos(
+    tablas: Optional[str] = Query(None, description=DESCRIPCION_TABLAS),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    async def generar():
+        # La suscripcion se hace recien cuando arranca el stream, asi el finally siempre la libera
+        suscriptor = hub.suscribir(_tablas(tablas), last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                evento = await _siguiente(suscriptor)
+                if evento is None:
+                    yield ": latido\n\n"
+                    continue
+                yield f"id: {evento['seq']}\nevent: {evento['tipo']}\ndata: {orjson.dumps(evento).decode()}\n\n"
+        finally:
+            hub.desuscribir(suscriptor)
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# El mismo feed por WebSocket (un JSON por mensaje); `desde` cumple el papel de Last-Event-ID
+@router.websocket("/ws")
+async def feed_eventos_ws(websocket: WebSocket, tablas: Optional[str] = None, desde: Optional[int] = None):
+    await websocket.accept()
+    suscriptor = hub.suscribir(_tablas(tablas), desde)
+    try:
+        while True:
+            evento = await _siguiente(suscriptor)
+            await websocket.send_text(orjson.dumps(evento or {"tipo": "latido"}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.desuscribir(suscriptor)
+
+
+# Suscriptores conectados, eventos publicados y desbordes
+@router.get("/estado")
+def estado_eventos():
+    return hub.stats()
@@ -0,0 +1,139 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date
+from typing import Optional
+from database.async_connection import fetch_all
+from database.versiones import condicional
+from models.facturacion import FacturaCliente, FacturaMaquina, LineaFactura
+
+router = APIRouter()
+
+MAX_MESES = 24
+PATRON_MES = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+SQL_MAQUINAS = """
+    SELECT m.id_maquina, m.modelo, m.costo_alquiler_mensual, c.id_cliente, c.nombre
+    FROM maquinas m
+    JOIN clientes c ON c.id_cliente = m.id_cliente
+"""
+
+# Sale del resumen consumo_mensual (una fila por maquina, insumo y mes), no de consumoInsumos.
+# cobro_mensual ya es plata (lo que se cobra por ese consumo): total_cobro se factura tal cual
+SQL_CONSUMOS = """
+    SELECT c.id_maquina, c.id_insumo, i.tipo,
+           YEAR(c.mes) AS anio, MONTH(c.mes) AS mes,
+           c.registros AS cantidad,
+           c.total_cobro AS importe
+    FROM consumo_mensual c
+    JOIN insumos i ON i.id_insumo = c.id_insumo
+"""
+
+
+def _primer_dia(mes):
+    anio, numero = mes.split("-")
+    return date(int(anio), int(numero), 1)
+
+
+def _siguiente(dia):
+    return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+
+
+def _meses(desde, hasta):
+    meses = [desde]
+    while meses[-1] < hasta:
+        meses.append(_siguiente(meses[-1]))
+    return meses
+
+
+def armar_facturas(meses, maquinas, consumos):
+    """Junta el alquiler de cada maquina con sus consumos agregados, por cliente y mes"""
+    lineas_insumos = {}
+    for fila in consumos:
+        clave = (fila["id_maquina"], date(fila["anio"], fila["mes"], 1))
+        importe = round(float(fila["importe"] or 0), 2)
+        cantidad = int(fila["cantidad"] or 0)
+        lineas_insumos.setdefault(clave, []).append(LineaFactura(
+            concepto="insumo",
+            id_insumo=fila["id_insumo"],
+            descripcion=fila["tipo"] or "",
+            cantidad=cantidad,
+            # Promedio cobrado por consumo (informativo: el importe es la suma de los cobros)
+            precio_unitario=round(importe / cantidad, 2) if cantidad else importe,
+            importe=importe,
+        ))
+
+    facturas = []
+    for mes in meses:
+        por_cliente = {}
+        for m in maquinas:
+            alquiler = float(m["costo_alquiler_mensual"] or 0)
+            lineas = [LineaFactura(
+                concepto="alquiler",
+                descripcion=f"Alquiler {m['modelo'] or ''}".strip(),
+                cantidad=1,
+                precio_unitario=alquiler,
+                importe=alquiler,
+            )] + lineas_insumos.get((m["id_maquina"], mes), [])
+            insumos = round(sum(l.importe for l in lineas[1:]), 2)
+            factura = por_cliente.get(m["id_cliente"])
+            if factura is None:
+                factura = por_cliente[m["id_cliente"]] = FacturaCliente(
+                    id_cliente=m["id_cliente"],
+                    nombre=m["nombre"],
+                    mes=mes.strftime("%Y-%m"),
+                    total_alquiler=0,
+                    total_insumos=0,
+                    total=0,
+                    maquinas=[],
+                )
+            factura.maquinas.append(FacturaMaquina(
+                id_maquina=m["id_maquina"],
+                modelo=m["modelo"],
+                alquiler=alquiler,
+                insumos=insumos,
+                total=round(alquiler + insumos, 2),
+                lineas=lineas,
+            ))
+            factura.total_alquiler = round(factura.total_alquiler + alquiler, 2)
+            factura.total_insumos = round(factura.total_insumos + insumos, 2)
+            factura.total = round(factura.total_alquiler + factura.total_insumos, 2)
+        facturas += [por_cliente[id_cliente] for id_cliente in sorted(por_cliente)]
+    return facturas
+
+
+# Lo que debe cada cliente por mes: alquiler de sus maquinas + lo cobrado por sus consumos de insumos
+@router.get("/", response_model=list[FacturaCliente], dependencies=[Depends(condicional("consumoInsumos", "maquinas", "clientes", "insumos"))])
+async def facturacion_mensual(
+    desde: str = Query(..., pattern=PATRON_MES, description="Primer mes (YYYY-MM)"),
+    hasta: Optional[str] = Query(None, pattern=PATRON_MES, description="Ultimo mes (YYYY-MM), por defecto igual a desde"),
+    id_cliente: Optional[int] = None,
+):
+    inicio = _primer_dia(desde)
+    fin = _primer_dia(hasta) if hasta else inicio
+    if fin < inicio:
+        raise HTTPException(status_code=400, detail="hasta no puede ser anterior a desde")
+    meses = _meses(inicio, fin)
+    if len(meses) > MAX_MESES:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {MAX_MESES} meses")
+
+    sql_maquinas, params_maquinas = SQL_MAQUINAS, []
+    sql_consumos, params_consumos = SQL_CONSUMOS, []
+    condiciones = ["c.mes >= %s", "c.mes < %s"]
+    params_consumos += [inicio, _siguiente(fin)]
+    if id_cliente is not None:
+        sql_maquinas += " WHERE m.id_cliente = %s"
+        params_maquinas.append(id_cliente)
+        condiciones.append("c.id_maquina IN (SELECT id_maquina FROM maquinas WHERE id_cliente = %s)")
+        params_consumos.append(id_cliente)
+    sql_consumos += " WHERE " + " AND ".join(condiciones)
+
+    try:
+        # Las dos consultas son independientes: van en paralelo por conexiones distintas
+        maquinas, consumos = await asyncio.gather(
+            fetch_all(sql_maquinas + " ORDER BY m.id_maquina", params_maquinas),
+            fetch_all(sql_consumos, params_consumos),
+        )
+    except Exception as e:
+        print("❌ Error al calcular facturacion:", e)
+        raise HTTPException(status_code=500, detail="Error al calcular facturacion")
+    return armar_facturas(meses, maquinas, consumos)
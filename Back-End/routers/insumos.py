@@ -1,67 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Query
+from typing import Optional, Union
 from models.insumo import Insumo, InsumoBase
-from database.connection import get_connection
+from models.delta import Delta
+from database.connection import get_db
+from database.paginacion import Paginacion
+from database.repositorio import INSUMOS
+from database.versiones import condicional
+from database.delta import DESCRIPCION_SINCE
+from database.busqueda import Busqueda
 
 router = APIRouter()
 
-@router.get("/", response_model=list[Insumo])
-def listar_insumos():
-    conn = get_connection()
-    if conn is None:
-        return []
+@router.get("/", response_model=Union[list[Insumo], Delta[Insumo]], dependencies=[Depends(condicional("insumos"))])
+async def listar_insumos(
+    pag: Paginacion = Depends(),
+    id_proveedor: Optional[int] = None,
+    tipo: Optional[str] = None,
+    since: Optional[str] = Query(None, description=DESCRIPCION_SINCE),
+):
+    if since is not None:
+        return await INSUMOS.cambios(since, pag, id_proveedor=id_proveedor, tipo=tipo)
+    consulta = INSUMOS.consulta(pag)
+    consulta.filtro("id_proveedor = %s", id_proveedor).filtro("tipo = %s", tipo)
+    return await INSUMOS.listar(consulta, clave_cache=(pag.limit, pag.after, id_proveedor, tipo))
 
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id_insumo, tipo, precio, id_proveedor FROM insumos")
-        return cursor.fetchall()
-    except Exception as e:
-        print("❌ Error al obtener insumos:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+@router.get("/buscar", response_model=list[Insumo], dependencies=[Depends(condicional("insumos"))])
+async def buscar_insumos(busqueda: Busqueda = Depends()):
+    return await INSUMOS.buscar(busqueda)
 
 @router.post("/", response_model=Insumo)
-def crear_insumo(insumo: InsumoBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar")
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO insumos (tipo, precio, id_proveedor) VALUES (%s, %s, %s)",
-            (insumo.tipo, insumo.precio, insumo.id_proveedor)
-        )
-        conn.commit()
-        nuevo_id = cursor.lastrowid
-        return Insumo(id_insumo=nuevo_id, **insumo.dict())
-    except Exception as e:
-        print("❌ Error al crear insumo:", e)
-        raise HTTPException(status_code=500, detail="Error al crear insumo")
-    finally:
-        cursor.close()
-        conn.close()
+def crear_insumo(insumo: InsumoBase, conn=Depends(get_db)):
+    return INSUMOS.insertar(conn, insumo)
 
 
 @router.put("/{id}", response_model=Insumo)
-def actualizar_insumo(id: int, insumo: InsumoBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE insumos SET tipo=%s, precio=%s, id_proveedor=%s WHERE id_insumo=%s",
-            (insumo.tipo, insumo.precio, insumo.id_proveedor, id)
-        )
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Insumo no encontrado")
-        return Insumo(id_insumo=id, **insumo.dict())
-    except Exception as e:
-        print("❌ Error al actualizar insumo:", repr(e))
-        raise HTTPException(status_code=500, detail="Error al actualizar insumo")
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+def actualizar_insumo(id: int, insumo: InsumoBase, conn=Depends(get_db)):
+    return INSUMOS.actualizar(conn, id, insumo)
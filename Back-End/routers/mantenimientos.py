@@ -1,193 +1,151 @@
-from fastapi import APIRouter, HTTPException
-from models.mantenimiento import Mantenimiento, MantenimientoBase
-from database.connection import get_connection
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.mantenimiento import Mantenimiento, MantenimientoBase, MantenimientoExpandido, MantenimientoProgramado
+from models.delta import Delta
+from database.connection import get_db
+from database.paginacion import LIMITE_MAX, Paginacion
+from database.exportar import exportar
+from database.repositorio import MANTENIMIENTOS, error_interno
+from database.versiones import condicional
+from database.delta import DESCRIPCION_SINCE
+from database.planificacion import planificador
+from database.serializacion import respuesta_json
 from datetime import datetime
+from typing import Literal, Optional, Union
 
 router = APIRouter()
 
+SELECT_MANTENIMIENTOS_EXPANDIDO = """
+    SELECT mt.id_mantenimiento, mt.id_maquina, mt.id_tecnico, mt.tipo, mt.fecha, mt.observaciones,
+           m.modelo, m.id_cliente, cl.nombre AS cliente,
+           t.nombre AS tecnico, t.tipo_visita
+    FROM mantenimientos mt
+    LEFT JOIN maquinas m ON m.id_maquina = mt.id_maquina
+    LEFT JOIN clientes cl ON cl.id_cliente = m.id_cliente
+    LEFT JOIN tecnicos t ON t.id_tecnico = mt.id_tecnico
+"""
+
+# Filtros comunes a las listas de mantenimientos (paginadas por fecha, id)
+def filtrar_mantenimientos(pag, desde, hasta, tipo, alias=""):
+    consulta = MANTENIMIENTOS.consulta(pag, col_fecha="fecha", alias=alias)
+    consulta.filtro(f"{alias}fecha >= %s", desde).filtro(f"{alias}fecha <= %s", hasta).filtro(f"{alias}tipo = %s", tipo)
+    return consulta
+
 # Get de todos los mantenimientos
-@router.get("/", response_model=list[Mantenimiento])
-def listar_mantenimientos():
-    conn = get_connection()
-    if conn is None:
-        return []
+@router.get("/", response_model=Union[list[Mantenimiento], Delta[Mantenimiento]], dependencies=[Depends(condicional("mantenimientos", "maquinas"))])
+async def listar_mantenimientos(
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_maquina: Optional[int] = None,
+    id_tecnico: Optional[int] = None,
+    id_cliente: Optional[int] = None,
+    tipo: Optional[str] = None,
+    since: Optional[str] = Query(None, description=DESCRIPCION_SINCE),
+):
+    if since is not None:
+        return await MANTENIMIENTOS.cambios(
+            since, pag, desde=desde, hasta=hasta, id_maquina=id_maquina, id_tecnico=id_tecnico, id_cliente=id_cliente, tipo=tipo,
+        )
+    consulta = filtrar_mantenimientos(pag, desde, hasta, tipo)
+    consulta.filtro("id_maquina = %s", id_maquina).filtro("id_tecnico = %s", id_tecnico)
+    consulta.filtro("id_maquina IN (SELECT id_maquina FROM maquinas WHERE id_cliente = %s)", id_cliente)
+    return await MANTENIMIENTOS.listar(consulta)
+
+# Get de mantenimientos con maquina, cliente y tecnico ya unidos (mismos filtros y paginacion)
+@router.get("/expandido", response_model=list[MantenimientoExpandido], dependencies=[Depends(condicional("mantenimientos", "maquinas", "clientes", "tecnicos"))])
+async def listar_mantenimientos_expandido(
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_maquina: Optional[int] = None,
+    id_tecnico: Optional[int] = None,
+    id_cliente: Optional[int] = None,
+    tipo: Optional[str] = None,
+):
+    consulta = filtrar_mantenimientos(pag, desde, hasta, tipo, alias="mt.")
+    consulta.filtro("mt.id_maquina = %s", id_maquina).filtro("mt.id_tecnico = %s", id_tecnico)
+    consulta.filtro("m.id_cliente = %s", id_cliente)
+    return await MANTENIMIENTOS.listar(consulta, base=SELECT_MANTENIMIENTOS_EXPANDIDO, modelo=MantenimientoExpandido)
 
+# Exportar mantenimientos en NDJSON o CSV (streaming, memoria constante)
+@router.get("/export", dependencies=[Depends(condicional("mantenimientos"))])
+def exportar_mantenimientos(
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_maquina: Optional[int] = None,
+):
+    consulta = MANTENIMIENTOS.consulta(Paginacion(limit=None, after=None))
+    consulta.filtro("fecha >= %s", desde).filtro("fecha <= %s", hasta).filtro("id_maquina = %s", id_maquina)
+    sql, params = consulta.armar(MANTENIMIENTOS.select)
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id_mantenimiento, id_maquina, id_tecnico, tipo, fecha, observaciones 
-            FROM mantenimientos 
-            ORDER BY fecha DESC
-        """)
-        resultados = cursor.fetchall()
-        return resultados
+        return exportar(sql, params, formato, "mantenimientos")
+    except HTTPException:
+        raise
     except Exception as e:
-        print("❌ Error al obtener mantenimientos:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
-
-# Get mantenimiento por ID
-@router.get("/{id}", response_model=Mantenimiento)
-def obtener_mantenimiento(id: int):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
+        raise error_interno("exportar mantenimientos", e)
 
+# Maquinas con el mantenimiento vencido o por vencer segun su historial, las mas atrasadas primero
+@router.get("/programados", response_model=list[MantenimientoProgramado])
+async def listar_programados(
+    dias: int = Query(30, ge=0, le=365, description="Incluir las que vencen dentro de estos dias"),
+    estado: Optional[Literal["vencidos", "proximos"]] = None,
+    limit: int = Query(100, ge=1, le=LIMITE_MAX),
+):
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id_mantenimiento, id_maquina, id_tecnico, tipo, fecha, observaciones 
-            FROM mantenimientos 
-            WHERE id_mantenimiento = %s
-        """, (id,))
-        resultado = cursor.fetchone()
-        if resultado is None:
-            raise HTTPException(status_code=404, detail="Mantenimiento no encontrado")
-        return resultado
+        plan = await planificador.plan()
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Error al obtener mantenimiento:", e)
-        raise HTTPException(status_code=500, detail="Error al obtener mantenimiento")
-    finally:
-        cursor.close()
-        conn.close()
+        raise error_interno("planificar mantenimientos", e)
+    return respuesta_json(plan.listar(dias, estado, limit), MantenimientoProgramado)
 
-# Get mantenimientos por máquina ID
-@router.get("/maquina/{maquina_id}", response_model=list[Mantenimiento])
-def obtener_mantenimientos_por_maquina(maquina_id: int):
-    conn = get_connection()
-    if conn is None:
-        return []
+# Get mantenimiento por ID
+@router.get("/{id}", response_model=Mantenimiento, dependencies=[Depends(condicional("mantenimientos"))])
+async def obtener_mantenimiento(id: int):
+    return await MANTENIMIENTOS.obtener(id)
 
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id_mantenimiento, id_maquina, id_tecnico, tipo, fecha, observaciones 
-            FROM mantenimientos 
-            WHERE id_maquina = %s 
-            ORDER BY fecha DESC
-        """, (maquina_id,))
-        resultados = cursor.fetchall()
-        return resultados
-    except Exception as e:
-        print("❌ Error al obtener mantenimientos por máquina:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+# Get mantenimientos por máquina ID
+@router.get("/maquina/{maquina_id}", response_model=list[Mantenimiento], dependencies=[Depends(condicional("mantenimientos"))])
+async def obtener_mantenimientos_por_maquina(
+    maquina_id: int,
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    tipo: Optional[str] = None,
+):
+    consulta = filtrar_mantenimientos(pag, desde, hasta, tipo).filtro("id_maquina = %s", maquina_id)
+    return await MANTENIMIENTOS.listar(consulta)
 
 # Get mantenimientos por técnico ID
-@router.get("/tecnico/{tecnico_id}", response_model=list[Mantenimiento])
-def obtener_mantenimientos_por_tecnico(tecnico_id: int):
-    conn = get_connection()
-    if conn is None:
-        return []
-
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id_mantenimiento, id_maquina, id_tecnico, tipo, fecha, observaciones 
-            FROM mantenimientos 
-            WHERE id_tecnico = %s 
-            ORDER BY fecha DESC
-        """, (tecnico_id,))
-        resultados = cursor.fetchall()
-        return resultados
-    except Exception as e:
-        print("❌ Error al obtener mantenimientos por técnico:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+@router.get("/tecnico/{tecnico_id}", response_model=list[Mantenimiento], dependencies=[Depends(condicional("mantenimientos"))])
+async def obtener_mantenimientos_por_tecnico(
+    tecnico_id: int,
+    pag: Paginacion = Depends(),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    tipo: Optional[str] = None,
+):
+    consulta = filtrar_mantenimientos(pag, desde, hasta, tipo).filtro("id_tecnico = %s", tecnico_id)
+    return await MANTENIMIENTOS.listar(consulta)
 
 # Crear un mantenimiento
 @router.post("/", response_model=Mantenimiento)
-def crear_mantenimiento(mantenimiento: MantenimientoBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO mantenimientos (id_maquina, id_tecnico, tipo, fecha, observaciones) 
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            mantenimiento.id_maquina,
-            mantenimiento.id_tecnico,
-            mantenimiento.tipo,
-            mantenimiento.fecha,
-            mantenimiento.observaciones
-        ))
-        conn.commit()
-        nuevo_id = cursor.lastrowid
-        
-        return Mantenimiento(
-            id_mantenimiento=nuevo_id,
-            **mantenimiento.dict()
-        )
-    except Exception as e:
-        print("❌ Error al crear mantenimiento:", e)
-        raise HTTPException(status_code=500, detail="Error al crear mantenimiento")
-    finally:
-        cursor.close()
-        conn.close()
+def crear_mantenimiento(mantenimiento: MantenimientoBase, conn=Depends(get_db)):
+    nuevo = MANTENIMIENTOS.insertar(conn, mantenimiento)
+    planificador.anotar(nuevo.id_mantenimiento, nuevo.id_maquina, nuevo.fecha)
+    return nuevo
 
 # Actualizar un mantenimiento por ID
 @router.put("/{id}", response_model=Mantenimiento)
-def actualizar_mantenimiento(id: int, mantenimiento: MantenimientoBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE mantenimientos 
-            SET id_maquina=%s, id_tecnico=%s, tipo=%s, fecha=%s, observaciones=%s 
-            WHERE id_mantenimiento=%s
-        """, (
-            mantenimiento.id_maquina,
-            mantenimiento.id_tecnico,
-            mantenimiento.tipo,
-            mantenimiento.fecha,
-            mantenimiento.observaciones,
-            id
-        ))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Mantenimiento no encontrado")
-        
-        return Mantenimiento(id_mantenimiento=id, **mantenimiento.dict())
-    except HTTPException:
-        raise
-    except Exception as e:
-        print("❌ Error al actualizar mantenimiento:", e)
-        raise HTTPException(status_code=500, detail="Error al actualizar mantenimiento")
-    finally:
-        cursor.close()
-        conn.close()
+def actualizar_mantenimiento(id: int, mantenimiento: MantenimientoBase, conn=Depends(get_db)):
+    actualizado = MANTENIMIENTOS.actualizar(conn, id, mantenimiento)
+    planificador.anotar(id, actualizado.id_maquina, actualizado.fecha)
+    return actualizado
 
 # Eliminar un mantenimiento por ID
 @router.delete("/{id}")
-def eliminar_mantenimiento(id: int):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM mantenimientos WHERE id_mantenimiento = %s", (id,))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Mantenimiento no encontrado")
-        return {"message": "Mantenimiento eliminado exitosamente"}
-    except Exception as e:
-        print("❌ Error al eliminar mantenimiento:", e)
-        raise HTTPException(status_code=500, detail="Error al eliminar mantenimiento")
-    finally:
-        cursor.close()
-        conn.close()
+def eliminar_mantenimiento(id: int, conn=Depends(get_db)):
+    respuesta = MANTENIMIENTOS.eliminar(conn, id, "Mantenimiento eliminado exitosamente")
+    planificador.quitar(id)
+    return respuesta
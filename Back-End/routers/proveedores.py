@@ -1,74 +1,29 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from models.proveedor import Proveedor, ProveedorBase
-from database.connection import get_connection
-from fastapi import HTTPException
+from database.connection import get_db
+from database.paginacion import Paginacion
+from database.repositorio import PROVEEDORES
+from database.versiones import condicional
+from database.busqueda import Busqueda
 
 router = APIRouter()
 
-# Get de todos los cientes
-@router.get("/", response_model=list[Proveedor])
-def listar_clientes():
-    conn = get_connection()
-    if conn is None:
-        return []
+# Get de todos los proveedores
+@router.get("/", response_model=list[Proveedor], dependencies=[Depends(condicional("proveedores"))])
+async def listar_proveedores(pag: Paginacion = Depends()):
+    return await PROVEEDORES.listar(PROVEEDORES.consulta(pag), clave_cache=(pag.limit, pag.after))
 
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id_proveedor, nombre FROM proveedores")
-        resultados = cursor.fetchall()
-        return resultados
-    except Exception as e:
-        print("❌ Error al obtener proveedor:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+# Buscar proveedores por nombre
+@router.get("/buscar", response_model=list[Proveedor], dependencies=[Depends(condicional("proveedores"))])
+async def buscar_proveedores(busqueda: Busqueda = Depends()):
+    return await PROVEEDORES.buscar(busqueda)
 
-# Crear un cliente
+# Crear un proveedor
 @router.post("/", response_model=Proveedor)
-def crear_proveedor(proveedor: ProveedorBase):
-    conn = get_connection()
-    if conn is None:
-        return None
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO proveedores (nombre) VALUES (%s)",
-            (proveedor.nombre,)
-        )
-        conn.commit()
-        nuevo_id = cursor.lastrowid
-        return Proveedor(
-            id_proveedor=nuevo_id,
-            **proveedor.dict()
-        )
-    except Exception as e:
-        print("❌ Error al crear proveedor:", e)
-        return None
-    finally:
-        cursor.close()
-        conn.close()
+def crear_proveedor(proveedor: ProveedorBase, conn=Depends(get_db)):
+    return PROVEEDORES.insertar(conn, proveedor)
 
-# updatear un cliente por ID
+# updatear un proveedor por ID
 @router.put("/{id}", response_model=Proveedor)
-def actualizar_proveedor(id: int, proveedor: ProveedorBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE proveedores SET nombre=%s WHERE id_proveedor=%s",
-            (proveedor.nombre, id)
-        )
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Proveedor no encontrado")
-        return Proveedor(id_proveedor=id, **proveedor.dict())
-    except Exception as e:
-        print("❌ Error al actualizar proveedor:", e)
-        raise HTTPException(status_code=500, detail="Error al actualizar proveedor")
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+def actualizar_proveedor(id: int, proveedor: ProveedorBase, conn=Depends(get_db)):
+    return PROVEEDORES.actualizar(conn, id, proveedor)
@@ -1,64 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Query
+from typing import Optional, Union
 from models.tecnico import Tecnico, TecnicoBase
-from database.connection import get_connection
+from models.delta import Delta
+from database.connection import get_db
+from database.paginacion import Paginacion
+from database.repositorio import TECNICOS
+from database.versiones import condicional
+from database.delta import DESCRIPCION_SINCE
 
 router = APIRouter()
 
-@router.get("/", response_model=list[Tecnico])
-def listar_tecnicos():
-    conn = get_connection()
-    if conn is None:
-        return []
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id_tecnico, nombre, tipo_visita, id_cliente FROM tecnicos")
-        return cursor.fetchall()
-    except Exception as e:
-        print("❌ Error al obtener técnicos:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+@router.get("/", response_model=Union[list[Tecnico], Delta[Tecnico]], dependencies=[Depends(condicional("tecnicos"))])
+async def listar_tecnicos(
+    pag: Paginacion = Depends(),
+    id_cliente: Optional[int] = None,
+    tipo_visita: Optional[str] = None,
+    since: Optional[str] = Query(None, description=DESCRIPCION_SINCE),
+):
+    if since is not None:
+        return await TECNICOS.cambios(since, pag, id_cliente=id_cliente, tipo_visita=tipo_visita)
+    consulta = TECNICOS.consulta(pag)
+    consulta.filtro("id_cliente = %s", id_cliente).filtro("tipo_visita = %s", tipo_visita)
+    return await TECNICOS.listar(consulta, clave_cache=(pag.limit, pag.after, id_cliente, tipo_visita))
 
 @router.post("/", response_model=Tecnico)
-def crear_tecnico(tecnico: TecnicoBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar")
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO tecnicos (nombre, tipo_visita, id_cliente) VALUES (%s, %s, %s)",
-            (tecnico.nombre, tecnico.tipo_visita, tecnico.id_cliente)
-        )
-        conn.commit()
-        nuevo_id = cursor.lastrowid
-        return Tecnico(id_tecnico=nuevo_id, **tecnico.dict())
-    except Exception as e:
-        print("❌ Error al crear técnico:", e)
-        raise HTTPException(status_code=500, detail="Error al crear técnico")
-    finally:
-        cursor.close()
-        conn.close()
+def crear_tecnico(tecnico: TecnicoBase, conn=Depends(get_db)):
+    return TECNICOS.insertar(conn, tecnico)
 
 @router.put("/{id}", response_model=Tecnico)
-def actualizar_tecnico(id: int, tecnico: TecnicoBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE tecnicos SET nombre=%s, tipo_visita=%s, id_cliente=%s WHERE id_tecnico=%s",
-            (tecnico.nombre, tecnico.tipo_visita, tecnico.id_cliente, id)
-        )
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Técnico no encontrado")
-        return Tecnico(id_tecnico=id, **tecnico.dict())
-    except Exception as e:
-        print("❌ Error al actualizar técnico:", e)
-        raise HTTPException(status_code=500, detail="Error al actualizar técnico")
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+def actualizar_tecnico(id: int, tecnico: TecnicoBase, conn=Depends(get_db)):
+    return TECNICOS.actualizar(conn, id, tecnico)
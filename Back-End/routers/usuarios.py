@@ -1,168 +1,111 @@
-from fastapi import APIRouter, HTTPException
-from models.usuario import Usuario, UsuarioBase, UsuarioLogin, UsuarioRegister, UsuarioCompleto
-from database.connection import get_connection
+from fastapi import APIRouter, Depends, HTTPException
+from mysql.connector.errors import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from models.usuario import Usuario, UsuarioBase, UsuarioLogin, UsuarioRegister, UsuarioSesion
+from database.connection import get_db, conexion
+from database.async_connection import fetch_one
+from database.paginacion import Paginacion
+from database.cambios import registrar_cambio
+from database.preparadas import ejecutar, fila
+from database.repositorio import USUARIOS, error_interno
+from database.versiones import condicional
+from database.seguridad import emitir_token, hashear, verificar, hay_que_rehashear
 
 router = APIRouter()
 
-# Registro de usuario
-@router.post("/register", response_model=Usuario)
-def registrar_usuario(usuario: UsuarioRegister):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-    
-    try:
-        cursor = conn.cursor()
-        # Verificar si el usuario ya existe
-        cursor.execute("SELECT id_usuario FROM usuarios WHERE nombre = %s", (usuario.nombre,))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="El usuario ya existe")
-        
-        # Crear nuevo usuario
-        cursor.execute(
-            "INSERT INTO usuarios (nombre, contrasenia, cargo) VALUES (%s, %s, %s)",
-            (usuario.nombre, usuario.contrasenia, usuario.cargo)
-        )
-        conn.commit()
-        nuevo_id = cursor.lastrowid
-        
-        return Usuario(
-            id_usuario=nuevo_id,
-            nombre=usuario.nombre,
-            cargo=usuario.cargo
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        print("❌ Error al registrar usuario:", e)
-        raise HTTPException(status_code=500, detail="Error al registrar usuario")
-    finally:
-        cursor.close()
-        conn.close()
+SQL_LOGIN = "SELECT id_usuario, nombre, contrasenia, cargo FROM usuarios WHERE nombre = %s"
+SQL_EXISTE = "SELECT id_usuario FROM usuarios WHERE nombre = %s"
+SQL_INSERTAR = "INSERT INTO usuarios (nombre, contrasenia, cargo) VALUES (%s, %s, %s)"
+SQL_GUARDAR_HASH = "UPDATE usuarios SET contrasenia = %s WHERE id_usuario = %s"
+# Duplicate entry (uq_usuarios_nombre)
+ERRNO_DUPLICADO = 1062
 
-# Login de usuario
-@router.post("/login", response_model=Usuario)
-def login_usuario(credenciales: UsuarioLogin):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-    
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id_usuario, nombre, contrasenia, cargo FROM usuarios WHERE nombre = %s",
-            (credenciales.nombre,)
-        )
-        usuario = cursor.fetchone()
-        
-        if not usuario:
-            raise HTTPException(status_code=401, detail="Usuario no encontrado")
-        
-        if usuario['contrasenia'] != credenciales.contrasenia:
-            raise HTTPException(status_code=401, detail="Contraseña incorrecta")
-        
-        return Usuario(
-            id_usuario=usuario['id_usuario'],
-            nombre=usuario['nombre'],
-            cargo=usuario['cargo']
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        print("❌ Error al hacer login:", e)
-        raise HTTPException(status_code=500, detail="Error al hacer login")
-    finally:
-        cursor.close()
-        conn.close()
+def sesion(usuario):
+    token, expira = emitir_token(usuario)
+    return UsuarioSesion(
+        id_usuario=usuario["id_usuario"],
+        nombre=usuario["nombre"],
+        cargo=usuario["cargo"],
+        token=token,
+        expira=expira
+    )
 
-# Get de todos los usuarios
-@router.get("/", response_model=list[Usuario])
-def listar_usuarios():
-    conn = get_connection()
-    if conn is None:
-        return []
+def _insertar(usuario, contrasenia):
+    with conexion() as conn:
+        try:
+            # Verificar si el usuario ya existe
+            if fila(conn, SQL_EXISTE, (usuario.nombre,)):
+                raise HTTPException(status_code=400, detail="El usuario ya existe")
+            nuevo_id = ejecutar(conn, SQL_INSERTAR, (usuario.nombre, contrasenia, usuario.cargo)).lastrowid
+            conn.commit()
+        except HTTPException:
+            raise
+        except IntegrityError as e:
+            conn.rollback()
+            # Dos registros del mismo nombre a la vez pasan los dos el SELECT: el indice unico frena al segundo
+            if e.errno == ERRNO_DUPLICADO:
+                raise HTTPException(status_code=400, detail="El usuario ya existe")
+            raise error_interno("registrar usuario", e)
+        except Exception as e:
+            conn.rollback()
+            raise error_interno("registrar usuario", e)
+    registrar_cambio("usuarios", "insert", nuevo_id)
+    return nuevo_id
 
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id_usuario, nombre, cargo FROM usuarios")
-        resultados = cursor.fetchall()
-        return resultados
-    except Exception as e:
-        print("❌ Error al obtener usuarios:", e)
-        return []
-    finally:
-        cursor.close()
-        conn.close()
+def _guardar_hash(id_usuario, contrasenia):
+    with conexion() as conn:
+        try:
+            ejecutar(conn, SQL_GUARDAR_HASH, (contrasenia, id_usuario))
+            conn.commit()
+        except Exception as e:
+            # El login ya fue valido: se vuelve a intentar en el proximo
+            conn.rollback()
+            print("❌ Error al rehashear la contraseña:", e)
 
-# Get usuario por ID
-@router.get("/{id}", response_model=Usuario)
-def obtener_usuario(id: int):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
+# Registro de usuario (el hash corre en el pool de bcrypt; la conexion se toma solo para el INSERT)
+@router.post("/register", response_model=UsuarioSesion)
+async def registrar_usuario(usuario: UsuarioRegister):
+    contrasenia = await hashear(usuario.contrasenia)
+    nuevo_id = await run_in_threadpool(_insertar, usuario, contrasenia)
+    return sesion({"id_usuario": nuevo_id, "nombre": usuario.nombre, "cargo": usuario.cargo})
 
+# Login de usuario: devuelve un token firmado que despues se valida sin ir a la base
+@router.post("/login", response_model=UsuarioSesion)
+async def login_usuario(credenciales: UsuarioLogin):
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id_usuario, nombre, cargo FROM usuarios WHERE id_usuario = %s",
-            (id,)
-        )
-        resultado = cursor.fetchone()
-        if resultado is None:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        return resultado
-    except HTTPException:
-        raise
+        usuario = await fetch_one(SQL_LOGIN, (credenciales.nombre,))
     except Exception as e:
-        print("❌ Error al obtener usuario:", e)
-        raise HTTPException(status_code=500, detail="Error al obtener usuario")
-    finally:
-        cursor.close()
-        conn.close()
+        raise error_interno("hacer login", e)
+
+    if not usuario:
+        raise HTTPException(status_code=401, detail="Usuario no encontrado")
+
+    if not await verificar(credenciales.contrasenia, usuario['contrasenia']):
+        raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+
+    # Contraseñas de antes de bcrypt (o con otro costo) se rehashean con la que se acaba de validar
+    if hay_que_rehashear(usuario['contrasenia']):
+        await run_in_threadpool(_guardar_hash, usuario['id_usuario'], await hashear(credenciales.contrasenia))
+
+    return sesion(usuario)
+
+# Get de todos los usuarios
+@router.get("/", response_model=list[Usuario], dependencies=[Depends(condicional("usuarios"))])
+async def listar_usuarios(pag: Paginacion = Depends(), cargo: Optional[str] = None):
+    return await USUARIOS.listar(USUARIOS.consulta(pag).filtro("cargo = %s", cargo))
+
+# Get usuario por ID
+@router.get("/{id}", response_model=Usuario, dependencies=[Depends(condicional("usuarios"))])
+async def obtener_usuario(id: int):
+    return await USUARIOS.obtener(id)
 
 # Actualizar usuario por ID
 @router.put("/{id}", response_model=Usuario)
-def actualizar_usuario(id: int, usuario: UsuarioBase):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE usuarios SET nombre=%s, cargo=%s WHERE id_usuario=%s",
-            (usuario.nombre, usuario.cargo, id)
-        )
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        return Usuario(id_usuario=id, **usuario.dict())
-    except HTTPException:
-        raise
-    except Exception as e:
-        print("❌ Error al actualizar usuario:", e)
-        raise HTTPException(status_code=500, detail="Error al actualizar usuario")
-    finally:
-        cursor.close()
-        conn.close()
+def actualizar_usuario(id: int, usuario: UsuarioBase, conn=Depends(get_db)):
+    return USUARIOS.actualizar(conn, id, usuario)
 
 # Eliminar usuario por ID
 @router.delete("/{id}")
-def eliminar_usuario(id: int):
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="No se pudo conectar a la base de datos")
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM usuarios WHERE id_usuario = %s", (id,))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        return {"message": "Usuario eliminado exitosamente"}
-    except Exception as e:
-        print("❌ Error al eliminar usuario:", e)
-        raise HTTPException(status_code=500, detail="Error al eliminar usuario")
-    finally:
-        cursor.close()
-        conn.close()
+def eliminar_usuario(id: int, conn=Depends(get_db)):
+    return USUARIOS.eliminar(conn, id, "Usuario eliminado exitosamente")
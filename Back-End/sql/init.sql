@@ -1,15 +1,5 @@
--- Borrar tablas si existen
-DROP TABLE IF EXISTS mantenimientos;
-DROP TABLE IF EXISTS tecnicos;
-DROP TABLE IF EXISTS consumoInsumos;
-DROP TABLE IF EXISTS insumos;
-DROP TABLE IF EXISTS proveedores;
-DROP TABLE IF EXISTS maquinas;
-DROP TABLE IF EXISTS clientes;
-DROP TABLE IF EXISTS usuarios;
-
--- Crear tablas
-CREATE TABLE clientes (
+-- Crear tablas (sin borrar nada: los cambios posteriores van en sql/migraciones)
+CREATE TABLE IF NOT EXISTS clientes (
     id_cliente INTEGER PRIMARY KEY AUTO_INCREMENT,
     nombre VARCHAR(30) NOT NULL,
     direccion VARCHAR(100),
@@ -17,7 +7,7 @@ CREATE TABLE clientes (
     correo VARCHAR(30)
 );
 
-CREATE TABLE maquinas (
+CREATE TABLE IF NOT EXISTS maquinas (
     id_maquina INTEGER PRIMARY KEY AUTO_INCREMENT,
     modelo VARCHAR(50),
     id_cliente INTEGER,
@@ -26,12 +16,12 @@ CREATE TABLE maquinas (
     FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente)
 );
 
-CREATE TABLE proveedores (
+CREATE TABLE IF NOT EXISTS proveedores (
     id_proveedor INTEGER PRIMARY KEY AUTO_INCREMENT,
     nombre VARCHAR(50)
 );
 
-CREATE TABLE insumos (
+CREATE TABLE IF NOT EXISTS insumos (
     id_insumo INTEGER PRIMARY KEY AUTO_INCREMENT,
     tipo VARCHAR(50),
     precio INTEGER,
@@ -39,7 +29,7 @@ CREATE TABLE insumos (
     FOREIGN KEY (id_proveedor) REFERENCES proveedores(id_proveedor)
 );
 
-CREATE TABLE consumoInsumos (
+CREATE TABLE IF NOT EXISTS consumoInsumos (
     id_consumo INTEGER PRIMARY KEY AUTO_INCREMENT,
     fecha DATETIME,
     id_maquina INTEGER,
@@ -49,7 +39,7 @@ CREATE TABLE consumoInsumos (
     FOREIGN KEY (id_maquina) REFERENCES maquinas(id_maquina)
 );
 
-CREATE TABLE tecnicos (
+CREATE TABLE IF NOT EXISTS tecnicos (
     id_tecnico INTEGER PRIMARY KEY AUTO_INCREMENT,
     nombre VARCHAR(50),
     tipo_visita VARCHAR(50),
@@ -57,7 +47,7 @@ CREATE TABLE tecnicos (
     FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente)
 );
 
-CREATE TABLE mantenimientos (
+CREATE TABLE IF NOT EXISTS mantenimientos (
     id_mantenimiento INTEGER PRIMARY KEY AUTO_INCREMENT,
     id_maquina INTEGER,
     id_tecnico INTEGER,
@@ -68,7 +58,7 @@ CREATE TABLE mantenimientos (
     FOREIGN KEY (id_tecnico) REFERENCES tecnicos(id_tecnico)
 );
 
-CREATE TABLE usuarios (
+CREATE TABLE IF NOT EXISTS usuarios (
     id_usuario INTEGER PRIMARY KEY AUTO_INCREMENT,
     nombre VARCHAR(50),
     contrasenia VARCHAR(200),
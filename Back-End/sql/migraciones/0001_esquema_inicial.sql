@@ -0,0 +1,66 @@
+-- Esquema base (igual a init.sql). Usa IF NOT EXISTS para poder adoptar bases ya creadas
+CREATE TABLE IF NOT EXISTS clientes (
+    id_cliente INTEGER PRIMARY KEY AUTO_INCREMENT,
+    nombre VARCHAR(30) NOT NULL,
+    direccion VARCHAR(100),
+    telefono VARCHAR(30),
+    correo VARCHAR(30)
+);
+
+CREATE TABLE IF NOT EXISTS maquinas (
+    id_maquina INTEGER PRIMARY KEY AUTO_INCREMENT,
+    modelo VARCHAR(50),
+    id_cliente INTEGER,
+    ubicacion_cliente VARCHAR(200),
+    costo_alquiler_mensual INTEGER,
+    FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente)
+);
+
+CREATE TABLE IF NOT EXISTS proveedores (
+    id_proveedor INTEGER PRIMARY KEY AUTO_INCREMENT,
+    nombre VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS insumos (
+    id_insumo INTEGER PRIMARY KEY AUTO_INCREMENT,
+    tipo VARCHAR(50),
+    precio INTEGER,
+    id_proveedor INTEGER,
+    FOREIGN KEY (id_proveedor) REFERENCES proveedores(id_proveedor)
+);
+
+CREATE TABLE IF NOT EXISTS consumoInsumos (
+    id_consumo INTEGER PRIMARY KEY AUTO_INCREMENT,
+    fecha DATETIME,
+    id_maquina INTEGER,
+    cobro_mensual FLOAT,
+    id_insumo INTEGER,
+    FOREIGN KEY (id_insumo) REFERENCES insumos(id_insumo),
+    FOREIGN KEY (id_maquina) REFERENCES maquinas(id_maquina)
+);
+
+CREATE TABLE IF NOT EXISTS tecnicos (
+    id_tecnico INTEGER PRIMARY KEY AUTO_INCREMENT,
+    nombre VARCHAR(50),
+    tipo_visita VARCHAR(50),
+    id_cliente INTEGER,
+    FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente)
+);
+
+CREATE TABLE IF NOT EXISTS mantenimientos (
+    id_mantenimiento INTEGER PRIMARY KEY AUTO_INCREMENT,
+    id_maquina INTEGER,
+    id_tecnico INTEGER,
+    tipo VARCHAR(50),
+    fecha DATETIME,
+    observaciones VARCHAR(200),
+    FOREIGN KEY (id_maquina) REFERENCES maquinas(id_maquina),
+    FOREIGN KEY (id_tecnico) REFERENCES tecnicos(id_tecnico)
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id_usuario INTEGER PRIMARY KEY AUTO_INCREMENT,
+    nombre VARCHAR(50),
+    contrasenia VARCHAR(200),
+    cargo VARCHAR(50)
+);
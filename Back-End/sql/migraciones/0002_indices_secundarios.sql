@@ -0,0 +1,16 @@
+-- Indices para las consultas calientes de los routers.
+-- En InnoDB cada indice secundario ya incluye la PK al final, asi que (id_maquina, fecha)
+-- sirve para "WHERE id_maquina = ? ORDER BY fecha DESC, id_consumo DESC" sin filesort.
+
+CREATE INDEX idx_consumo_maquina_fecha ON consumoInsumos (id_maquina, fecha);
+CREATE INDEX idx_consumo_fecha ON consumoInsumos (fecha);
+
+CREATE INDEX idx_mant_maquina_fecha ON mantenimientos (id_maquina, fecha);
+CREATE INDEX idx_mant_tecnico_fecha ON mantenimientos (id_tecnico, fecha);
+CREATE INDEX idx_mant_fecha ON mantenimientos (fecha);
+
+CREATE INDEX idx_tecnicos_cliente_visita ON tecnicos (id_cliente, tipo_visita);
+
+-- El login busca por nombre en cada intento; ademas el nombre no se puede repetir.
+-- Si ya hay nombres duplicados esta migracion falla y hay que limpiarlos primero.
+CREATE UNIQUE INDEX uq_usuarios_nombre ON usuarios (nombre);
@@ -0,0 +1,19 @@
+-- Resumen mensual de consumos por (maquina, insumo, mes). Lo mantiene el router de consumos
+-- en la misma transaccion de cada alta/cambio/baja; se puede recalcular con
+-- python -m database.consumo_mensual --rebuild
+CREATE TABLE IF NOT EXISTS consumo_mensual (
+    id_maquina INTEGER NOT NULL,
+    id_insumo INTEGER NOT NULL,
+    mes DATE NOT NULL,
+    registros INTEGER NOT NULL DEFAULT 0,
+    total_cobro DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_maquina, id_insumo, mes),
+    INDEX idx_consumo_mensual_mes (mes)
+);
+
+-- Carga inicial con lo que ya hay
+INSERT INTO consumo_mensual (id_maquina, id_insumo, mes, registros, total_cobro)
+SELECT id_maquina, id_insumo, DATE_SUB(DATE(fecha), INTERVAL DAYOFMONTH(fecha) - 1 DAY), COUNT(*), SUM(cobro_mensual)
+FROM consumoInsumos
+WHERE fecha IS NOT NULL AND id_maquina IS NOT NULL AND id_insumo IS NOT NULL
+GROUP BY 1, 2, 3;
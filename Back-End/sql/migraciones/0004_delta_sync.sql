@@ -0,0 +1,34 @@
+-- Sincronizacion incremental (?since= en las listas): cada tabla principal guarda cuando
+-- cambio cada fila y las bajas quedan anotadas en `eliminados` (tombstones).
+-- updated_at arranca con la hora de la migracion para las filas que ya existen.
+ALTER TABLE clientes
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_clientes_updated (updated_at);
+
+ALTER TABLE maquinas
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_maquinas_updated (updated_at);
+
+ALTER TABLE insumos
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_insumos_updated (updated_at);
+
+ALTER TABLE tecnicos
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_tecnicos_updated (updated_at);
+
+ALTER TABLE consumoInsumos
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_consumo_updated (updated_at);
+
+ALTER TABLE mantenimientos
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_mant_updated (updated_at);
+
+CREATE TABLE IF NOT EXISTS eliminados (
+    tabla VARCHAR(32) NOT NULL,
+    id INTEGER NOT NULL,
+    eliminado_en DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (tabla, id),
+    INDEX idx_eliminados_tabla_fecha (tabla, eliminado_en, id)
+);
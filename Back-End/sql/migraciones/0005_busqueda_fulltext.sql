@@ -0,0 +1,9 @@
+-- Busqueda de texto del lado del servidor (/api/clientes/buscar, /maquinas/buscar, ...).
+-- Los indices FULLTEXT de InnoDB tokenizan por palabra; la API busca cada palabra como
+-- prefijo en BOOLEAN MODE y ordena por relevancia. Cada indice cubre exactamente las
+-- columnas del MATCH(...) de su busqueda (tienen que coincidir en orden y cantidad).
+
+CREATE FULLTEXT INDEX ft_clientes_texto ON clientes (nombre, direccion, correo);
+CREATE FULLTEXT INDEX ft_maquinas_texto ON maquinas (modelo, ubicacion_cliente);
+CREATE FULLTEXT INDEX ft_insumos_texto ON insumos (tipo);
+CREATE FULLTEXT INDEX ft_proveedores_texto ON proveedores (nombre);
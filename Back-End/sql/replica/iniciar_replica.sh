@@ -0,0 +1,18 @@
+#!/bin/bash
+# Replica de lectura de compose.replicas.yml (DB_REPLICAS): copia todo del primario por GTID
+# con el usuario de replicacion que crea usuario_replicacion.sh en el primario.
+# Corre una sola vez, cuando el volumen de la replica esta vacio. La base, el usuario y las
+# tablas llegan por la replicacion (init.sql corre en el primario), por eso este contenedor
+# no define MYSQL_DATABASE ni MYSQL_USER.
+set -e
+mysql -uroot -p"$MYSQL_ROOT_PASSWORD" <<SQL
+CHANGE REPLICATION SOURCE TO
+    SOURCE_HOST='mysql',
+    SOURCE_PORT=3306,
+    SOURCE_USER='replicador',
+    SOURCE_PASSWORD='$REPLICA_PASSWORD',
+    SOURCE_AUTO_POSITION=1,
+    GET_SOURCE_PUBLIC_KEY=1,
+    SOURCE_CONNECT_RETRY=5;
+START REPLICA;
+SQL
@@ -0,0 +1,9 @@
+#!/bin/bash
+# Usuario que usa la replica (iniciar_replica.sh) para leer el binlog del primario: solo
+# permisos de replicacion, nada sobre los datos. Corre en el primario cuando su volumen esta
+# vacio; la clave sale de REPLICA_PASSWORD (.env del compose).
+set -e
+mysql -uroot -p"$MYSQL_ROOT_PASSWORD" <<SQL
+CREATE USER IF NOT EXISTS 'replicador'@'%' IDENTIFIED BY '$REPLICA_PASSWORD';
+GRANT REPLICATION SLAVE, REPLICATION CLIENT ON *.* TO 'replicador'@'%';
+SQL
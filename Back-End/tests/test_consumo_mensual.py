@@ -0,0 +1,64 @@
+"""Resumen mensual con consumos viejos sin fecha (sin base: la conexion es un doble)"""
+from datetime import datetime
+import pytest
+from database import consumo_mensual
+from models.consumo import ConsumoUpdate
+from routers import consumos
+
+
+class Conexion:
+    def __init__(self, fila):
+        self.fila = fila
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def sql(monkeypatch):
+    """Lista de (sql, params) que llegan a la base (router y resumen)"""
+    ejecutadas = []
+
+    def ejecutar(conn, sql, params=()):
+        ejecutadas.append((sql, tuple(params)))
+
+    monkeypatch.setattr(consumos, "ejecutar", ejecutar)
+    monkeypatch.setattr(consumos, "registrar_baja", lambda *a: None)
+    monkeypatch.setattr(consumos, "registrar_cambio", lambda *a: None)
+    monkeypatch.setattr(consumos, "fila", lambda conn, sql, params=(): conn.fila)
+    monkeypatch.setattr(consumo_mensual, "ejecutar", ejecutar)
+    return ejecutadas
+
+
+def _resumen(ejecutadas):
+    return [params for sql, params in ejecutadas if "consumo_mensual" in sql]
+
+
+def test_aplicar_ignora_movimientos_sin_fecha(sql):
+    consumo_mensual.aplicar(None, [(1, 2, None, 50.0, -1)])
+    assert _resumen(sql) == []
+
+
+def test_actualizar_consumo_sin_fecha(sql):
+    conn = Conexion({"id_maquina": 1, "id_insumo": 2, "fecha": None, "cobro_mensual": 50.0})
+    fecha = datetime(2026, 3, 15, 10, 0)
+
+    resultado = consumos.update_consumo(7, ConsumoUpdate(fecha=fecha), conn)
+
+    assert resultado.fecha == fecha
+    assert conn.commits == 1
+    # La baja del valor viejo (sin fecha) no toca el resumen; el alta cae en su mes
+    assert _resumen(sql) == [(1, 2, datetime(2026, 3, 1).date(), 1, 50.0)]
+
+
+def test_eliminar_consumo_sin_fecha(sql):
+    conn = Conexion({"id_maquina": 1, "id_insumo": 2, "fecha": None, "cobro_mensual": 50.0})
+
+    consumos.delete_consumo(7, conn)
+
+    assert conn.commits == 1
+    assert _resumen(sql) == []
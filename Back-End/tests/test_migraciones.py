@@ -0,0 +1,54 @@
+"""Migraciones pendientes al arrancar (sin base: el cursor es un doble)"""
+import pytest
+from mysql.connector import Error
+from database import migraciones
+
+
+class Cursor:
+    def __init__(self, versiones=None, error=None):
+        self.versiones = versiones
+        self.error = error
+
+    def execute(self, sql, params=None):
+        if self.error:
+            raise self.error
+
+    def fetchall(self):
+        return [(v,) for v in self.versiones]
+
+
+def _en_disco():
+    return [f"{version}_{nombre}" for version, nombre, _, _ in migraciones._migraciones()]
+
+
+def test_pendientes_sin_schema_migrations():
+    cursor = Cursor(error=Error(msg="Table 'marloy.schema_migrations' doesn't exist", errno=1146))
+    assert migraciones.pendientes(cursor) == _en_disco()
+
+
+def test_pendientes_aplicadas_en_parte():
+    en_disco = _en_disco()
+    cursor = Cursor(versiones=[m[:4] for m in en_disco[:-1]])
+    assert migraciones.pendientes(cursor) == en_disco[-1:]
+
+
+def test_pendientes_otro_error():
+    with pytest.raises(Error):
+        migraciones.pendientes(Cursor(error=Error(msg="Access denied", errno=1142)))
+
+
+def test_verificar_migraciones_falla_si_faltan(monkeypatch):
+    class Conexion:
+        def cursor(self):
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(migraciones, "conexion", Conexion)
+    monkeypatch.setattr(migraciones, "pendientes", lambda cursor: ["0005_busqueda_fulltext"])
+    with pytest.raises(migraciones.MigracionError, match="faltan migraciones: 0005_busqueda_fulltext"):
+        migraciones.verificar_migraciones()
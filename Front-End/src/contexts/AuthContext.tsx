@@ -5,6 +5,8 @@ interface User {
   id_usuario: number
   nombre: string
   cargo: string
+  token?: string
+  expira?: string
 }
 
 interface AuthContextType {
@@ -40,7 +42,13 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     const savedUser = localStorage.getItem('user')
     if (savedUser) {
       try {
-        setUser(JSON.parse(savedUser))
+        const parsed: User = JSON.parse(savedUser)
+        // Sesiones sin token (de antes) o con el token vencido vuelven al login
+        if (parsed.token && parsed.expira && new Date(parsed.expira) > new Date()) {
+          setUser(parsed)
+        } else {
+          localStorage.removeItem('user')
+        }
       } catch (error) {
         console.error('Error parsing saved user:', error)
         localStorage.removeItem('user')
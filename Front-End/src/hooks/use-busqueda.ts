@@ -0,0 +1,34 @@
+import * as React from "react"
+import api from "@/lib/api"
+
+const ESPERA_MS = 250
+const LIMITE = 50
+
+// Busqueda del lado del servidor (GET <ruta>/buscar?q=): espera a que se deje de tipear
+// y descarta las respuestas viejas. Con el termino vacio devuelve null (mostrar la lista
+// completa). `recargar` vuelve a buscar cuando cambia (ej. la lista despues de editar).
+export function useBusqueda<T>(ruta: string, termino: string, recargar?: unknown) {
+  const [resultados, setResultados] = React.useState<T[] | null>(null)
+
+  React.useEffect(() => {
+    const q = termino.trim()
+    if (!q) {
+      setResultados(null)
+      return
+    }
+    const controlador = new AbortController()
+    const timer = setTimeout(() => {
+      api.get(`${ruta}/buscar`, { params: { q, limit: LIMITE }, signal: controlador.signal })
+        .then(response => setResultados(response.data))
+        .catch(error => {
+          if (!controlador.signal.aborted) console.error("Error al buscar:", error)
+        })
+    }, ESPERA_MS)
+    return () => {
+      clearTimeout(timer)
+      controlador.abort()
+    }
+  }, [ruta, termino, recargar])
+
+  return resultados
+}
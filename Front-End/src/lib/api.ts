@@ -7,4 +7,18 @@ const api = axios.create({
   },
 });
 
+// Token de sesion que guarda AuthContext (el backend lo exige con AUTH_REQUERIDO=1)
+api.interceptors.request.use((config) => {
+  const savedUser = localStorage.getItem("user");
+  if (savedUser) {
+    try {
+      const { token } = JSON.parse(savedUser);
+      if (token) config.headers.Authorization = `Bearer ${token}`;
+    } catch {
+      // Usuario guardado invalido: AuthContext lo borra al cargar
+    }
+  }
+  return config;
+});
+
 export default api;
\ No newline at end of file
@@ -14,6 +14,7 @@ import {
 import { Plus, Search, Edit, MapPin, Phone, Mail, User, Settings } from "lucide-react"
 import api from "@/lib/api"
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from "@/components/ui/dialog"
+import { useBusqueda } from "@/hooks/use-busqueda"
 
 interface Cliente {
   id: number
@@ -45,12 +46,9 @@ export default function Clientes() {
       })
   }, [])
 
-  // Filtrar clientes segegun la busqueda
-  const filteredCustomers = clientes.filter(cliente =>
-    cliente.nombre?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    cliente.direccion?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    cliente.correo?.toLowerCase().includes(searchTerm.toLowerCase())
-  )
+  // Buscar clientes en el servidor por nombre, direccion o correo
+  const resultados = useBusqueda<Cliente>("/clientes", searchTerm, clientes)
+  const filteredCustomers = resultados ?? clientes
 
   const handleOpen = () => {
     setForm({ nombre: "", direccion: "", telefono: "", correo: "" })
@@ -17,6 +17,7 @@ import api from "@/lib/api"
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from "@/components/ui/dialog"
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select"
 import { useAuth } from "@/contexts/AuthContext"
+import { useBusqueda } from "@/hooks/use-busqueda"
 
 interface Maquina {
   id_maquina: number
@@ -72,11 +73,9 @@ export default function Maquinas() {
       })
   }, [])
 
-  // Filtrar máquinas según la búsqueda
-  const filteredMaquinas = maquinas.filter(maquina =>
-    maquina.modelo.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    maquina.ubicacion_cliente.toLowerCase().includes(searchTerm.toLowerCase())
-  )
+  // Buscar en el servidor por modelo o ubicación (sin término se muestran todas)
+  const resultados = useBusqueda<Maquina>("/maquinas", searchTerm, maquinas)
+  const filteredMaquinas = resultados ?? maquinas
 
   // Obtener nombre del cliente por ID
   const getClienteNombre = (id_cliente: number) => {
@@ -13,6 +13,7 @@ import {
 import { Plus, Search, Edit, Truck } from "lucide-react"
 import api from "@/lib/api"
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from "@/components/ui/dialog"
+import { useBusqueda } from "@/hooks/use-busqueda"
 
 export default function Proveedores() {
   const [searchTerm, setSearchTerm] = useState("")
@@ -33,9 +34,8 @@ export default function Proveedores() {
       })
   }, [])
 
-  const filteredProveedores = proveedores.filter(proveedor =>
-    proveedor.nombre.toLowerCase().includes(searchTerm.toLowerCase())
-  )
+  const resultados = useBusqueda<{ id_proveedor: number, nombre: string }>("/proveedores", searchTerm, proveedores)
+  const filteredProveedores = resultados ?? proveedores
 
   const handleNuevoProveedor = async () => {
     if (!nuevoNombre.trim()) return